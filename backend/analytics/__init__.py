@@ -0,0 +1,31 @@
+"""
+Analytics layer: vectorized computations over data loaded by the repositories.
+"""
+from .cache import VersionedCache
+from .usage import compute_usage_analytics
+from .forecasting import forecast_licenses, months_before
+from .ranking import build_use_case_snapshot, rank_scenarios
+from .portfolio import optimize_portfolio
+from .similarity import minhash_signature, lsh_buckets, estimate_similarity, score_pairs, group_pairs
+from .roi import roi_metrics
+from .roi_simulation import validate_distribution, simulation_key, simulate_roi, simulate_roi_batch
+
+__all__ = [
+    "VersionedCache",
+    "compute_usage_analytics",
+    "forecast_licenses",
+    "months_before",
+    "build_use_case_snapshot",
+    "rank_scenarios",
+    "optimize_portfolio",
+    "minhash_signature",
+    "lsh_buckets",
+    "estimate_similarity",
+    "score_pairs",
+    "group_pairs",
+    "roi_metrics",
+    "validate_distribution",
+    "simulation_key",
+    "simulate_roi",
+    "simulate_roi_batch",
+]
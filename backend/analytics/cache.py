@@ -0,0 +1,56 @@
+"""
+In-process cache for analytics results.
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+DEFAULT_MAX_ENTRIES = 256
+
+
+class VersionedCache:
+    """
+    Caches computed values per key together with the data version they were
+    computed from. A lookup with a different version recomputes the value.
+    At most max_entries keys are kept; the least recently used goes first.
+    """
+    
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self._entries: "OrderedDict[Hashable, Tuple[Any, Any]]" = OrderedDict()
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+    
+    def _lookup(self, key: Hashable, version: Any) -> Optional[Tuple[Any, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                return None
+            self._entries.move_to_end(key)
+            return entry
+    
+    def get(self, key: Hashable, version: Any) -> Optional[Any]:
+        """The cached value for key if it was computed at version, else None."""
+        entry = self._lookup(key, version)
+        return entry[1] if entry is not None else None
+    
+    def get_or_compute(self, key: Hashable, version: Any, compute: Callable[[], Any]) -> Any:
+        """Return the cached value for key at version, computing it if stale or missing."""
+        entry = self._lookup(key, version)
+        if entry is not None:
+            return entry[1]
+        
+        value = compute()
+        with self._lock:
+            self._entries[key] = (version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+        return value
+    
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """Drop one cached key, or everything when no key is given."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
@@ -0,0 +1,121 @@
+"""
+License forecasting from monthly assistant snapshots.
+
+Every assistant's active-user history is laid out as one row of an
+(assistants x months) matrix and a least-squares trend is fitted to all rows
+at once.
+"""
+from datetime import date
+from typing import Dict, Sequence
+
+import numpy as np
+
+
+def month_index(d: date) -> int:
+    return d.year * 12 + d.month - 1
+
+
+def months_before(d: date, months: int) -> date:
+    """First day of the month `months` months before `d`'s month."""
+    index = month_index(d) - months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _forward_fill(matrix: np.ndarray) -> np.ndarray:
+    """Carry the last known value forward along each row (months without a snapshot are unchanged)."""
+    valid = ~np.isnan(matrix)
+    last = np.where(valid, np.arange(matrix.shape[1]), 0)
+    np.maximum.accumulate(last, axis=1, out=last)
+    filled = matrix[np.arange(matrix.shape[0])[:, None], last]
+    # Leading months before the first snapshot stay empty
+    return np.where(np.maximum.accumulate(valid, axis=1), filled, np.nan)
+
+
+def fit_trends(series: np.ndarray):
+    """
+    Least-squares slope and intercept of each row against the month offset,
+    using only the non-NaN months. Rows with fewer than two points get slope 0.
+    """
+    valid = ~np.isnan(series)
+    x = np.broadcast_to(np.arange(series.shape[1], dtype=np.float64), series.shape)
+    y = np.where(valid, series, 0.0)
+    n = valid.sum(axis=1)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean_x = np.where(valid, x, 0.0).sum(axis=1) / n
+        mean_y = y.sum(axis=1) / n
+        dx = np.where(valid, x - mean_x[:, None], 0.0)
+        dy = np.where(valid, y - mean_y[:, None], 0.0)
+        var_x = (dx * dx).sum(axis=1)
+        slope = np.where(var_x > 0, (dx * dy).sum(axis=1) / var_x, 0.0)
+    intercept = mean_y - slope * mean_x
+    return slope, intercept
+
+
+def forecast_licenses(
+    snapshots: Sequence[tuple],
+    start: date,
+    end: date,
+    horizon_months: int = 3,
+    headroom: float = 0.1
+) -> Dict[str, dict]:
+    """
+    Forecast active users `horizon_months` after `end` for every assistant and
+    recommend a license count with `headroom` spare capacity.
+
+    `snapshots` are (assistant_id, month, monthly_price, licenses, active_users);
+    a snapshot dated before `start` seeds the first month of the window.
+    """
+    if not snapshots:
+        return {}
+
+    ids = list(dict.fromkeys(s[0] for s in snapshots))
+    row_of = {assistant_id: i for i, assistant_id in enumerate(ids)}
+    first = month_index(start)
+    num_months = month_index(end) - first + 1
+
+    rows = np.fromiter((row_of[s[0]] for s in snapshots), dtype=np.int64, count=len(snapshots))
+    # Baselines before `start` land in the first month; anything after `end` in the last
+    cols = np.fromiter(
+        (min(max(month_index(s[1]) - first, 0), num_months - 1) for s in snapshots),
+        dtype=np.int64, count=len(snapshots)
+    )
+    values = np.array([(s[3] or 0, s[4] or 0) for s in snapshots], dtype=np.float64)
+
+    # Snapshots arrive ordered by month, so later writes to the same cell win
+    licenses = np.full((len(ids), num_months), np.nan)
+    active = np.full((len(ids), num_months), np.nan)
+    licenses[rows, cols] = values[:, 0]
+    active[rows, cols] = values[:, 1]
+    licenses = _forward_fill(licenses)
+    active = _forward_fill(active)
+
+    slope, intercept = fit_trends(active)
+    target = num_months - 1 + horizon_months
+    forecast = np.maximum(intercept + slope * target, 0.0)
+    # Plan for the peak over the horizon, not just its last month
+    forecast = np.maximum(forecast, active[:, -1])
+    recommended = np.ceil(forecast * (1 + headroom))
+
+    current_licenses = licenses[:, -1]
+    current_active = active[:, -1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        utilization = np.where(current_licenses > 0, current_active / current_licenses * 100, 0.0)
+        forecast_utilization = np.where(recommended > 0, forecast / recommended * 100, 0.0)
+
+    months_observed = (~np.isnan(active)).sum(axis=1)
+
+    return {
+        assistant_id: {
+            "months_observed": int(months_observed[i]),
+            "current_licenses": int(current_licenses[i]),
+            "current_active_users": int(current_active[i]),
+            "utilization_rate": round(float(utilization[i]), 1),
+            "active_users_trend_per_month": round(float(slope[i]), 2),
+            "forecast_active_users": round(float(forecast[i]), 1),
+            "recommended_licenses": int(recommended[i]),
+            "license_change": int(recommended[i] - current_licenses[i]),
+            "forecast_utilization_rate": round(float(forecast_utilization[i]), 1),
+        }
+        for i, assistant_id in enumerate(ids)
+    }
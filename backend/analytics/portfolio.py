@@ -0,0 +1,178 @@
+"""
+Budget-constrained portfolio selection (0/1 knapsack) over use cases.
+
+The exact solver is a dynamic program over a discretized budget, with an
+optional item-count (capacity) dimension, vectorized across the whole
+budget axis per candidate. Investments are rounded up to the budget
+resolution, so every DP portfolio is feasible at the real costs. The
+capacity dimension is dropped when the budget cannot buy more items than
+the capacity anyway. Per-candidate take/skip choices are kept as packed
+bits for the backtrack.
+
+Two heuristics back the DP up: greedy by value per dollar, and a Lagrangian
+relaxation that prices the budget and picks the best `capacity` candidates
+by value net of that price, which still works when the item count is the
+binding limit. The best of the DP and both heuristics is returned; when
+the DP could not run (cell or time limit) or lost to a heuristic because
+of cost rounding, the result is flagged as not exact.
+"""
+import time
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+BUDGET_RESOLUTION = 2000
+MIN_BUDGET_RESOLUTION = 100
+MAX_DP_CELLS = 50_000_000
+LAGRANGE_ITERATIONS = 60
+
+
+def _greedy(
+    costs: np.ndarray,
+    values: np.ndarray,
+    budget: float,
+    capacity: int,
+    selected: Sequence[int] = ()
+) -> List[int]:
+    """
+    Extend `selected` with candidates by value per dollar (free ones first)
+    while budget and capacity allow.
+    """
+    with np.errstate(divide="ignore"):
+        density = np.where(costs > 0, values / costs, np.inf)
+    chosen = set(selected)
+    selected = list(selected)
+    spent = float(costs[selected].sum()) if selected else 0.0
+    for i in np.argsort(-density, kind="stable"):
+        if len(selected) >= capacity:
+            break
+        if i not in chosen and spent + costs[i] <= budget:
+            selected.append(int(i))
+            spent += costs[i]
+    return selected
+
+
+def _lagrangian(costs: np.ndarray, values: np.ndarray, budget: float, capacity: int) -> List[int]:
+    """
+    Top `capacity` candidates by value - price * cost, with the lowest budget
+    price (found by bisection) at which they fit the budget; leftover budget
+    and capacity are then filled greedily.
+    """
+    def pick(price: float) -> np.ndarray:
+        score = values - price * costs
+        top = np.argsort(-score, kind="stable")[:capacity]
+        return top[score[top] > 0]
+
+    selected = pick(0.0)
+    if costs[selected].sum() > budget:
+        # At the highest value per dollar only free candidates score above zero, which always fit
+        lo, hi = 0.0, float(np.max(values[costs > 0] / costs[costs > 0]))
+        for _ in range(LAGRANGE_ITERATIONS):
+            mid = (lo + hi) / 2
+            if costs[pick(mid)].sum() <= budget:
+                hi = mid
+            else:
+                lo = mid
+        selected = pick(hi)
+    return _greedy(costs, values, budget, capacity, selected.tolist())
+
+
+def _knapsack(
+    weights: np.ndarray,
+    values: np.ndarray,
+    units: int,
+    capacity: Optional[int],
+    deadline: float
+) -> Optional[List[int]]:
+    """Exact 0/1 knapsack on integer weights; None if the deadline passes."""
+    shape = (capacity + 1, units + 1) if capacity is not None else (units + 1,)
+    best = np.zeros(shape)
+    # One bit per cell and candidate: whether taking it improved that cell
+    keep = np.zeros((len(weights), (best.size + 7) // 8), dtype=np.uint8)
+
+    for i, (w, v) in enumerate(zip(weights, values)):
+        if time.monotonic() > deadline:
+            return None
+        if w > units:
+            continue
+        candidate = np.full(shape, -np.inf)
+        if capacity is not None:
+            candidate[1:, w:] = best[:-1, :units + 1 - w] + v
+        else:
+            candidate[w:] = best[:units + 1 - w] + v
+        take = candidate > best
+        keep[i] = np.packbits(take, axis=None)
+        best = np.where(take, candidate, best)
+
+    selected = []
+    k, b = capacity, units
+    for i in range(len(weights) - 1, -1, -1):
+        cell = k * (units + 1) + b if capacity is not None else b
+        if keep[i, cell >> 3] >> (7 - (cell & 7)) & 1:
+            selected.append(i)
+            b -= int(weights[i])
+            if capacity is not None:
+                k -= 1
+    return selected[::-1]
+
+
+def optimize_portfolio(
+    costs: Sequence[float],
+    values: Sequence[float],
+    budget: float,
+    capacity: Optional[int] = None,
+    time_limit: float = 2.0
+) -> dict:
+    """
+    Pick the candidates maximizing total value with total cost within budget
+    and at most `capacity` items. Candidates with no positive value are never
+    picked. Returns the selected indices, the solver used, whether the
+    result is exact (up to the budget unit) and, for a heuristic, why.
+    """
+    costs = np.maximum(np.asarray(costs, dtype=np.float64), 0.0)
+    values = np.asarray(values, dtype=np.float64)
+    eligible = np.flatnonzero((values > 0) & (costs <= budget))
+    limit = len(eligible) if capacity is None else min(capacity, len(eligible))
+    if limit == 0:
+        return {"selected": [], "solver": "none", "exact": True}
+
+    heuristics = {
+        "greedy": eligible[_greedy(costs[eligible], values[eligible], budget, limit)].tolist(),
+        "lagrangian": eligible[_lagrangian(costs[eligible], values[eligible], budget, limit)].tolist(),
+    }
+    solver = max(heuristics, key=lambda name: values[heuristics[name]].sum())
+    fallback = {"selected": heuristics[solver], "solver": solver, "exact": False}
+
+    # The item-count dimension is only needed when the budget could buy more
+    # than `capacity` items; otherwise the DP runs on budget alone
+    affordable = int(np.searchsorted(np.cumsum(np.sort(costs[eligible])), budget, side="right"))
+    counted = capacity is not None and limit < affordable
+
+    # Shrink the budget resolution until the DP table fits the cell limit
+    layers = len(eligible) * (limit + 1 if counted else 1)
+    units = min(BUDGET_RESOLUTION, MAX_DP_CELLS // layers - 1)
+    if units < MIN_BUDGET_RESOLUTION or budget <= 0:
+        return {**fallback, "fallback_reason": "too many candidates for the exact solver"}
+
+    unit = budget / units
+    weights = np.ceil(costs[eligible] / unit).astype(np.int64)
+    exact = _knapsack(
+        weights,
+        values[eligible],
+        units,
+        limit if counted else None,
+        time.monotonic() + time_limit
+    )
+    if exact is None:
+        return {**fallback, "fallback_reason": "time limit reached"}
+
+    # Budget left over from rounding costs up is spent greedily
+    exact = eligible[_greedy(costs[eligible], values[eligible], budget, limit, exact)].tolist()
+    # Ties (often the same set, summed in another order) go to the DP
+    if values[fallback["selected"]].sum() > values[exact].sum() * (1 + 1e-9):
+        return {
+            **fallback,
+            "fallback_reason": f"rounding costs up to the budget unit lost more than {solver} did",
+            "budget_unit": round(unit, 2),
+        }
+    return {"selected": exact, "solver": "dynamic programming", "exact": True, "budget_unit": round(unit, 2)}
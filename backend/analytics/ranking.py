@@ -0,0 +1,90 @@
+"""
+What-if ranking of use cases under custom scoring weights.
+
+The portfolio is held as a column-array snapshot (one feature matrix row per
+use case) so a whole set of weight scenarios is scored with one matrix
+product and ranked in a single sort.
+"""
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+# Criteria in feature-matrix column order; risk is inverted so higher is better
+CRITERIA = ("impact", "feasibility", "risk", "data_availability")
+DATA_AVAILABILITY_SCORES = {"high": 10.0, "medium": 5.0, "low": 0.0}
+MAX_SCORE = 10.0
+
+
+def build_use_case_snapshot(rows: Sequence[tuple]) -> dict:
+    """
+    Lay out (id, title, department, status, impact, feasibility, risk,
+    data_availability) rows as arrays. Scores are on the 0-10 scale.
+    """
+    features = np.array(
+        [
+            (
+                r[4] or 0.0,
+                r[5] or 0.0,
+                MAX_SCORE - (r[6] or 0.0),
+                DATA_AVAILABILITY_SCORES.get(r[7], 0.0),
+            )
+            for r in rows
+        ],
+        dtype=np.float64,
+    ).reshape(len(rows), len(CRITERIA))
+
+    return {
+        "ids": [r[0] for r in rows],
+        "titles": [r[1] for r in rows],
+        "departments": np.array([(r[2] or "").lower() for r in rows], dtype=object),
+        "statuses": np.array([r[3] for r in rows], dtype=object),
+        "features": features,
+    }
+
+
+def rank_scenarios(
+    snapshot: dict,
+    scenarios: Sequence[Dict[str, float]],
+    limit: Optional[int] = None,
+    status: Optional[str] = None,
+    department: Optional[str] = None
+) -> List[dict]:
+    """
+    Score every use case under every scenario (a weight per criterion) and
+    rank them. Scores are weighted means on the 0-10 scale. Each ranked entry
+    also carries its rank under the first scenario so movements are visible.
+    """
+    mask = np.ones(len(snapshot["ids"]), dtype=bool)
+    if status:
+        mask &= snapshot["statuses"] == status
+    if department:
+        mask &= snapshot["departments"] == department.lower()
+    candidates = np.flatnonzero(mask)
+
+    weights = np.array([[s.get(c) or 0.0 for c in CRITERIA] for s in scenarios], dtype=np.float64)
+    weights /= weights.sum(axis=1, keepdims=True)
+
+    # (scenarios x use cases), then rank within each scenario; ties keep snapshot order
+    scores = weights @ snapshot["features"][candidates].T
+    order = np.argsort(-scores, axis=1, kind="stable")
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, np.arange(1, order.shape[1] + 1)[None, :], axis=1)
+
+    top = order[:, :limit] if limit is not None else order
+    results = []
+    for k, scenario in enumerate(scenarios):
+        results.append({
+            "name": scenario.get("name") or f"scenario {k + 1}",
+            "weights": {c: round(float(weights[k, i]), 4) for i, c in enumerate(CRITERIA)},
+            "ranking": [
+                {
+                    "id": snapshot["ids"][candidates[j]],
+                    "title": snapshot["titles"][candidates[j]],
+                    "score": round(float(scores[k, j]), 3),
+                    "rank": int(ranks[k, j]),
+                    "baseline_rank": int(ranks[0, j]),
+                }
+                for j in top[k]
+            ],
+        })
+    return results
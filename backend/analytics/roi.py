@@ -0,0 +1,21 @@
+"""
+ROI and payback for many use cases in one vectorized pass.
+"""
+from typing import Sequence, Tuple
+
+import numpy as np
+
+
+def roi_metrics(investment: Sequence[float], returns: Sequence[float]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    ROI (%) and payback months per use case from investment and annual
+    returns. ROI is 0 without a positive investment; payback is whole months
+    (truncated) and 0 without positive returns.
+    """
+    investment = np.asarray(investment, dtype=np.float64)
+    returns = np.asarray(returns, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        roi = np.where(investment > 0, (returns - investment) / investment * 100, 0.0)
+        monthly_returns = np.where(returns > 0, returns / 12, 0.0)
+        payback = np.where(monthly_returns > 0, np.trunc(investment / monthly_returns), 0.0)
+    return roi, payback.astype(np.int64)
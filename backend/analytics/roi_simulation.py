@@ -0,0 +1,246 @@
+"""
+Monte Carlo ROI simulation for use cases.
+
+Investment, steady-state monthly returns, ramp-up time and the annual
+discount rate are drawn from distributions. Every draw is one monthly cash
+flow row (returns ramp up linearly to full over the ramp-up months), so NPV,
+IRR and payback are computed for all draws at once: NPV and IRR by Horner
+evaluation across the month columns, IRR by a vectorized safeguarded
+Newton iteration.
+
+Percentiles are taken over every draw. A draw that never pays back within
+the horizon counts as an infinite payback, and one whose IRR lies outside
+IRR_BOUNDS counts as -inf or +inf, so those percentiles come out as None
+instead of the outliers silently being left out. Means are over the finite
+draws only, and the summaries say how many that is.
+"""
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+DISTRIBUTIONS = ("fixed", "uniform", "triangular", "normal", "lognormal")
+PERCENTILES = (5, 25, 50, 75, 95)
+CHUNK_DRAWS = 25_000
+IRR_MAX_ITERATIONS = 60
+IRR_TOLERANCE = 1e-9
+# Monthly IRR search bracket: -99% to +100% a month
+IRR_BOUNDS = (-0.99, 1.0)
+
+
+def _require(dist: dict, name: str, *fields: str) -> None:
+    missing = [f for f in fields if dist.get(f) is None]
+    if missing:
+        raise ValueError(f"{name}: {dist.get('kind', 'fixed')} distribution needs {', '.join(missing)}")
+
+
+def validate_distribution(dist: dict, name: str) -> None:
+    """Raise ValueError when `dist` is not a usable distribution."""
+    kind = dist.get("kind", "fixed")
+    if kind not in DISTRIBUTIONS:
+        raise ValueError(f"{name}: kind must be one of {', '.join(DISTRIBUTIONS)}")
+    if kind == "fixed":
+        _require(dist, name, "value")
+    elif kind == "uniform":
+        _require(dist, name, "low", "high")
+        if dist["low"] > dist["high"]:
+            raise ValueError(f"{name}: low must not exceed high")
+    elif kind == "triangular":
+        _require(dist, name, "low", "mode", "high")
+        if not dist["low"] <= dist["mode"] <= dist["high"]:
+            raise ValueError(f"{name}: expected low <= mode <= high")
+    else:
+        _require(dist, name, "mean", "std")
+        if dist["std"] < 0:
+            raise ValueError(f"{name}: std must be non-negative")
+        if kind == "lognormal" and dist["mean"] <= 0:
+            raise ValueError(f"{name}: lognormal mean must be positive")
+
+
+def sample_distribution(dist: dict, rng: np.random.Generator, size: int) -> np.ndarray:
+    """`size` draws from a validated distribution. Lognormal mean and std are those of the values."""
+    kind = dist.get("kind", "fixed")
+    if kind == "fixed":
+        return np.full(size, float(dist["value"]))
+    if kind == "uniform":
+        return rng.uniform(dist["low"], dist["high"], size)
+    if kind == "triangular":
+        if dist["low"] == dist["high"]:
+            return np.full(size, float(dist["low"]))
+        return rng.triangular(dist["low"], dist["mode"], dist["high"], size)
+    if kind == "normal":
+        return rng.normal(dist["mean"], dist["std"], size)
+    sigma2 = np.log1p((dist["std"] / dist["mean"]) ** 2)
+    return rng.lognormal(np.log(dist["mean"]) - sigma2 / 2, np.sqrt(sigma2), size)
+
+
+def simulation_key(spec: dict) -> str:
+    """Stable hash of a simulation input; also seeds the draws when no seed is given."""
+    return hashlib.sha256(json.dumps(spec, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _present_value(flows: np.ndarray, rate: np.ndarray) -> np.ndarray:
+    """Sum of flows[:, t] / (1 + rate)^(t + 1) per row, by Horner's rule over the months."""
+    v = 1.0 / (1.0 + rate)
+    acc = np.zeros(flows.shape[0])
+    for t in range(flows.shape[1] - 1, -1, -1):
+        acc = (acc + flows[:, t]) * v
+    return acc
+
+
+def _present_value_slope(flows: np.ndarray, rate: np.ndarray):
+    """Present value and its derivative with respect to the rate, in one Horner pass."""
+    v = 1.0 / (1.0 + rate)
+    acc = np.zeros(flows.shape[0])
+    slope = np.zeros(flows.shape[0])
+    for t in range(flows.shape[1] - 1, -1, -1):
+        # d/dv of (acc + c) * v, with acc a polynomial in v
+        slope = slope * v + acc + flows[:, t]
+        acc = (acc + flows[:, t]) * v
+    return acc, -slope * v * v
+
+
+def _irr(flows: np.ndarray, investment: np.ndarray) -> np.ndarray:
+    """
+    Monthly IRR per row: Newton steps on log(PV) - log(investment), which is
+    close to linear in the rate even where NPV is very steep, falling back to
+    bisection whenever a step leaves the bracket around the root. With one
+    outlay followed by positive flows PV falls monotonically with the rate,
+    so the bracket always holds the root. Rows that do not recover the
+    investment even at the lower bound are -inf, rows that still do at the
+    upper bound (or have nothing to recover) are +inf.
+    """
+    lo = np.full(flows.shape[0], IRR_BOUNDS[0])
+    hi = np.full(flows.shape[0], IRR_BOUNDS[1])
+    below = (investment > 0) & (_present_value(flows, lo) <= investment)
+    above = ~below & ((investment <= 0) | (_present_value(flows, hi) >= investment))
+    solvable = ~below & ~above
+    rate = np.where(_present_value(flows, np.zeros_like(lo)) > investment, 0.0, (lo + hi) / 2)
+    for _ in range(IRR_MAX_ITERATIONS):
+        value, slope = _present_value_slope(flows, rate)
+        lo = np.where(value > investment, rate, lo)
+        hi = np.where(value > investment, hi, rate)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            error = np.log(value) - np.log(investment)
+            step = rate - error * value / slope
+        converged = ~solvable | (np.abs(error) <= IRR_TOLERANCE) | (hi - lo < IRR_TOLERANCE)
+        if np.all(converged):
+            break
+        inside = np.isfinite(step) & (step >= lo) & (step <= hi)
+        rate = np.where(converged, rate, np.where(inside, step, (lo + hi) / 2))
+    return np.where(below, -np.inf, np.where(above, np.inf, rate))
+
+
+def _summary(values: np.ndarray) -> Dict[str, Optional[float]]:
+    """Mean and count of the finite draws; percentiles over all draws, None where infinite."""
+    finite = values[np.isfinite(values)]
+    # inverted_cdf picks actual draws, so infinite ones never get interpolated into finite ones
+    quantiles = np.percentile(values, PERCENTILES, method="inverted_cdf")
+    return {
+        "mean": round(float(finite.mean()), 2) if finite.size else None,
+        "finite_draws": int(finite.size),
+        **{f"p{p}": round(float(q), 2) if np.isfinite(q) else None for p, q in zip(PERCENTILES, quantiles)},
+    }
+
+
+def simulate_roi(spec: dict) -> dict:
+    """
+    Run the Monte Carlo simulation for one use case. `spec` holds the
+    investment, monthly_returns, ramp_up_months and discount_rate (annual)
+    distributions, horizon_months, draws and an optional seed.
+    """
+    seed = spec.get("seed")
+    if seed is None:
+        seed = int(simulation_key(spec)[:16], 16)
+    rng = np.random.default_rng(seed)
+    horizon, draws = spec["horizon_months"], spec["draws"]
+    months = np.arange(1, horizon + 1, dtype=np.float64)
+
+    npv, irr, payback = [], [], []
+    for start in range(0, draws, CHUNK_DRAWS):
+        n = min(CHUNK_DRAWS, draws - start)
+        investment = np.maximum(sample_distribution(spec["investment"], rng, n), 0.0)
+        monthly = sample_distribution(spec["monthly_returns"], rng, n)
+        ramp = np.maximum(sample_distribution(spec["ramp_up_months"], rng, n), 0.0)
+        annual_rate = np.maximum(sample_distribution(spec["discount_rate"], rng, n), IRR_BOUNDS[0])
+
+        # (draws x months) cash flows; month m earns m / ramp of the full return until ramped up
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ramp_factor = np.where(ramp[:, None] > 0, np.minimum(months[None, :] / ramp[:, None], 1.0), 1.0)
+        flows = monthly[:, None] * ramp_factor
+
+        monthly_rate = np.power(1.0 + annual_rate, 1.0 / 12.0) - 1.0
+        npv.append(_present_value(flows, monthly_rate) - investment)
+        monthly_irr = _irr(flows, investment)
+        # Annualize; -inf (not recovered at any rate in range) must stay -inf
+        irr.append(np.where(monthly_irr == -np.inf, -np.inf, np.power(1.0 + monthly_irr, 12.0) - 1.0))
+
+        reached = np.cumsum(flows, axis=1) >= investment[:, None]
+        first = np.argmax(reached, axis=1) + 1.0
+        payback.append(np.where(investment <= 0, 0.0, np.where(reached.any(axis=1), first, np.inf)))
+
+    npv, irr, payback = np.concatenate(npv), np.concatenate(irr), np.concatenate(payback)
+    return {
+        "draws": draws,
+        "npv": _summary(npv),
+        "irr_percent": _summary(irr * 100),
+        "payback_months": _summary(payback),
+        "probability_positive_npv": round(float((npv > 0).mean()), 4),
+        "probability_payback": round(float(np.isfinite(payback).mean()), 4),
+    }
+
+
+# Shared by all requests and created on first use. Spawned rather than forked,
+# since the server forking from a threadpool thread could copy held locks
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=os.cpu_count() or 1,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pool
+
+
+def _reset_pool(broken: ProcessPoolExecutor) -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is broken:
+            _pool = None
+    broken.shutdown(wait=False)
+
+
+def _simulate_many(specs: Sequence[dict]) -> List[dict]:
+    return [simulate_roi(spec) for spec in specs]
+
+
+def simulate_roi_batch(specs: Sequence[dict], workers: int = 1) -> List[dict]:
+    """
+    Simulate several use cases, split across at most `workers` processes of
+    the shared pool when more than one.
+    """
+    if workers <= 1 or len(specs) <= 1:
+        return _simulate_many(specs)
+    workers = min(workers, len(specs))
+    pool = _get_pool()
+    try:
+        chunks = list(pool.map(_simulate_many, [specs[i::workers] for i in range(workers)]))
+    except BrokenProcessPool:
+        # A worker died; the next batch gets a fresh pool
+        _reset_pool(pool)
+        raise
+    results: List[dict] = [None] * len(specs)
+    for i, chunk in enumerate(chunks):
+        results[i::workers] = chunk
+    return results
@@ -0,0 +1,111 @@
+"""
+Near-duplicate detection for free text with MinHash and locality-sensitive
+hashing (LSH).
+
+Each document is reduced to a fixed-size MinHash signature whose agreement
+rate estimates the Jaccard similarity of the documents' word shingles. The
+signature is cut into bands; documents sharing any band bucket become
+candidate pairs, so only likely duplicates are ever compared.
+"""
+import hashlib
+import re
+import zlib
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+NUM_PERMUTATIONS = 128
+LSH_BANDS = 32
+LSH_ROWS = NUM_PERMUTATIONS // LSH_BANDS  # candidate threshold ~ (1/32)^(1/4) = 0.42
+SHINGLE_SIZE = 3
+
+_MERSENNE_PRIME = (1 << 31) - 1
+_WORD = re.compile(r"\w+")
+
+
+def _hash_coefficients(label: str) -> np.ndarray:
+    """Deterministic per-permutation coefficients, identical in every process."""
+    return np.array(
+        [
+            int.from_bytes(hashlib.blake2b(f"{label}{i}".encode(), digest_size=8).digest(), "little")
+            % (_MERSENNE_PRIME - 1) + 1
+            for i in range(NUM_PERMUTATIONS)
+        ],
+        dtype=np.uint64,
+    )
+
+
+_A = _hash_coefficients("a")[:, None]
+_B = _hash_coefficients("b")[:, None]
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> set:
+    """Lower-cased word n-grams; texts shorter than `size` words yield one shingle."""
+    words = _WORD.findall(text.lower())
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def minhash_signature(text: str) -> Optional[np.ndarray]:
+    """MinHash signature of a text, or None when it has no words."""
+    tokens = shingles(text)
+    if not tokens:
+        return None
+    hashes = np.fromiter((zlib.crc32(t.encode()) for t in tokens), dtype=np.uint64, count=len(tokens))
+    # All permutations at once: (permutations x shingles), then the minimum per permutation
+    permuted = (_A * (hashes[None, :] % _MERSENNE_PRIME) + _B) % _MERSENNE_PRIME
+    return permuted.min(axis=1).astype(np.int64)
+
+
+def lsh_buckets(signature: np.ndarray) -> List[Tuple[int, int]]:
+    """(band, bucket) keys of a signature; buckets are signed 64-bit band hashes."""
+    bands = signature.reshape(LSH_BANDS, LSH_ROWS)
+    return [
+        (band, int.from_bytes(hashlib.blake2b(bands[band].tobytes(), digest_size=8).digest(), "little", signed=True))
+        for band in range(LSH_BANDS)
+    ]
+
+
+def estimate_similarity(left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    """Estimated Jaccard similarity of paired signature rows."""
+    return (np.atleast_2d(left) == np.atleast_2d(right)).mean(axis=1)
+
+
+def score_pairs(
+    pairs: Sequence[Tuple[str, str]],
+    signatures: Dict[str, np.ndarray],
+    threshold: float
+) -> List[Tuple[str, str, float]]:
+    """Keep the candidate pairs whose estimated similarity reaches threshold, most similar first."""
+    pairs = [p for p in pairs if p[0] in signatures and p[1] in signatures]
+    if not pairs:
+        return []
+    left = np.stack([signatures[a] for a, _ in pairs])
+    right = np.stack([signatures[b] for _, b in pairs])
+    similarity = estimate_similarity(left, right)
+    keep = np.flatnonzero(similarity >= threshold)
+    keep = keep[np.argsort(-similarity[keep], kind="stable")]
+    return [(pairs[i][0], pairs[i][1], round(float(similarity[i]), 3)) for i in keep]
+
+
+def group_pairs(pairs: Iterable[Tuple[str, str, float]]) -> List[List[str]]:
+    """Connected components of the duplicate graph (union-find), largest first."""
+    parent: Dict[str, str] = {}
+
+    def find(x: str) -> str:
+        parent.setdefault(x, x)
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for a, b, _ in pairs:
+        root_a, root_b = find(a), find(b)
+        if root_a != root_b:
+            parent[root_b] = root_a
+
+    groups: Dict[str, List[str]] = {}
+    for x in parent:
+        groups.setdefault(find(x), []).append(x)
+    return sorted((sorted(g) for g in groups.values()), key=lambda g: (-len(g), g[0]))
@@ -0,0 +1,188 @@
+"""
+Usage analytics over the daily Copilot metrics time series.
+
+All teams are laid out as rows of (teams x days) matrices so every statistic
+is computed for every team in a single NumPy pass.
+"""
+from datetime import date, timedelta
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+ROLLING_WINDOWS = (7, 28)
+
+
+def build_usage_matrices(rows: Sequence[tuple]) -> dict:
+    """
+    Pivot (org, team_slug, day, active, engaged, suggestions, acceptances) rows
+    into dense (teams x days) matrices. Days without a row are NaN.
+    """
+    teams = list(dict.fromkeys((r[0], r[1]) for r in rows))
+    team_index = {team: i for i, team in enumerate(teams)}
+    start = min(r[2] for r in rows)
+    end = max(r[2] for r in rows)
+    num_days = (end - start).days + 1
+
+    rows_idx = np.fromiter((team_index[(r[0], r[1])] for r in rows), dtype=np.int64, count=len(rows))
+    days_idx = np.fromiter(((r[2] - start).days for r in rows), dtype=np.int64, count=len(rows))
+    values = np.array([r[3:7] for r in rows], dtype=np.float64)
+
+    matrices = {}
+    for col, name in enumerate(("active_users", "engaged_users", "suggestions", "acceptances")):
+        matrix = np.full((len(teams), num_days), np.nan)
+        matrix[rows_idx, days_idx] = values[:, col]
+        matrices[name] = matrix
+
+    return {
+        "teams": teams,
+        "days": [start + timedelta(days=i) for i in range(num_days)],
+        **matrices,
+    }
+
+
+def _rolling_sum(values: np.ndarray, window: int):
+    """Trailing-window sums and counts of non-NaN values along the day axis."""
+    valid = ~np.isnan(values)
+    zeros = np.zeros((values.shape[0], 1))
+    sums = np.concatenate([zeros, np.cumsum(np.where(valid, values, 0.0), axis=1)], axis=1)
+    counts = np.concatenate([zeros, np.cumsum(valid, axis=1)], axis=1)
+
+    end = np.arange(1, values.shape[1] + 1)
+    start = np.maximum(end - window, 0)
+    return sums[:, end] - sums[:, start], counts[:, end] - counts[:, start]
+
+
+def _safe_divide(numerator: np.ndarray, denominator: np.ndarray, scale: float = 1.0) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(denominator > 0, numerator / denominator * scale, np.nan)
+
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing-window mean ignoring missing days."""
+    sums, counts = _rolling_sum(values, window)
+    return _safe_divide(sums, counts)
+
+
+def rolling_rate(acceptances: np.ndarray, suggestions: np.ndarray, window: int) -> np.ndarray:
+    """Trailing-window acceptance rate (%) as a ratio of summed counts."""
+    acc_sums, _ = _rolling_sum(acceptances, window)
+    sugg_sums, _ = _rolling_sum(suggestions, window)
+    return _safe_divide(acc_sums, sugg_sums, 100.0)
+
+
+def zscores(values: np.ndarray) -> np.ndarray:
+    """Z-score of each day against its team's own mean and std, ignoring NaN."""
+    valid = ~np.isnan(values)
+    counts = valid.sum(axis=1, keepdims=True)
+    mean = _safe_divide(np.where(valid, values, 0.0).sum(axis=1, keepdims=True), counts)
+    sq_dev = np.where(valid, (values - mean) ** 2, 0.0)
+    std = np.sqrt(_safe_divide(sq_dev.sum(axis=1, keepdims=True), counts))
+    return _safe_divide(values - mean, std)
+
+
+def percentile_ranks(values: np.ndarray) -> np.ndarray:
+    """Percentile rank (0-100) of each value among the non-NaN values, ties averaged."""
+    ranks = np.full(values.shape, np.nan)
+    valid = ~np.isnan(values)
+    if not valid.any():
+        return ranks
+
+    ordered = np.sort(values[valid])
+    below = np.searchsorted(ordered, values[valid], side="left")
+    equal = np.searchsorted(ordered, values[valid], side="right") - below
+    ranks[valid] = (below + 0.5 * equal) / len(ordered) * 100
+    return ranks
+
+
+def _last_valid(matrix: np.ndarray) -> np.ndarray:
+    """Most recent non-NaN value in each row."""
+    valid = ~np.isnan(matrix)
+    last = matrix.shape[1] - 1 - np.argmax(valid[:, ::-1], axis=1)
+    result = matrix[np.arange(matrix.shape[0]), last]
+    return np.where(valid.any(axis=1), result, np.nan)
+
+
+def _clean(value) -> Optional[float]:
+    """Convert a NumPy scalar to a JSON-safe float, mapping NaN to None."""
+    value = float(value)
+    return None if np.isnan(value) else round(value, 2)
+
+
+def compute_usage_analytics(rows: Sequence[tuple], z_threshold: float = 2.0) -> dict:
+    """Compute rolling means, week-over-week deltas, anomalies and percentile ranks for all teams."""
+    if not rows:
+        return {"start": None, "end": None, "org": [], "teams": []}
+
+    data = build_usage_matrices(rows)
+    days: List[date] = data["days"]
+    active = data["active_users"]
+    suggestions = data["suggestions"]
+    acceptances = data["acceptances"]
+    rate = _safe_divide(acceptances, suggestions, 100.0)
+
+    rolling_active = {w: rolling_mean(active, w) for w in ROLLING_WINDOWS}
+    rolling_acceptance = {w: rolling_rate(acceptances, suggestions, w) for w in ROLLING_WINDOWS}
+
+    # Week over week: this 7-day window vs the previous one
+    last = len(days) - 1
+    prev = last - 7
+    active_7 = rolling_active[7][:, last]
+    rate_7 = rolling_acceptance[7][:, last]
+    if prev >= 0:
+        active_wow = _safe_divide(active_7 - rolling_active[7][:, prev], rolling_active[7][:, prev], 100.0)
+        rate_wow = rate_7 - rolling_acceptance[7][:, prev]
+    else:
+        active_wow = np.full(len(data["teams"]), np.nan)
+        rate_wow = np.full(len(data["teams"]), np.nan)
+
+    z = zscores(rate)
+    anomalies = np.abs(np.nan_to_num(z)) >= z_threshold
+    latest_z = _last_valid(z)
+
+    active_pct = percentile_ranks(active_7)
+    rate_pct = percentile_ranks(rate_7)
+
+    teams = []
+    for i, (org, slug) in enumerate(data["teams"]):
+        teams.append({
+            "org": org,
+            "slug": slug,
+            "active_users_7d": _clean(active_7[i]),
+            "active_users_28d": _clean(rolling_active[28][i, last]),
+            "acceptance_rate_7d": _clean(rate_7[i]),
+            "acceptance_rate_28d": _clean(rolling_acceptance[28][i, last]),
+            "active_users_wow_pct": _clean(active_wow[i]),
+            "acceptance_rate_wow_delta": _clean(rate_wow[i]),
+            "acceptance_rate_zscore": _clean(latest_z[i]),
+            "anomaly_dates": [days[d].isoformat() for d in np.flatnonzero(anomalies[i])],
+            "active_users_percentile": _clean(active_pct[i]),
+            "acceptance_rate_percentile": _clean(rate_pct[i]),
+        })
+
+    # Organization-wide series: totals across teams, then the same rolling windows
+    org_active = np.nansum(active, axis=0, keepdims=True)
+    org_suggestions = np.nansum(suggestions, axis=0, keepdims=True)
+    org_acceptances = np.nansum(acceptances, axis=0, keepdims=True)
+    org_rate = _safe_divide(org_acceptances, org_suggestions, 100.0)
+    org_active_rolling = {w: rolling_mean(org_active, w)[0] for w in ROLLING_WINDOWS}
+    org_rate_rolling = {w: rolling_rate(org_acceptances, org_suggestions, w)[0] for w in ROLLING_WINDOWS}
+
+    org = [
+        {
+            "date": day.isoformat(),
+            "active_users": _clean(org_active[0, d]),
+            "acceptance_rate": _clean(org_rate[0, d]),
+            "active_users_7d": _clean(org_active_rolling[7][d]),
+            "active_users_28d": _clean(org_active_rolling[28][d]),
+            "acceptance_rate_7d": _clean(org_rate_rolling[7][d]),
+            "acceptance_rate_28d": _clean(org_rate_rolling[28][d]),
+        }
+        for d, day in enumerate(days)
+    ]
+
+    return {
+        "start": days[0].isoformat(),
+        "end": days[-1].isoformat(),
+        "org": org,
+        "teams": teams,
+    }
@@ -3,11 +3,11 @@ SQLAlchemy database models for PostgreSQL.
 """
 from datetime import datetime
 from sqlalchemy import (
-    Column, String, Float, Integer, Boolean, DateTime, Text, 
-    ForeignKey, Enum as SQLEnum, JSON, Index
+    Column, String, Float, Integer, SmallInteger, BigInteger, Boolean, DateTime, Date, Text, 
+    ForeignKey, Enum as SQLEnum, JSON, Index, Computed, text, func
 )
-from sqlalchemy.orm import relationship
-from sqlalchemy.dialects.postgresql import ARRAY, JSONB
+from sqlalchemy.orm import relationship, deferred
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, TSVECTOR
 from database import Base
 import enum
 
@@ -86,6 +86,21 @@ class AssessmentModel(Base):
 
 # ============== Use Case Models ==============
 
+USE_CASE_PRIORITY_SQL = (
+    "COALESCE(impact_score, 0) * COALESCE(feasibility_score, 0) "
+    "/ GREATEST(COALESCE(risk_score, 0), 0.1)"
+)
+
+# Title weighs most, then description, then problem statement and outcomes
+USE_CASE_SEARCH_CONFIG = "english"
+USE_CASE_SEARCH_SQL = (
+    f"setweight(to_tsvector('{USE_CASE_SEARCH_CONFIG}'::regconfig, coalesce(title, '')), 'A') || "
+    f"setweight(to_tsvector('{USE_CASE_SEARCH_CONFIG}'::regconfig, coalesce(description, '')), 'B') || "
+    f"setweight(to_tsvector('{USE_CASE_SEARCH_CONFIG}'::regconfig, coalesce(problem_statement, '')), 'C') || "
+    f"setweight(to_tsvector('{USE_CASE_SEARCH_CONFIG}'::regconfig, coalesce(expected_outcomes, '')), 'C')"
+)
+
+
 class UseCaseModel(Base):
     __tablename__ = "use_cases"
     
@@ -102,8 +117,41 @@ class UseCaseModel(Base):
     timeline_estimate = Column(String)
     status = Column(SQLEnum(UseCaseStatus), default=UseCaseStatus.draft, index=True)
     
+    # impact * feasibility / risk (risk floored at 0.1), maintained by PostgreSQL
+    priority_score = Column(Float, Computed(USE_CASE_PRIORITY_SQL, persisted=True))
+    # Weighted full-text document for /use-cases/search, maintained by PostgreSQL
+    search_vector = deferred(Column(TSVECTOR, Computed(USE_CASE_SEARCH_SQL, persisted=True)))
+    
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # Top-K by priority, optionally within a status or department, with (priority, id) keyset paging
+    __table_args__ = (
+        Index('ix_use_cases_priority', priority_score.desc(), id.desc()),
+        Index('ix_use_cases_status_priority', status, priority_score.desc(), id.desc()),
+        Index('ix_use_cases_department_priority', func.lower(department), priority_score.desc(), id.desc()),
+        Index('ix_use_cases_search', 'search_vector', postgresql_using='gin'),
+    )
+
+
+class UseCaseSignatureModel(Base):
+    """MinHash signature of a use case's text, for near-duplicate detection."""
+    __tablename__ = "use_case_signatures"
+    
+    usecase_id = Column(String, ForeignKey("use_cases.id", ondelete="CASCADE"), primary_key=True)
+    signature = Column(ARRAY(BigInteger), nullable=False)
+    computed_at = Column(DateTime, default=datetime.utcnow)
+
+
+class UseCaseLSHBucketModel(Base):
+    """LSH band buckets of use case signatures; use cases sharing a bucket are duplicate candidates."""
+    __tablename__ = "use_case_lsh_buckets"
+    
+    band = Column(Integer, primary_key=True)
+    bucket = Column(BigInteger, primary_key=True)
+    usecase_id = Column(
+        String, ForeignKey("use_cases.id", ondelete="CASCADE"), primary_key=True, index=True
+    )
 
 
 # ============== Governance Models ==============
@@ -146,19 +194,68 @@ class RiskModel(Base):
 
 # ============== Value Tracking Models ==============
 
+# Seed rows of the KPI dimension: (name, unit, category)
+DEFAULT_KPIS = [
+    ("Cost Savings", "$", "Financial"),
+    ("Revenue Increase", "$", "Financial"),
+    ("Time Saved", "hours", "Efficiency"),
+    ("Error Reduction", "%", "Quality"),
+    ("Customer Satisfaction", "score", "Customer"),
+    ("Processing Speed", "ms", "Performance"),
+    ("Accuracy", "%", "Quality"),
+    ("Throughput", "units", "Efficiency"),
+    ("Employee Productivity", "%", "Efficiency"),
+    ("Compliance Rate", "%", "Governance"),
+]
+
+# KPI for value records that were saved without a name
+UNSPECIFIED_KPI = "Unspecified"
+
+# Canonical form of a free-text KPI name: trimmed, inner whitespace collapsed
+KPI_NAME_SQL = r"regexp_replace(btrim({}), '\s+', ' ', 'g')"
+
+
+class KPIModel(Base):
+    """KPI dimension referenced by value records; names are unique case-insensitively."""
+    __tablename__ = "kpis"
+    __table_args__ = (
+        Index("ix_kpis_name_lower", text("lower(name)"), unique=True),
+    )
+    
+    id = Column(SmallInteger, primary_key=True, autoincrement=True)
+    name = Column(String, nullable=False)
+    unit = Column(String)
+    category = Column(String)
+    
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
 class ValueRecordModel(Base):
+    """
+    KPI readings, range-partitioned by month on date. Monthly partitions are
+    managed by ValueTrackingRepository; rows outside them land in the default
+    partition until maintenance moves them. The primary key has to include
+    the partition key, so id uniqueness is enforced by the repository.
+    """
     __tablename__ = "value_records"
+    __table_args__ = (
+        Index("ix_value_records_date_brin", "date", postgresql_using="brin"),
+        {"postgresql_partition_by": "RANGE (date)"},
+    )
     
     id = Column(String, primary_key=True)
     usecase_id = Column(String, index=True)
     usecase_title = Column(String)
-    kpi = Column(String, nullable=False, index=True)
+    kpi_id = Column(SmallInteger, ForeignKey("kpis.id"), nullable=False, index=True)
     value = Column(Float, nullable=False)
     target = Column(Float, nullable=False)
     unit = Column(String)
-    date = Column(DateTime, default=datetime.utcnow)
+    # Partition key, so it has to be part of the primary key
+    date = Column(DateTime, primary_key=True, default=datetime.utcnow)
     
     created_at = Column(DateTime, default=datetime.utcnow)
+    
+    kpi = relationship("KPIModel", lazy="joined")
 
 
 class ROICalculationModel(Base):
@@ -188,8 +285,8 @@ class AIAssistantModel(Base):
     monthly_price = Column(Float, default=0)
     licenses = Column(Integer, default=0)
     active_users = Column(Integer, default=0)
-    contract_start = Column(String)
-    contract_end = Column(String)
+    contract_start = Column(Date)
+    contract_end = Column(Date, index=True)  # renewal range scans
     status = Column(SQLEnum(AssistantStatus), default=AssistantStatus.pending, index=True)
     features = Column(ARRAY(String), default=[])
     
@@ -197,6 +294,22 @@ class AIAssistantModel(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 
+class AssistantSnapshotModel(Base):
+    """
+    Monthly history of an assistant's price, licenses and active users.
+    The current month's row is rewritten when those values change; past months are never touched.
+    """
+    __tablename__ = "assistant_snapshots"
+    
+    assistant_id = Column(String, primary_key=True)
+    month = Column(Date, primary_key=True)  # first day of the month
+    monthly_price = Column(Float, default=0)
+    licenses = Column(Integer, default=0)
+    active_users = Column(Integer, default=0)
+    
+    recorded_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+
 # ============== AI Initiative Models ==============
 
 class AIInitiativeModel(Base):
@@ -293,13 +406,87 @@ class CopilotMetricsModel(Base):
     total_acceptances = Column(Integer, default=0)
     total_chats = Column(Integer, default=0)
     
-    # Team metrics stored as JSONB array
-    # Each team: {org, slug, name, total_active_users, total_engaged_users, acceptance_rate}
-    teams = Column(JSONB, default=[])
+    # Team metrics live in copilot_teams, one row per team
+    
+    last_updated = Column(DateTime, default=datetime.utcnow)
+
+
+class CopilotTeamModel(Base):
+    """Per-team Copilot metrics, replaced on every sync."""
+    __tablename__ = "copilot_teams"
+    
+    id = Column(String, primary_key=True)  # "{org}-{slug}"
+    org = Column(String, nullable=False, index=True)
+    slug = Column(String, nullable=False)
+    name = Column(String, nullable=False)
+    total_active_users = Column(Integer, default=0, index=True)
+    total_engaged_users = Column(Integer, default=0)
+    acceptance_rate = Column(Float, default=0, index=True)
     
     last_updated = Column(DateTime, default=datetime.utcnow)
 
 
+class CopilotSeatModel(Base):
+    """One Copilot billing seat per (org, login), kept compact for idle-license reports."""
+    __tablename__ = "copilot_seats"
+    
+    org = Column(String, primary_key=True)
+    login = Column(String, primary_key=True)
+    assigning_team = Column(String, index=True)
+    last_activity_at = Column(DateTime)
+    last_activity_editor = Column(String)
+    pending_cancellation_date = Column(Date)
+    
+    created_at = Column(DateTime)
+    synced_at = Column(DateTime, default=datetime.utcnow)
+    
+    # Idle reports are range scans on last activity, optionally scoped to an org.
+    # Never-active seats sort first, matching the report order
+    __table_args__ = (
+        Index('ix_copilot_seats_last_activity', text('last_activity_at ASC NULLS FIRST')),
+        Index('ix_copilot_seats_org_last_activity', 'org', text('last_activity_at ASC NULLS FIRST')),
+    )
+
+
+class CopilotDailyMetricsModel(Base):
+    """Daily Copilot usage per team, the time series behind usage analytics."""
+    __tablename__ = "copilot_daily_metrics"
+    
+    day = Column(Date, primary_key=True)
+    org = Column(String, primary_key=True)
+    team_slug = Column(String, primary_key=True)
+    active_users = Column(Integer, default=0)
+    engaged_users = Column(Integer, default=0)
+    suggestions = Column(Integer, default=0)
+    acceptances = Column(Integer, default=0)
+    
+    __table_args__ = (
+        Index('ix_copilot_daily_metrics_day', 'day'),
+    )
+
+
+class CopilotLanguageEditorDailyModel(Base):
+    """Daily code-completion breakdown per team, language and editor (summed across models)."""
+    __tablename__ = "copilot_language_editor_daily"
+    
+    day = Column(Date, primary_key=True)
+    org = Column(String, primary_key=True)
+    team_slug = Column(String, primary_key=True)
+    language = Column(String, primary_key=True)
+    editor = Column(String, primary_key=True)
+    engaged_users = Column(Integer, default=0)
+    suggestions = Column(Integer, default=0)
+    acceptances = Column(Integer, default=0)
+    lines_suggested = Column(Integer, default=0)
+    lines_accepted = Column(Integer, default=0)
+    
+    # Rollups group by one dimension over a date range
+    __table_args__ = (
+        Index('ix_copilot_lang_editor_daily_language_day', 'language', 'day'),
+        Index('ix_copilot_lang_editor_daily_editor_day', 'editor', 'day'),
+    )
+
+
 # ============== Learning Progress Models ==============
 
 class LearningProgressModel(Base):
@@ -316,3 +503,129 @@ class LearningProgressModel(Base):
     __table_args__ = (
         Index('ix_learning_progress_user_module', 'user_id', 'module_id', unique=True),
     )
+
+
+# ============== Schema Upgrades ==============
+
+# Idempotent DDL for changes create_all cannot apply to existing tables
+# (type changes, backfills, extensions). Run in order on every startup, each
+# in its own transaction, so one failing statement does not undo the others.
+SCHEMA_UPGRADES = [
+    # Contract dates were free-form strings; convert them to DATE, nulling unparseable values
+    """
+    CREATE OR REPLACE FUNCTION pg_temp.try_date(value text) RETURNS date AS $$
+    BEGIN
+        RETURN NULLIF(value, '')::date;
+    EXCEPTION WHEN others THEN
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    DO $$
+    BEGIN
+        IF (SELECT data_type FROM information_schema.columns
+            WHERE table_schema = current_schema() AND table_name = 'ai_assistants'
+              AND column_name = 'contract_end') <> 'date' THEN
+            ALTER TABLE ai_assistants
+                ALTER COLUMN contract_start TYPE date USING pg_temp.try_date(contract_start),
+                ALTER COLUMN contract_end TYPE date USING pg_temp.try_date(contract_end);
+        END IF;
+    END $$
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_ai_assistants_contract_end ON ai_assistants (contract_end)",
+    # Seed the current (UTC) month's snapshot from each assistant's current values, so
+    # license forecasts cover assistants that predate snapshots or never change
+    """
+    INSERT INTO assistant_snapshots (assistant_id, month, monthly_price, licenses, active_users, recorded_at)
+    SELECT id, date_trunc('month', timezone('UTC', now()))::date,
+           COALESCE(monthly_price, 0), COALESCE(licenses, 0), COALESCE(active_users, 0),
+           timezone('UTC', now())
+    FROM ai_assistants
+    ON CONFLICT DO NOTHING
+    """,
+    # Trigram indexes behind BaseRepository.fuzzy_search (substring ILIKE and similarity)
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_ai_assistants_vendor_trgm ON ai_assistants USING gin (vendor gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_model_cards_owner_trgm ON model_cards USING gin (owner gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_ai_initiatives_team_trgm ON ai_initiatives USING gin (team gin_trgm_ops)",
+    # Stored priority score for index-backed /use-cases/prioritized
+    "ALTER TABLE use_cases ADD COLUMN IF NOT EXISTS priority_score double precision "
+    f"GENERATED ALWAYS AS ({USE_CASE_PRIORITY_SQL}) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_use_cases_priority ON use_cases (priority_score DESC, id DESC)",
+    "CREATE INDEX IF NOT EXISTS ix_use_cases_status_priority "
+    "ON use_cases (status, priority_score DESC, id DESC)",
+    "CREATE INDEX IF NOT EXISTS ix_use_cases_department_priority "
+    "ON use_cases (lower(department), priority_score DESC, id DESC)",
+    # Full-text search document for /use-cases/search
+    "ALTER TABLE use_cases ADD COLUMN IF NOT EXISTS search_vector tsvector "
+    f"GENERATED ALWAYS AS ({USE_CASE_SEARCH_SQL}) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_use_cases_search ON use_cases USING gin (search_vector)",
+    # value_records was a plain table; rebuild it partitioned by month. Rows start out
+    # in the default partition and are moved to monthly ones by partition maintenance.
+    """
+    DO $$
+    BEGIN
+        IF (SELECT relkind FROM pg_class WHERE oid = to_regclass('value_records')) = 'r' THEN
+            ALTER TABLE value_records RENAME TO value_records_unpartitioned;
+            ALTER TABLE value_records_unpartitioned
+                RENAME CONSTRAINT value_records_pkey TO value_records_unpartitioned_pkey;
+            DROP INDEX IF EXISTS ix_value_records_usecase_id, ix_value_records_kpi;
+            CREATE TABLE value_records (
+                id varchar NOT NULL,
+                usecase_id varchar,
+                usecase_title varchar,
+                kpi varchar NOT NULL,
+                value double precision NOT NULL,
+                target double precision NOT NULL,
+                unit varchar,
+                date timestamp without time zone NOT NULL,
+                created_at timestamp without time zone,
+                PRIMARY KEY (id, date)
+            ) PARTITION BY RANGE (date);
+            CREATE INDEX ix_value_records_usecase_id ON value_records (usecase_id);
+            CREATE INDEX ix_value_records_kpi ON value_records (kpi);
+            CREATE INDEX ix_value_records_date_brin ON value_records USING brin (date);
+            CREATE TABLE value_records_default PARTITION OF value_records DEFAULT;
+            INSERT INTO value_records
+                SELECT id, usecase_id, usecase_title, kpi, value, target, unit,
+                       COALESCE(date, created_at, now()), created_at
+                FROM value_records_unpartitioned;
+            DROP TABLE value_records_unpartitioned;
+        END IF;
+    END $$
+    """,
+    "CREATE TABLE IF NOT EXISTS value_records_default PARTITION OF value_records DEFAULT",
+    # KPI dimension: seed the catalog without burning sequence values on every start
+    "INSERT INTO kpis (name, unit, category, created_at) "
+    "SELECT v.name, v.unit, v.category, now() FROM (VALUES "
+    + ", ".join(f"('{name}', '{unit}', '{category}')" for name, unit, category in DEFAULT_KPIS)
+    + ") AS v (name, unit, category) "
+    "WHERE NOT EXISTS (SELECT 1 FROM kpis k WHERE lower(k.name) = lower(v.name))",
+    # value_records.kpi was free text; normalize it into kpis (most common spelling wins)
+    # and replace the column with a smallint reference
+    f"""
+    DO $$
+    BEGIN
+        IF EXISTS (SELECT 1 FROM information_schema.columns
+            WHERE table_schema = current_schema() AND table_name = 'value_records'
+              AND column_name = 'kpi') THEN
+            INSERT INTO kpis (name, unit, created_at)
+                SELECT DISTINCT ON (lower(name)) name, unit, now() FROM (
+                    SELECT COALESCE(NULLIF({KPI_NAME_SQL.format('kpi')}, ''), '{UNSPECIFIED_KPI}') AS name,
+                           mode() WITHIN GROUP (ORDER BY unit) AS unit,
+                           count(*) AS uses
+                    FROM value_records GROUP BY 1
+                ) names
+                WHERE NOT EXISTS (SELECT 1 FROM kpis k WHERE lower(k.name) = lower(names.name))
+                ORDER BY lower(name), uses DESC;
+            ALTER TABLE value_records ADD COLUMN IF NOT EXISTS kpi_id smallint REFERENCES kpis (id);
+            UPDATE value_records v SET kpi_id = k.id FROM kpis k
+                WHERE lower(k.name) = lower(COALESCE(NULLIF({KPI_NAME_SQL.format('v.kpi')}, ''), '{UNSPECIFIED_KPI}'));
+            ALTER TABLE value_records ALTER COLUMN kpi_id SET NOT NULL;
+            ALTER TABLE value_records DROP COLUMN kpi;
+        END IF;
+    END $$
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_value_records_kpi_id ON value_records (kpi_id)",
+]
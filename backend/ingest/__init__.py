@@ -0,0 +1,14 @@
+"""
+Bulk ingestion of exported data files.
+"""
+from .streaming import MalformedRecord, iter_json_records
+from .copilot_metrics import import_metrics_stream
+from .value_records import import_value_records_stream, detect_format as detect_value_records_format
+
+__all__ = [
+    "MalformedRecord",
+    "iter_json_records",
+    "import_metrics_stream",
+    "import_value_records_stream",
+    "detect_value_records_format",
+]
@@ -0,0 +1,179 @@
+"""
+Bulk import of exported Copilot metrics (the `/copilot/metrics` day records)
+into the metrics time-series tables.
+
+Files are stream-parsed (JSON array or NDJSON), validated record by record
+and loaded in batches with COPY + upsert, so re-running an import is safe.
+
+Usage (from the backend directory):
+    python -m ingest.copilot_metrics --org my-org [--team my-team] dump1.json dump2.ndjson
+"""
+import argparse
+import sys
+import time
+from datetime import date
+from typing import Callable, List, Optional, TextIO, Tuple
+
+from sqlalchemy.orm import Session
+
+from repositories import MetricsRepository
+from .streaming import MalformedRecord, iter_json_records
+
+RECORD_BATCH_SIZE = 500
+MAX_REPORTED_ERRORS = 100
+
+
+def parse_metrics_day(record: object) -> Tuple[dict, List[dict]]:
+    """
+    Validate one Copilot metrics day record and flatten it into a daily row
+    and (editor, language) breakdown rows. Raises ValueError when invalid.
+    """
+    if not isinstance(record, dict):
+        raise ValueError("record is not a JSON object")
+    if "date" not in record:
+        raise ValueError("missing 'date'")
+    try:
+        day = date.fromisoformat(str(record["date"])[:10])
+    except ValueError:
+        raise ValueError(f"invalid date {record['date']!r}")
+
+    breakdown = {}
+    completions = record.get("copilot_ide_code_completions") or {}
+    for editor in completions.get("editors") or []:
+        for model in editor.get("models") or []:
+            for lang in model.get("languages") or []:
+                key = (editor.get("name") or "unknown", lang.get("name") or "unknown")
+                row = breakdown.setdefault(key, {
+                    "day": day,
+                    "editor": key[0],
+                    "language": key[1],
+                    "engaged_users": 0,
+                    "suggestions": 0,
+                    "acceptances": 0,
+                    "lines_suggested": 0,
+                    "lines_accepted": 0,
+                })
+                row["engaged_users"] = max(row["engaged_users"], int(lang.get("total_engaged_users") or 0))
+                row["suggestions"] += int(lang.get("total_code_suggestions") or 0)
+                row["acceptances"] += int(lang.get("total_code_acceptances") or 0)
+                row["lines_suggested"] += int(lang.get("total_code_lines_suggested") or 0)
+                row["lines_accepted"] += int(lang.get("total_code_lines_accepted") or 0)
+
+    daily = {
+        "day": day,
+        "active_users": int(record.get("total_active_users") or 0),
+        "engaged_users": int(record.get("total_engaged_users") or 0),
+        "suggestions": sum(r["suggestions"] for r in breakdown.values()),
+        "acceptances": sum(r["acceptances"] for r in breakdown.values()),
+    }
+    return daily, list(breakdown.values())
+
+
+def import_metrics_stream(
+    db: Session,
+    stream: TextIO,
+    org: str,
+    team: Optional[str] = None,
+    progress: Optional[Callable[[dict], None]] = None
+) -> dict:
+    """
+    Import every metrics day in `stream` for an org (or one of its teams).
+    Each batch is committed on its own; rows are upserted on their natural
+    key, so importing the same file twice leaves the tables unchanged.
+    """
+    repo = MetricsRepository(db)
+    team_slug = team or MetricsRepository.ORG_LEVEL_TEAM
+    stats = {
+        "org": org,
+        "team": team_slug,
+        "records": 0,
+        "accepted": 0,
+        "rejected": 0,
+        "daily_rows": 0,
+        "breakdown_rows": 0,
+        "errors": [],
+        "seconds": 0.0,
+        "records_per_second": 0.0,
+    }
+    started = time.monotonic()
+    daily_rows: List[dict] = []
+    breakdown_rows: List[dict] = []
+
+    def flush() -> None:
+        stats["daily_rows"] += repo.copy_daily_metrics(daily_rows)
+        stats["breakdown_rows"] += repo.copy_language_editor_metrics(breakdown_rows)
+        db.commit()
+        daily_rows.clear()
+        breakdown_rows.clear()
+
+        elapsed = time.monotonic() - started
+        stats["seconds"] = round(elapsed, 2)
+        stats["records_per_second"] = round(stats["records"] / elapsed, 1) if elapsed > 0 else 0.0
+        if progress:
+            progress(stats)
+
+    try:
+        for record in iter_json_records(stream):
+            stats["records"] += 1
+            try:
+                if isinstance(record, MalformedRecord):
+                    raise ValueError(record.error)
+                daily, breakdown = parse_metrics_day(record)
+            except (ValueError, TypeError, AttributeError) as e:
+                stats["rejected"] += 1
+                if len(stats["errors"]) < MAX_REPORTED_ERRORS:
+                    stats["errors"].append({"record": stats["records"], "error": str(e)})
+                continue
+
+            stats["accepted"] += 1
+            daily_rows.append({**daily, "org": org, "team_slug": team_slug})
+            breakdown_rows.extend({**row, "org": org, "team_slug": team_slug} for row in breakdown)
+            if len(daily_rows) >= RECORD_BATCH_SIZE:
+                flush()
+    except ValueError as e:
+        # Malformed JSON: keep what was loaded so far and report where it stopped
+        stats["errors"].append({"record": stats["records"] + 1, "error": str(e)})
+
+    flush()
+    if stats["accepted"]:
+        repo.touch()
+    return stats
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Import exported Copilot metrics JSON/NDJSON files.")
+    parser.add_argument("files", nargs="+", help="JSON array or NDJSON files of Copilot metrics days")
+    parser.add_argument("--org", required=True, help="Organization the export belongs to")
+    parser.add_argument("--team", help="Team slug, if the export is team-level")
+    args = parser.parse_args(argv)
+
+    from database import SessionLocal
+
+    def report(stats: dict) -> None:
+        print(
+            f"  {stats['records']} records ({stats['rejected']} rejected), "
+            f"{stats['records_per_second']} records/s",
+            file=sys.stderr
+        )
+
+    failed = False
+    db = SessionLocal()
+    try:
+        for path in args.files:
+            print(f"Importing {path}...", file=sys.stderr)
+            with open(path, encoding="utf-8") as f:
+                stats = import_metrics_stream(db, f, args.org, args.team, progress=report)
+            print(
+                f"{path}: {stats['accepted']} days, {stats['daily_rows']} daily rows, "
+                f"{stats['breakdown_rows']} breakdown rows in {stats['seconds']}s"
+            )
+            for error in stats["errors"]:
+                print(f"  record {error['record']}: {error['error']}", file=sys.stderr)
+            failed = failed or bool(stats["errors"])
+    finally:
+        db.close()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
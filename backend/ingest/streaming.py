@@ -0,0 +1,97 @@
+"""
+Incremental parsing of large JSON / NDJSON files.
+
+Records are yielded one at a time from a text stream read in fixed-size
+chunks, so memory use is bounded by the chunk size and the largest record,
+which may not exceed MAX_RECORD_CHARS. A malformed NDJSON line is reported
+as a MalformedRecord and parsing resumes at the next line.
+"""
+import json
+from typing import Iterator, TextIO, Union
+
+CHUNK_SIZE = 64 * 1024
+MAX_RECORD_CHARS = 16 * 1024 * 1024
+
+# Whitespace and the separators between top-level records
+_SKIP = " \t\r\n,"
+
+
+class MalformedRecord:
+    """Stands in for a record that could not be parsed; callers reject it and go on."""
+    
+    def __init__(self, error: str):
+        self.error = error
+    
+    def __str__(self) -> str:
+        return self.error
+
+
+def iter_json_records(
+    stream: TextIO,
+    chunk_size: int = CHUNK_SIZE,
+    max_record_chars: int = MAX_RECORD_CHARS
+) -> Iterator[Union[object, MalformedRecord]]:
+    """
+    Yield records from a JSON array (`[{...}, {...}]`), NDJSON (one record per
+    line) or a single JSON value, without reading the whole stream.
+    Outside an array, a record that fails to parse before the end of its
+    line is yielded as a MalformedRecord and skipped up to the next line.
+    Raises ValueError on other malformed input and on records longer than
+    `max_record_chars`.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    offset = 0  # characters consumed before the start of `buffer`
+    in_array = False
+    eof = False
+
+    while True:
+        stripped = buffer.lstrip(_SKIP)
+        offset += len(buffer) - len(stripped)
+        buffer = stripped
+
+        if buffer and not in_array and buffer[0] == "[":
+            in_array = True
+            buffer = buffer[1:]
+            offset += 1
+            continue
+        if buffer and in_array and buffer[0] == "]":
+            in_array = False
+            buffer = buffer[1:]
+            offset += 1
+            continue
+
+        if buffer:
+            try:
+                record, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError as e:
+                error = f"Malformed JSON at character {offset + e.pos}: {e.msg}"
+                # A newline after the error means the record is complete but broken, not
+                # cut at the chunk boundary; NDJSON can skip to the next line
+                newline = buffer.find("\n", e.pos)
+                if newline >= 0 and not in_array:
+                    buffer = buffer[newline + 1:]
+                    offset += newline + 1
+                    yield MalformedRecord(error)
+                    continue
+                if eof or newline >= 0:
+                    raise ValueError(error) from e
+                # Most likely a record cut at the chunk boundary: read more and retry
+                if len(buffer) > max_record_chars:
+                    raise ValueError(
+                        f"Record at character {offset} exceeds {max_record_chars} characters"
+                    ) from e
+            else:
+                if end < len(buffer) or eof:
+                    buffer = buffer[end:]
+                    offset += end
+                    yield record
+                    continue
+                # A value ending exactly at the buffer edge (e.g. a number) may be truncated
+
+        if eof:
+            return
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            eof = True
+        buffer += chunk
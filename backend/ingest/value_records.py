@@ -0,0 +1,204 @@
+"""
+Bulk import of KPI readings (value records) from CSV or NDJSON exports.
+
+Files are parsed as a stream, validated row by row and loaded in batches
+with COPY + upsert. A record without an id gets a deterministic one derived
+from (usecase_id, kpi, date), so re-running an import is safe. The date is
+required: value_records is keyed on (id, date), so a reading stamped with
+the import time would be a new row on every run.
+
+CSV files need a header row with the columns usecase_id, kpi, value, target
+and date (ISO 8601), and optionally id, usecase_title and unit.
+
+Usage (from the backend directory):
+    python -m ingest.value_records readings.csv more.ndjson
+"""
+import argparse
+import csv
+import math
+import sys
+import time
+import uuid
+from datetime import datetime
+from typing import Callable, Iterator, List, Optional, TextIO, Tuple
+
+from sqlalchemy.orm import Session
+
+from repositories import ValueTrackingRepository
+from .streaming import MalformedRecord, iter_json_records
+
+RECORD_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 100
+FORMATS = ("csv", "ndjson")
+
+_REQUIRED = ("usecase_id", "kpi", "value", "target", "date")
+_ID_NAMESPACE = uuid.UUID("5b0f3f1e-6a4c-4a8e-9a39-2f6f0c1d7e52")
+
+
+def detect_format(filename: Optional[str]) -> str:
+    """csv for .csv files, otherwise ndjson (which also accepts a JSON array)."""
+    return "csv" if filename and filename.lower().endswith(".csv") else "ndjson"
+
+
+def iter_records(stream: TextIO, fmt: str) -> Iterator[Tuple[int, object]]:
+    """(line or record number, record) pairs; CSV rows are numbered by their last line."""
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+    else:
+        for number, record in enumerate(iter_json_records(stream), start=1):
+            yield number, record
+
+
+def parse_value_record(record: object, now: datetime) -> dict:
+    """Validate one reading and map it to a value_records row. Raises ValueError when invalid."""
+    if isinstance(record, MalformedRecord):
+        raise ValueError(record.error)
+    if not isinstance(record, dict):
+        raise ValueError("record is not an object")
+    missing = [f for f in _REQUIRED if record.get(f) in (None, "")]
+    if missing:
+        raise ValueError(f"missing {', '.join(missing)}")
+
+    try:
+        value = float(record["value"])
+        target = float(record["target"])
+    except (TypeError, ValueError):
+        raise ValueError("value and target must be numbers")
+    if not (math.isfinite(value) and math.isfinite(target)):
+        raise ValueError("value and target must be finite")
+
+    try:
+        date = datetime.fromisoformat(str(record["date"]).replace("Z", "+00:00"))
+    except ValueError:
+        raise ValueError(f"invalid date {record['date']!r}")
+    if date.tzinfo is not None:
+        date = datetime.utcfromtimestamp(date.timestamp())
+
+    usecase_id = str(record["usecase_id"]).strip()
+    kpi = str(record["kpi"]).strip()
+    record_id = record.get("id") or str(uuid.uuid5(_ID_NAMESPACE, f"{usecase_id}|{kpi}|{date.isoformat()}"))
+    return {
+        "id": str(record_id),
+        "usecase_id": usecase_id,
+        "usecase_title": str(record.get("usecase_title") or ""),
+        "kpi": kpi,
+        "value": value,
+        "target": target,
+        "unit": str(record.get("unit") or ""),
+        "date": date,
+        "created_at": now,
+    }
+
+
+def import_value_records_stream(
+    db: Session,
+    stream: TextIO,
+    fmt: str = "ndjson",
+    progress: Optional[Callable[[dict], None]] = None
+) -> dict:
+    """
+    Import every reading in `stream`. Each batch is committed on its own;
+    rows are upserted on (id, date), so importing the same file twice leaves
+    the table unchanged. A row reusing an existing id for another date is
+    rejected.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of {', '.join(FORMATS)}")
+
+    repo = ValueTrackingRepository(db)
+    now = datetime.utcnow()
+    stats = {
+        "format": fmt,
+        "records": 0,
+        "accepted": 0,
+        "rejected": 0,
+        "loaded": 0,
+        "errors": [],
+        "seconds": 0.0,
+        "records_per_second": 0.0,
+    }
+    started = time.monotonic()
+    rows: List[dict] = []
+    numbers: List[int] = []  # line or record number of each row
+    position = "record" if fmt == "ndjson" else "line"
+
+    def reject(number: int, error: str) -> None:
+        stats["rejected"] += 1
+        if len(stats["errors"]) < MAX_REPORTED_ERRORS:
+            stats["errors"].append({position: number, "error": error})
+
+    def flush() -> None:
+        # Record ids are unique across dates: reject reuses of an id for another date
+        conflicts = repo.find_id_conflicts(rows)
+        for i, date in conflicts.items():
+            stats["accepted"] -= 1
+            reject(numbers[i], f"id {rows[i]['id']} is already used for {date.isoformat()}")
+        stats["loaded"] += repo.copy_records([row for i, row in enumerate(rows) if i not in conflicts])
+        db.commit()
+        rows.clear()
+        numbers.clear()
+
+        elapsed = time.monotonic() - started
+        stats["seconds"] = round(elapsed, 2)
+        stats["records_per_second"] = round(stats["records"] / elapsed, 1) if elapsed > 0 else 0.0
+        if progress:
+            progress(stats)
+
+    number = 0
+    try:
+        for number, record in iter_records(stream, fmt):
+            stats["records"] += 1
+            try:
+                rows.append(parse_value_record(record, now))
+            except ValueError as e:
+                reject(number, str(e))
+                continue
+            numbers.append(number)
+            stats["accepted"] += 1
+            if len(rows) >= RECORD_BATCH_SIZE:
+                flush()
+    except (ValueError, csv.Error) as e:
+        # Malformed input: keep what was loaded so far and report where it stopped
+        stats["errors"].append({position: number + 1, "error": str(e)})
+
+    flush()
+    return stats
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Import value records from CSV or NDJSON files.")
+    parser.add_argument("files", nargs="+", help="CSV (with header) or NDJSON / JSON array files")
+    parser.add_argument("--format", choices=FORMATS, help="Input format (default: from the file extension)")
+    args = parser.parse_args(argv)
+
+    from database import SessionLocal
+
+    def report(stats: dict) -> None:
+        print(
+            f"  {stats['records']} records ({stats['rejected']} rejected), "
+            f"{stats['records_per_second']} records/s",
+            file=sys.stderr
+        )
+
+    failed = False
+    db = SessionLocal()
+    try:
+        for path in args.files:
+            print(f"Importing {path}...", file=sys.stderr)
+            fmt = args.format or detect_format(path)
+            with open(path, encoding="utf-8", newline="") as f:
+                stats = import_value_records_stream(db, f, fmt, progress=report)
+            print(f"{path}: {stats['accepted']} accepted, {stats['rejected']} rejected in {stats['seconds']}s")
+            for error in stats["errors"]:
+                where = f"line {error['line']}" if "line" in error else f"record {error['record']}"
+                print(f"  {where}: {error['error']}", file=sys.stderr)
+            failed = failed or bool(stats["errors"])
+    finally:
+        db.close()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
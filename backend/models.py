@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Any, Dict, Optional, List
 from datetime import datetime
 from enum import Enum
 
@@ -71,6 +71,42 @@ class UseCase(BaseModel):
     created_at: datetime
 
 
+class UseCaseBatchOperation(BaseModel):
+    op: str  # create | update | status
+    id: Optional[str] = None
+    data: Optional[Dict[str, Any]] = None
+    status: Optional[str] = None
+
+
+class UseCaseBatchRequest(BaseModel):
+    operations: List[UseCaseBatchOperation]
+    validate_only: bool = False
+
+
+class PortfolioRequest(BaseModel):
+    budget: float
+    capacity: Optional[int] = None
+    max_risk: Optional[float] = None
+    objective: str = "net_return"  # net_return | priority
+    statuses: Optional[List[UseCaseStatus]] = None
+    time_limit_ms: int = 2000
+
+
+class RankingScenario(BaseModel):
+    name: Optional[str] = None
+    impact: float = 1.0
+    feasibility: float = 1.0
+    risk: float = 1.0
+    data_availability: float = 0.0
+
+
+class RankingRequest(BaseModel):
+    scenarios: List[RankingScenario]
+    limit: Optional[int] = None
+    status: Optional[UseCaseStatus] = None
+    department: Optional[str] = None
+
+
 # Governance Models
 class RiskCategory(str, Enum):
     bias = "bias"
@@ -151,6 +187,48 @@ class ROICalculation(BaseModel):
     payback_months: int
 
 
+class ROICalculationInput(BaseModel):
+    usecase_id: str
+    investment: float
+    returns: float  # annual
+
+
+class ROIBatchRequest(BaseModel):
+    calculations: List[ROICalculationInput]
+
+
+class Distribution(BaseModel):
+    kind: str = "fixed"  # fixed | uniform | triangular | normal | lognormal
+    value: Optional[float] = None  # fixed
+    low: Optional[float] = None  # uniform, triangular
+    mode: Optional[float] = None  # triangular
+    high: Optional[float] = None  # uniform, triangular
+    mean: Optional[float] = None  # normal, lognormal
+    std: Optional[float] = None  # normal, lognormal
+
+
+class ROISimulationInput(BaseModel):
+    usecase_id: str
+    investment: Distribution
+    monthly_returns: Distribution
+    ramp_up_months: Optional[Distribution] = None  # defaults to the request's
+    discount_rate: Optional[Distribution] = None  # annual; defaults to the request's
+
+
+class ROISimulationRequest(BaseModel):
+    use_cases: List[ROISimulationInput] = []
+    # Also simulate every saved ROI calculation not listed above, with
+    # triangular +/- uncertainty around its investment and returns
+    all_use_cases: bool = False
+    uncertainty: float = 0.2
+    ramp_up_months: Distribution = Distribution(value=0)
+    discount_rate: Distribution = Distribution(value=0.1)
+    horizon_months: int = 36
+    draws: int = 100_000
+    seed: Optional[int] = None
+    workers: int = 1  # more than 1 simulates use cases in parallel processes
+
+
 # Blueprint Models
 class BlueprintCategory(str, Enum):
     rag = "rag"
@@ -5,7 +5,7 @@ from .base import BaseRepository
 from .assessments import AssessmentRepository
 from .use_cases import UseCaseRepository
 from .governance import GovernanceRepository
-from .value_tracking import ValueTrackingRepository, ROIRepository
+from .value_tracking import ValueTrackingRepository, ROIRepository, KPIRepository
 from .assistants import AssistantRepository
 from .initiatives import InitiativeRepository
 from .maturity import MaturityRepository
@@ -19,6 +19,7 @@ __all__ = [
     "GovernanceRepository",
     "ValueTrackingRepository",
     "ROIRepository",
+    "KPIRepository",
     "AssistantRepository",
     "InitiativeRepository",
     "MaturityRepository",
@@ -1,18 +1,91 @@
 """
 AI Assistant repository for database operations.
 """
-from typing import List, Optional
+from typing import List, Optional, Tuple
+from datetime import date, datetime, timedelta
+from sqlalchemy import exists, func, inspect, select
 from sqlalchemy.orm import Session
-from db_models import AIAssistantModel, AssistantStatus
+from sqlalchemy.dialects.postgresql import insert
+from db_models import AIAssistantModel, AssistantSnapshotModel, AssistantStatus
 from .base import BaseRepository
 
 
 class AssistantRepository(BaseRepository[AIAssistantModel]):
     """Repository for AI assistant operations."""
     
+    # Fields whose history is kept in assistant_snapshots
+    SNAPSHOT_FIELDS = ("monthly_price", "licenses", "active_users")
+    
     def __init__(self, db: Session):
         super().__init__(AIAssistantModel, db)
     
+    def create(self, obj: AIAssistantModel) -> AIAssistantModel:
+        """Create an assistant and record its first snapshot."""
+        self._snapshot_if_changed(obj)
+        return super().create(obj)
+    
+    def update(self, obj: AIAssistantModel) -> AIAssistantModel:
+        """Update an assistant, recording a snapshot if price, licenses or usage changed."""
+        self._snapshot_if_changed(obj)
+        return super().update(obj)
+    
+    def _snapshot_if_changed(self, assistant: AIAssistantModel) -> None:
+        """
+        Upsert the current month's snapshot when a tracked field is new or
+        modified, or when the assistant has no snapshot yet. Does not commit.
+        """
+        state = inspect(assistant)
+        if not any(state.attrs[f].history.has_changes() for f in self.SNAPSHOT_FIELDS):
+            has_snapshot = self.db.query(
+                exists().where(AssistantSnapshotModel.assistant_id == assistant.id)
+            ).scalar()
+            if has_snapshot:
+                return
+        
+        now = datetime.utcnow()
+        values = {
+            "monthly_price": assistant.monthly_price or 0,
+            "licenses": assistant.licenses or 0,
+            "active_users": assistant.active_users or 0,
+            "recorded_at": now,
+        }
+        stmt = insert(AssistantSnapshotModel).values(
+            assistant_id=assistant.id,
+            month=now.date().replace(day=1),
+            **values
+        )
+        self.db.execute(stmt.on_conflict_do_update(
+            index_elements=[AssistantSnapshotModel.assistant_id, AssistantSnapshotModel.month],
+            set_=values
+        ))
+    
+    def get_snapshots(self, start_month: date) -> List[tuple]:
+        """
+        Get (assistant_id, month, monthly_price, licenses, active_users) snapshots
+        from `start_month` on, plus each assistant's latest earlier snapshot as a
+        baseline. Ordered by assistant and month.
+        """
+        s = AssistantSnapshotModel
+        columns = (s.assistant_id, s.month, s.monthly_price, s.licenses, s.active_users)
+        baseline = self.db.query(*columns).filter(
+            s.month < start_month
+        ).distinct(s.assistant_id).order_by(s.assistant_id, s.month.desc()).all()
+        recent = self.db.query(*columns).filter(
+            s.month >= start_month
+        ).order_by(s.assistant_id, s.month).all()
+        return sorted(baseline + recent, key=lambda r: (r[0], r[1]))
+    
+    def get_forecast_version(self) -> Tuple[Optional[datetime], int, Optional[datetime]]:
+        """
+        Latest snapshot, assistant count and latest assistant update; changes
+        whenever history is written or an assistant is added, edited or deleted.
+        """
+        return tuple(self.db.query(
+            select(func.max(AssistantSnapshotModel.recorded_at)).scalar_subquery(),
+            func.count(self.model.id),
+            func.max(self.model.updated_at)
+        ).one())
+    
     def get_filtered(
         self,
         status: Optional[str] = None,
@@ -35,42 +108,51 @@ class AssistantRepository(BaseRepository[AIAssistantModel]):
             self.model.status == AssistantStatus.active
         ).all()
     
-    def get_by_vendor(self, vendor: str) -> List[AIAssistantModel]:
-        """Get all assistants from a vendor."""
-        return self.db.query(self.model).filter(
-            self.model.vendor.ilike(f"%{vendor}%")
-        ).all()
+    def get_by_vendor(self, vendor: str, limit: Optional[int] = None) -> List[AIAssistantModel]:
+        """Get assistants whose vendor matches, closest matches first."""
+        return self.fuzzy_search("vendor", vendor, limit)
     
     def get_summary(self) -> dict:
-        """Get summary statistics for AI assistants."""
-        assistants = self.get_all()
-        active_assistants = [a for a in assistants if a.status == AssistantStatus.active]
-        
-        # Calculate totals
-        active_ai_tools = len(active_assistants)
-        monthly_spend = sum(
-            (a.monthly_price or 0) * (a.licenses or 0) 
-            for a in active_assistants
-        )
-        total_licenses = sum(a.licenses or 0 for a in active_assistants)
-        total_active_users = sum(a.active_users or 0 for a in active_assistants)
-        utilization_rate = (total_active_users / total_licenses * 100) if total_licenses > 0 else 0
+        """
+        Get summary statistics for AI assistants.
+        Aggregated in SQL per (category, status), so cost scales with the number of groups.
+        """
+        category = func.coalesce(func.nullif(self.model.category, ""), "other")
+        groups = self.db.query(
+            category,
+            self.model.status,
+            func.count(),
+            func.sum(func.coalesce(self.model.monthly_price, 0) * func.coalesce(self.model.licenses, 0)),
+            func.sum(func.coalesce(self.model.licenses, 0)),
+            func.sum(func.coalesce(self.model.active_users, 0)),
+        ).group_by(category, self.model.status).all()
         
-        # Group by category
+        active_ai_tools = 0
+        monthly_spend = 0
+        total_licenses = 0
+        total_active_users = 0
         by_category = {}
-        for a in assistants:
-            cat = a.category or "other"
+        by_status = {}
+        
+        for cat, status, count, spend, licenses, active_users in groups:
+            is_active = status == AssistantStatus.active
+            
+            if is_active:
+                active_ai_tools += count
+                monthly_spend += spend or 0
+                total_licenses += licenses or 0
+                total_active_users += active_users or 0
+            
             if cat not in by_category:
                 by_category[cat] = {"count": 0, "spend": 0}
-            by_category[cat]["count"] += 1
-            if a.status == AssistantStatus.active:
-                by_category[cat]["spend"] += (a.monthly_price or 0) * (a.licenses or 0)
+            by_category[cat]["count"] += count
+            if is_active:
+                by_category[cat]["spend"] += spend or 0
+            
+            status_key = status.value if status else "pending"
+            by_status[status_key] = by_status.get(status_key, 0) + count
         
-        # Group by status
-        by_status = {}
-        for a in assistants:
-            status = a.status.value if a.status else "pending"
-            by_status[status] = by_status.get(status, 0) + 1
+        utilization_rate = (total_active_users / total_licenses * 100) if total_licenses > 0 else 0
         
         return {
             "active_ai_tools": active_ai_tools,
@@ -82,6 +164,67 @@ class AssistantRepository(BaseRepository[AIAssistantModel]):
             "by_status": by_status
         }
     
+    def get_upcoming_renewals(self, within_days: int = 90, include_cancelled: bool = False) -> dict:
+        """
+        Get contracts ending in the next `within_days` days (a range scan on the
+        contract_end index) with cost-at-risk rollups by category and month.
+        """
+        today = date.today()
+        horizon = today + timedelta(days=within_days)
+        
+        query = self.db.query(self.model).filter(
+            self.model.contract_end >= today,
+            self.model.contract_end <= horizon
+        )
+        if not include_cancelled:
+            query = query.filter(self.model.status != AssistantStatus.cancelled)
+        renewing = query.order_by(self.model.contract_end).all()
+        
+        renewals = []
+        by_category = {}
+        by_month = {}
+        total_cost = 0
+        
+        for a in renewing:
+            monthly_cost = (a.monthly_price or 0) * (a.licenses or 0)
+            total_cost += monthly_cost
+            
+            cat = a.category or "other"
+            if cat not in by_category:
+                by_category[cat] = {"count": 0, "monthly_cost": 0}
+            by_category[cat]["count"] += 1
+            by_category[cat]["monthly_cost"] += monthly_cost
+            
+            month = a.contract_end.strftime("%Y-%m")
+            if month not in by_month:
+                by_month[month] = {"month": month, "count": 0, "monthly_cost": 0}
+            by_month[month]["count"] += 1
+            by_month[month]["monthly_cost"] += monthly_cost
+            
+            renewals.append({
+                "id": a.id,
+                "name": a.name,
+                "vendor": a.vendor,
+                "category": cat,
+                "status": a.status.value if a.status else "pending",
+                "contract_end": a.contract_end.isoformat(),
+                "days_until_renewal": (a.contract_end - today).days,
+                "licenses": a.licenses or 0,
+                "active_users": a.active_users or 0,
+                "monthly_cost": monthly_cost,
+            })
+        
+        return {
+            "as_of": today.isoformat(),
+            "within_days": within_days,
+            "count": len(renewals),
+            "monthly_cost_at_risk": total_cost,
+            "annual_cost_at_risk": total_cost * 12,
+            "by_category": by_category,
+            "by_month": list(by_month.values()),
+            "renewals": renewals,
+        }
+    
     def bulk_upsert(self, assistants_data: List[dict]) -> int:
         """Bulk insert or update assistants (for sync from frontend)."""
         count = 0
@@ -92,9 +235,11 @@ class AssistantRepository(BaseRepository[AIAssistantModel]):
                 for key, value in data.items():
                     if key != "id" and hasattr(existing, key):
                         setattr(existing, key, value)
+                self._snapshot_if_changed(existing)
             else:
                 # Create new
                 assistant = AIAssistantModel(**data)
+                self._snapshot_if_changed(assistant)
                 self.db.add(assistant)
             count += 1
         
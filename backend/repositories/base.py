@@ -1,12 +1,131 @@
 """
 Base repository with common CRUD operations.
 """
-from typing import TypeVar, Generic, Type, List, Optional
-from sqlalchemy.orm import Session
+import csv
+import io
+from typing import TypeVar, Generic, Type, List, Optional, Iterable, Sequence
+from sqlalchemy import func, inspect, or_, text
+from sqlalchemy.orm import Query, Session, load_only, selectinload
+from sqlalchemy.dialects.postgresql import insert
 from database import Base
 
 ModelType = TypeVar("ModelType", bound=Base)
 
+DEFAULT_BATCH_SIZE = 1000
+
+# pg_trgm similarity (0-1) above which a value counts as a fuzzy match
+DEFAULT_MIN_SIMILARITY = 0.3
+
+
+def upsert_rows(
+    db: Session,
+    model: Type[Base],
+    rows: Iterable[dict],
+    index_elements: Sequence[str],
+    update_columns: Sequence[str],
+    batch_size: int = DEFAULT_BATCH_SIZE
+) -> int:
+    """
+    Insert or update rows with one INSERT ... ON CONFLICT per batch.
+    Rows are consumed lazily so callers can stream them; within a batch the
+    last row per conflict key wins. Does not commit.
+    """
+    count = 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            count += _upsert_batch(db, model, batch, index_elements, update_columns)
+            batch = []
+    if batch:
+        count += _upsert_batch(db, model, batch, index_elements, update_columns)
+    return count
+
+
+def _upsert_batch(
+    db: Session,
+    model: Type[Base],
+    batch: List[dict],
+    index_elements: Sequence[str],
+    update_columns: Sequence[str]
+) -> int:
+    # Last row per key wins, so ON CONFLICT never touches a row twice
+    batch = list({tuple(row[k] for k in index_elements): row for row in batch}.values())
+    stmt = insert(model).values(batch)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(index_elements),
+        set_={col: stmt.excluded[col] for col in update_columns}
+    )
+    db.execute(stmt)
+    return len(batch)
+
+
+def copy_upsert_rows(
+    db: Session,
+    model: Type[Base],
+    rows: Iterable[dict],
+    columns: Sequence[str],
+    index_elements: Sequence[str],
+    update_columns: Sequence[str],
+    batch_size: int = DEFAULT_BATCH_SIZE
+) -> int:
+    """
+    Bulk load rows with COPY into a temporary staging table, then merge each
+    batch into `model` with INSERT ... ON CONFLICT. Much faster than multi-row
+    INSERTs for large loads, and idempotent on the conflict key. Does not commit.
+    """
+    table = model.__table__.name
+    stage = f"_stage_{table}"
+    column_list = ", ".join(columns)
+    key_list = ", ".join(index_elements)
+    updates = ", ".join(f"{col} = EXCLUDED.{col}" for col in update_columns)
+    merge_sql = (
+        f"INSERT INTO {table} ({column_list}) SELECT {column_list} FROM {stage} "
+        f"ON CONFLICT ({key_list}) DO UPDATE SET {updates}"
+    )
+    copy_sql = f"COPY {stage} ({column_list}) FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+    
+    def flush(batch: List[dict]) -> int:
+        # Last row per key wins, so ON CONFLICT never touches a row twice
+        unique = {tuple(row[k] for k in index_elements): row for row in batch}
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in unique.values():
+            writer.writerow(["\\N" if row.get(col) is None else row[col] for col in columns])
+        buffer.seek(0)
+        
+        cursor.execute(f"TRUNCATE {stage}")
+        cursor.copy_expert(copy_sql, buffer)
+        cursor.execute(merge_sql)
+        return len(unique)
+    
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.execute(
+            f"CREATE TEMP TABLE IF NOT EXISTS {stage} "
+            f"(LIKE {table} INCLUDING DEFAULTS) ON COMMIT DROP"
+        )
+        count = 0
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                count += flush(batch)
+                batch = []
+        if batch:
+            count += flush(batch)
+        return count
+    finally:
+        cursor.close()
+
+
+LIKE_ESCAPE = "!"
+
+
+def escape_like(term: str) -> str:
+    """Escape LIKE wildcards so user input matches literally (use with escape=LIKE_ESCAPE)."""
+    return term.replace("!", "!!").replace("%", "!%").replace("_", "!_")
+
 
 class BaseRepository(Generic[ModelType]):
     """Base repository with common CRUD operations."""
@@ -19,9 +138,23 @@ class BaseRepository(Generic[ModelType]):
         """Get a record by ID."""
         return self.db.query(self.model).filter(self.model.id == id).first()
     
-    def get_all(self) -> List[ModelType]:
-        """Get all records."""
-        return self.db.query(self.model).all()
+    def get_all(self, fields: Optional[Sequence[str]] = None) -> List[ModelType]:
+        """Get all records, loading only `fields` when given."""
+        return self.with_fields(self.db.query(self.model), fields).all()
+    
+    def with_fields(self, query: Query, fields: Optional[Sequence[str]] = None) -> Query:
+        """
+        Load only the given column attributes (plus the primary key); listed
+        relationships are eager-loaded with one extra query each. None loads
+        every column as usual.
+        """
+        if fields is None:
+            return query
+        mapper = inspect(self.model)
+        columns = [getattr(self.model, f) for f in fields if f in mapper.column_attrs]
+        options = [load_only(self.model.id, *columns)]
+        options += [selectinload(getattr(self.model, f)) for f in fields if f in mapper.relationships]
+        return query.options(*options)
     
     def create(self, obj: ModelType) -> ModelType:
         """Create a new record."""
@@ -48,3 +181,48 @@ class BaseRepository(Generic[ModelType]):
     def exists(self, id: str) -> bool:
         """Check if a record exists."""
         return self.db.query(self.model).filter(self.model.id == id).count() > 0
+    
+    def fuzzy_search(
+        self,
+        column: str,
+        term: str,
+        limit: Optional[int] = None,
+        min_similarity: float = DEFAULT_MIN_SIMILARITY
+    ) -> List[ModelType]:
+        """
+        Get records whose `column` contains `term` or is trigram-similar to it,
+        best matches first. Both predicates use the column's pg_trgm GIN index.
+        """
+        col = getattr(self.model, column)
+        query = self.db.query(self.model).filter(
+            self._fuzzy_match(col, term, min_similarity)
+        ).order_by(func.similarity(col, term).desc(), self.model.id)
+        
+        if limit is not None:
+            query = query.limit(limit)
+        return query.all()
+    
+    def suggest_values(
+        self,
+        column: str,
+        term: str,
+        limit: int = 10,
+        min_similarity: float = DEFAULT_MIN_SIMILARITY
+    ) -> List[str]:
+        """Get distinct `column` values matching `term`, best matches first (for typeahead)."""
+        col = getattr(self.model, column)
+        rows = self.db.query(col).filter(
+            self._fuzzy_match(col, term, min_similarity)
+        ).group_by(col).order_by(func.similarity(col, term).desc(), col).limit(limit).all()
+        return [r[0] for r in rows]
+    
+    def _fuzzy_match(self, col, term: str, min_similarity: float):
+        # `%` compares against pg_trgm.similarity_threshold, scoped to this transaction
+        self.db.execute(
+            text("SELECT set_config('pg_trgm.similarity_threshold', :threshold, true)"),
+            {"threshold": str(min_similarity)}
+        )
+        return or_(
+            col.ilike(f"%{escape_like(term)}%", escape=LIKE_ESCAPE),
+            col.op("%")(term)
+        )
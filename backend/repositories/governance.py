@@ -18,15 +18,13 @@ class GovernanceRepository(BaseRepository[ModelCardModel]):
         """Get a model card with its risks loaded."""
         return self.db.query(self.model).filter(self.model.id == id).first()
     
-    def get_all_with_risks(self) -> List[ModelCardModel]:
-        """Get all model cards with risks loaded."""
-        return self.db.query(self.model).all()
+    def get_all_with_risks(self, fields: Optional[List[str]] = None) -> List[ModelCardModel]:
+        """Get all model cards with risks loaded, or only `fields` when given."""
+        return self.get_all(fields)
     
-    def get_by_owner(self, owner: str) -> List[ModelCardModel]:
-        """Get all model cards by owner."""
-        return self.db.query(self.model).filter(
-            self.model.owner.ilike(f"%{owner}%")
-        ).all()
+    def get_by_owner(self, owner: str, limit: Optional[int] = None) -> List[ModelCardModel]:
+        """Get model cards whose owner matches, closest matches first."""
+        return self.fuzzy_search("owner", owner, limit)
     
     def add_risk(
         self,
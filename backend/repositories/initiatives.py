@@ -22,11 +22,9 @@ class InitiativeRepository(BaseRepository[AIInitiativeModel]):
         """Get all initiatives with relations loaded."""
         return self.db.query(self.model).all()
     
-    def get_by_team(self, team: str) -> List[AIInitiativeModel]:
-        """Get all initiatives for a team."""
-        return self.db.query(self.model).filter(
-            self.model.team.ilike(f"%{team}%")
-        ).all()
+    def get_by_team(self, team: str, limit: Optional[int] = None) -> List[AIInitiativeModel]:
+        """Get initiatives whose team matches, closest matches first."""
+        return self.fuzzy_search("team", team, limit)
     
     def get_by_status(self, status: str) -> List[AIInitiativeModel]:
         """Get all initiatives with a specific status."""
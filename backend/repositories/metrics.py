@@ -1,21 +1,43 @@
 """
 Metrics repository for database operations.
 """
-from typing import Optional, List
-from datetime import datetime
-from sqlalchemy.orm import Session
-from db_models import CopilotMetricsModel
-from .base import BaseRepository
+from typing import Optional, List, Iterable
+from datetime import datetime, date, timedelta
+from sqlalchemy import exists, func, or_
+from sqlalchemy.orm import Session, aliased
+from db_models import (
+    CopilotMetricsModel, CopilotTeamModel, CopilotSeatModel, CopilotDailyMetricsModel,
+    CopilotLanguageEditorDailyModel
+)
+from .base import BaseRepository, upsert_rows, copy_upsert_rows
 
 
 class MetricsRepository(BaseRepository[CopilotMetricsModel]):
     """Repository for Copilot metrics operations."""
     
     SINGLETON_ID = "copilot-metrics-singleton"
+    # team_slug used for org-level rows (e.g. imported org exports); team views
+    # only fall back to them for days without any per-team rows
+    ORG_LEVEL_TEAM = "*"
     
     def __init__(self, db: Session):
         super().__init__(CopilotMetricsModel, db)
     
+    def _team_rows_or_org_fallback(self, model):
+        """
+        Filter on a daily (day, org, team_slug) table keeping the per-team rows,
+        plus the org-level rows of org-days that have no per-team rows.
+        """
+        team_row = aliased(model)
+        return or_(
+            model.team_slug != self.ORG_LEVEL_TEAM,
+            ~exists().where(
+                team_row.day == model.day,
+                team_row.org == model.org,
+                team_row.team_slug != self.ORG_LEVEL_TEAM
+            )
+        )
+    
     def get_current(self) -> Optional[CopilotMetricsModel]:
         """Get the current metrics record."""
         return self.get(self.SINGLETON_ID)
@@ -33,7 +55,6 @@ class MetricsRepository(BaseRepository[CopilotMetricsModel]):
                 total_suggestions=0,
                 total_acceptances=0,
                 total_chats=0,
-                teams=[],
                 last_updated=datetime.utcnow()
             )
             self.db.add(metrics)
@@ -50,7 +71,7 @@ class MetricsRepository(BaseRepository[CopilotMetricsModel]):
         total_suggestions: int = 0,
         total_acceptances: int = 0,
         total_chats: int = 0,
-        teams: list = None
+        teams: Optional[List[dict]] = None
     ) -> CopilotMetricsModel:
         """Update or create metrics."""
         metrics = self.get_or_create()
@@ -62,8 +83,8 @@ class MetricsRepository(BaseRepository[CopilotMetricsModel]):
         metrics.total_suggestions = total_suggestions
         metrics.total_acceptances = total_acceptances
         metrics.total_chats = total_chats
-        metrics.teams = teams or []
         metrics.last_updated = datetime.utcnow()
+        self.replace_teams(teams or [], metrics.last_updated)
         
         self.db.commit()
         self.db.refresh(metrics)
@@ -84,23 +105,254 @@ class MetricsRepository(BaseRepository[CopilotMetricsModel]):
             metrics.total_acceptances = summary.get("total_acceptances", 0)
             metrics.total_chats = summary.get("total_chats", 0)
         
-        # Store teams as JSONB
-        teams = []
-        for t in teams_data:
-            teams.append({
+        metrics.last_updated = datetime.utcnow()
+        count = self.replace_teams(teams_data, metrics.last_updated)
+        
+        self.upsert_daily_metrics(
+            {**day, "org": t.get("org", ""), "team_slug": t.get("slug", "")}
+            for t in teams_data
+            for day in t.get("daily", [])
+        )
+        self.upsert_language_editor_metrics(
+            {**row, "org": t.get("org", ""), "team_slug": t.get("slug", "")}
+            for t in teams_data
+            for row in t.get("breakdown", [])
+        )
+        
+        self.db.commit()
+        return count
+    
+    def replace_teams(self, teams_data: List[dict], synced_at: datetime) -> int:
+        """Upsert the synced teams and drop teams missing from the sync. Does not commit."""
+        # Keyed by id so a team listed twice cannot hit ON CONFLICT twice in one statement
+        rows = {
+            f"{t.get('org', '')}-{t.get('slug', '')}": {
+                "id": f"{t.get('org', '')}-{t.get('slug', '')}",
                 "org": t.get("org", ""),
                 "slug": t.get("slug", ""),
                 "name": t.get("name", ""),
                 "total_active_users": t.get("total_active_users", 0),
                 "total_engaged_users": t.get("total_engaged_users", 0),
                 "acceptance_rate": t.get("acceptance_rate", 0),
-            })
+                "last_updated": synced_at,
+            }
+            for t in teams_data
+        }
+        count = upsert_rows(
+            self.db,
+            CopilotTeamModel,
+            rows.values(),
+            index_elements=["id"],
+            update_columns=[
+                "org", "slug", "name", "total_active_users",
+                "total_engaged_users", "acceptance_rate", "last_updated",
+            ]
+        )
+        self.db.query(CopilotTeamModel).filter(
+            CopilotTeamModel.last_updated < synced_at
+        ).delete(synchronize_session=False)
+        return count
+    
+    def get_teams(
+        self,
+        sort: Optional[str] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        min_active: Optional[int] = None,
+        min_acceptance_rate: Optional[float] = None,
+        org: Optional[str] = None
+    ) -> List[CopilotTeamModel]:
+        """
+        Get teams with server-side filtering, sorting and top-N.
+        `sort` is a column name, prefixed with '-' for descending order.
+        """
+        query = self.db.query(CopilotTeamModel)
         
-        metrics.teams = teams
-        metrics.last_updated = datetime.utcnow()
+        if org:
+            query = query.filter(CopilotTeamModel.org == org)
+        
+        if min_active is not None:
+            query = query.filter(CopilotTeamModel.total_active_users >= min_active)
         
+        if min_acceptance_rate is not None:
+            query = query.filter(CopilotTeamModel.acceptance_rate >= min_acceptance_rate)
+        
+        if sort:
+            column = getattr(CopilotTeamModel, sort.lstrip("-"))
+            query = query.order_by(column.desc() if sort.startswith("-") else column.asc(), CopilotTeamModel.id)
+        else:
+            query = query.order_by(CopilotTeamModel.org, CopilotTeamModel.slug)
+        
+        if offset:
+            query = query.offset(offset)
+        if limit is not None:
+            query = query.limit(limit)
+        
+        return query.all()
+    
+    def get_team_counts(self) -> dict:
+        """Count all teams and teams with active Copilot users in one query."""
+        total_teams, teams_using_ai = self.db.query(
+            func.count(),
+            func.count().filter(CopilotTeamModel.total_active_users > 0)
+        ).select_from(CopilotTeamModel).one()
+        return {"total_teams": total_teams, "teams_using_ai": teams_using_ai}
+    
+    def upsert_daily_metrics(self, rows: Iterable[dict]) -> int:
+        """Insert or update daily team metrics keyed by (day, org, team_slug). Does not commit."""
+        return upsert_rows(
+            self.db,
+            CopilotDailyMetricsModel,
+            rows,
+            index_elements=["day", "org", "team_slug"],
+            update_columns=["active_users", "engaged_users", "suggestions", "acceptances"]
+        )
+    
+    def upsert_language_editor_metrics(self, rows: Iterable[dict]) -> int:
+        """Insert or update daily (team, language, editor) breakdown rows. Does not commit."""
+        return upsert_rows(
+            self.db,
+            CopilotLanguageEditorDailyModel,
+            rows,
+            index_elements=["day", "org", "team_slug", "language", "editor"],
+            update_columns=[
+                "engaged_users", "suggestions", "acceptances",
+                "lines_suggested", "lines_accepted",
+            ]
+        )
+    
+    def copy_daily_metrics(self, rows: Iterable[dict]) -> int:
+        """Bulk load daily team metrics via COPY, upserting on (day, org, team_slug). Does not commit."""
+        return copy_upsert_rows(
+            self.db,
+            CopilotDailyMetricsModel,
+            rows,
+            columns=["day", "org", "team_slug", "active_users", "engaged_users", "suggestions", "acceptances"],
+            index_elements=["day", "org", "team_slug"],
+            update_columns=["active_users", "engaged_users", "suggestions", "acceptances"]
+        )
+    
+    def copy_language_editor_metrics(self, rows: Iterable[dict]) -> int:
+        """Bulk load breakdown rows via COPY, upserting on their full key. Does not commit."""
+        return copy_upsert_rows(
+            self.db,
+            CopilotLanguageEditorDailyModel,
+            rows,
+            columns=[
+                "day", "org", "team_slug", "language", "editor", "engaged_users",
+                "suggestions", "acceptances", "lines_suggested", "lines_accepted",
+            ],
+            index_elements=["day", "org", "team_slug", "language", "editor"],
+            update_columns=[
+                "engaged_users", "suggestions", "acceptances",
+                "lines_suggested", "lines_accepted",
+            ]
+        )
+    
+    def touch(self) -> None:
+        """Bump last_updated (the sync version) after data changed outside /sync."""
+        metrics = self.get_or_create()
+        metrics.last_updated = datetime.utcnow()
         self.db.commit()
-        return len(teams)
+    
+    def get_breakdown_rollup(
+        self,
+        dimension: str,
+        days: int = 28,
+        until: Optional[date] = None,
+        org: Optional[str] = None,
+        team_slug: Optional[str] = None
+    ) -> dict:
+        """
+        Aggregate the breakdown table by `language` or `editor` for the last `days`
+        days, compared with the `days` before that. A ROLLUP row carries the totals.
+        Without `team_slug` all team rows are aggregated, using the org-level rows
+        for days that have no team rows; pass ORG_LEVEL_TEAM for org-level rows only.
+        """
+        m = CopilotLanguageEditorDailyModel
+        column = getattr(m, dimension)
+        until = until or date.today()
+        current_start = until - timedelta(days=days - 1)
+        previous_start = current_start - timedelta(days=days)
+        current = m.day >= current_start
+        previous = m.day < current_start
+        
+        query = self.db.query(
+            column,
+            func.sum(m.suggestions).filter(current),
+            func.sum(m.acceptances).filter(current),
+            func.sum(m.lines_suggested).filter(current),
+            func.sum(m.lines_accepted).filter(current),
+            func.max(m.engaged_users).filter(current),
+            func.sum(m.suggestions).filter(previous),
+            func.sum(m.acceptances).filter(previous),
+        ).filter(m.day >= previous_start, m.day <= until)
+        
+        if org:
+            query = query.filter(m.org == org)
+        if team_slug:
+            query = query.filter(m.team_slug == team_slug)
+        else:
+            query = query.filter(self._team_rows_or_org_fallback(m))
+        
+        rows = query.group_by(func.rollup(column)).all()
+        
+        items = []
+        total = None
+        for key, sugg, acc, lines_sugg, lines_acc, engaged, prev_sugg, prev_acc in rows:
+            sugg, acc, prev_sugg, prev_acc = sugg or 0, acc or 0, prev_sugg or 0, prev_acc or 0
+            rate = (acc / sugg * 100) if sugg > 0 else 0
+            prev_rate = (prev_acc / prev_sugg * 100) if prev_sugg > 0 else 0
+            entry = {
+                "suggestions": sugg,
+                "acceptances": acc,
+                "lines_suggested": lines_sugg or 0,
+                "lines_accepted": lines_acc or 0,
+                "peak_engaged_users": engaged or 0,
+                "acceptance_rate": round(rate, 1),
+                "previous_acceptances": prev_acc,
+                "acceptances_growth_pct": (
+                    round((acc - prev_acc) / prev_acc * 100, 1) if prev_acc > 0 else None
+                ),
+                "acceptance_rate_delta": round(rate - prev_rate, 1) if prev_sugg > 0 else None,
+            }
+            if key is None:
+                total = entry
+            else:
+                items.append({"name": key, **entry})
+        
+        items.sort(key=lambda x: x["acceptances"], reverse=True)
+        
+        return {
+            "dimension": dimension,
+            "start": current_start.isoformat(),
+            "end": until.isoformat(),
+            "previous_start": previous_start.isoformat(),
+            "total": total,
+            "items": items,
+        }
+    
+    def get_daily_metrics(self, since: date) -> List[tuple]:
+        """
+        Get daily team metrics since a date as plain tuples, ordered by team and
+        day. Org-days with only org-level rows (e.g. an imported org export)
+        appear as team ORG_LEVEL_TEAM.
+        """
+        m = CopilotDailyMetricsModel
+        return self.db.query(
+            m.org, m.team_slug, m.day,
+            m.active_users, m.engaged_users, m.suggestions, m.acceptances
+        ).filter(
+            m.day >= since,
+            self._team_rows_or_org_fallback(m)
+        ).order_by(m.org, m.team_slug, m.day).all()
+    
+    def get_sync_version(self) -> Optional[str]:
+        """Get a version token that changes on every metrics sync."""
+        last_updated = self.db.query(self.model.last_updated).filter(
+            self.model.id == self.SINGLETON_ID
+        ).scalar()
+        return last_updated.isoformat() if last_updated else None
     
     def get_summary(self) -> dict:
         """Get metrics summary for dashboard."""
@@ -120,19 +372,94 @@ class MetricsRepository(BaseRepository[CopilotMetricsModel]):
                 "last_updated": None
             }
         
-        teams = metrics.teams or []
-        teams_using_ai = len([t for t in teams if t.get("total_active_users", 0) > 0])
-        total_teams = len(teams)
+        team_counts = self.get_team_counts()
         
         return {
             "acceptance_rate": metrics.acceptance_rate,
             "total_active_users": metrics.total_active_users,
             "total_engaged_users": metrics.total_engaged_users,
             "total_licenses": metrics.total_licenses,
-            "teams_using_ai": teams_using_ai,
-            "total_teams": total_teams,
+            "teams_using_ai": team_counts["teams_using_ai"],
+            "total_teams": team_counts["total_teams"],
             "total_suggestions": metrics.total_suggestions,
             "total_acceptances": metrics.total_acceptances,
             "total_chats": metrics.total_chats,
             "last_updated": metrics.last_updated.isoformat() if metrics.last_updated else None
         }
+    
+    def upsert_seats(self, org: str, seats: Iterable[dict], synced_at: Optional[datetime] = None) -> int:
+        """Insert or update billing seats for an org in fixed-size batches."""
+        synced_at = synced_at or datetime.utcnow()
+        count = upsert_rows(
+            self.db,
+            CopilotSeatModel,
+            ({**seat, "org": org, "synced_at": synced_at} for seat in seats),
+            index_elements=["org", "login"],
+            update_columns=[
+                "assigning_team", "last_activity_at", "last_activity_editor",
+                "pending_cancellation_date", "created_at", "synced_at",
+            ]
+        )
+        self.db.commit()
+        return count
+    
+    def prune_seats(self, org: str, synced_before: datetime) -> int:
+        """Delete an org's seats not seen since `synced_before` (they left Copilot billing)."""
+        removed = self.db.query(CopilotSeatModel).filter(
+            CopilotSeatModel.org == org,
+            CopilotSeatModel.synced_at < synced_before
+        ).delete(synchronize_session=False)
+        self.db.commit()
+        return removed
+    
+    def get_idle_seats(
+        self,
+        days: int = 30,
+        org: Optional[str] = None,
+        limit: int = 100,
+        offset: int = 0
+    ) -> dict:
+        """Get seats with no activity in the last `days` days, oldest activity first."""
+        cutoff = datetime.utcnow() - timedelta(days=days)
+        idle = or_(
+            CopilotSeatModel.last_activity_at < cutoff,
+            CopilotSeatModel.last_activity_at.is_(None)
+        )
+        
+        query = self.db.query(CopilotSeatModel).filter(idle)
+        if org:
+            query = query.filter(CopilotSeatModel.org == org)
+        
+        # Per-org counts so licenses can be reclaimed org by org
+        by_org_query = self.db.query(
+            CopilotSeatModel.org, func.count()
+        ).filter(idle)
+        if org:
+            by_org_query = by_org_query.filter(CopilotSeatModel.org == org)
+        by_org = dict(by_org_query.group_by(CopilotSeatModel.org).all())
+        
+        seats = query.order_by(
+            CopilotSeatModel.last_activity_at.asc().nullsfirst(),
+            CopilotSeatModel.org,
+            CopilotSeatModel.login
+        ).offset(offset).limit(limit).all()
+        
+        return {
+            "days": days,
+            "cutoff": cutoff.isoformat(),
+            "total_idle": sum(by_org.values()),
+            "by_org": by_org,
+            "seats": [
+                {
+                    "org": s.org,
+                    "login": s.login,
+                    "assigning_team": s.assigning_team,
+                    "last_activity_at": s.last_activity_at.isoformat() if s.last_activity_at else None,
+                    "last_activity_editor": s.last_activity_editor,
+                    "pending_cancellation_date": (
+                        s.pending_cancellation_date.isoformat() if s.pending_cancellation_date else None
+                    ),
+                }
+                for s in seats
+            ]
+        }
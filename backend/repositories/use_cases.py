@@ -1,10 +1,24 @@
 """
 Use Case repository for database operations.
 """
-from typing import List, Optional
-from sqlalchemy.orm import Session
-from db_models import UseCaseModel, UseCaseStatus
-from .base import BaseRepository
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import func, insert, or_, tuple_, update
+from sqlalchemy.orm import Session, aliased
+from db_models import (
+    UseCaseModel, UseCaseStatus, ROICalculationModel, UseCaseSignatureModel, UseCaseLSHBucketModel, USE_CASE_SEARCH_CONFIG
+)
+from .base import BaseRepository, upsert_rows
+
+MAX_SCORE = 10
+# Buckets shared by more use cases than this (boilerplate text) are left out of the duplicates report
+MAX_LSH_BUCKET_SIZE = 100
+HEADLINE_OPTIONS = "StartSel=<mark>, StopSel=</mark>, MaxFragments=2, MaxWords=30, MinWords=10"
+
+
+def _score_bin(column, bins: int):
+    """Grid cell (0..bins-1) of a 0-10 score; out-of-range scores go to the edge cells."""
+    return func.least(func.greatest(func.floor(func.coalesce(column, 0) * (bins / MAX_SCORE)), 0), bins - 1)
 
 
 class UseCaseRepository(BaseRepository[UseCaseModel]):
@@ -18,10 +32,11 @@ class UseCaseRepository(BaseRepository[UseCaseModel]):
         status: Optional[UseCaseStatus] = None,
         department: Optional[str] = None,
         min_impact: Optional[float] = None,
-        min_feasibility: Optional[float] = None
+        min_feasibility: Optional[float] = None,
+        fields: Optional[List[str]] = None
     ) -> List[UseCaseModel]:
-        """Get use cases with optional filters."""
-        query = self.db.query(self.model)
+        """Get use cases with optional filters, loading only `fields` when given."""
+        query = self.with_fields(self.db.query(self.model), fields)
         
         if status:
             query = query.filter(self.model.status == status)
@@ -37,6 +52,360 @@ class UseCaseRepository(BaseRepository[UseCaseModel]):
         
         return query.all()
     
+    def get_prioritized(
+        self,
+        limit: Optional[int] = None,
+        after: Optional[Tuple[float, str]] = None,
+        status: Optional[UseCaseStatus] = None,
+        department: Optional[str] = None,
+        fields: Optional[List[str]] = None
+    ) -> List[UseCaseModel]:
+        """
+        Use cases by stored priority score, highest first (ties by id).
+        `after` is the (priority_score, id) of the last row of the previous
+        page; the ordering matches the priority indexes so this is a range scan.
+        """
+        # The cursor needs priority_score even when it is not a requested field
+        fields = fields and [*fields, "priority_score"]
+        query = self.with_fields(self.db.query(self.model), fields)
+        
+        if status:
+            query = query.filter(self.model.status == status)
+        
+        if department:
+            query = query.filter(func.lower(self.model.department) == department.lower())
+        
+        if after is not None:
+            query = query.filter(tuple_(self.model.priority_score, self.model.id) < after)
+        
+        query = query.order_by(self.model.priority_score.desc(), self.model.id.desc())
+        if limit is not None:
+            query = query.limit(limit)
+        return query.all()
+    
+    def search(
+        self,
+        q: str,
+        limit: int = 20,
+        offset: int = 0,
+        status: Optional[UseCaseStatus] = None,
+        department: Optional[str] = None
+    ) -> Tuple[int, List[Tuple[UseCaseModel, float, str, str]]]:
+        """
+        Full-text search over title, description, problem statement and
+        expected outcomes (web-search syntax). Returns the total match count
+        and one page of (use case, rank, highlighted title, snippet), best
+        first. Snippets are only built for the returned page.
+        """
+        m = self.model
+        tsquery = func.websearch_to_tsquery(USE_CASE_SEARCH_CONFIG, q)
+        rank = func.ts_rank_cd(m.search_vector, tsquery)
+        
+        matches = self.db.query(
+            m.id.label("id"),
+            rank.label("rank"),
+            func.count().over().label("total")
+        ).filter(m.search_vector.op("@@")(tsquery))
+        if status:
+            matches = matches.filter(m.status == status)
+        if department:
+            matches = matches.filter(func.lower(m.department) == department.lower())
+        page = matches.order_by(rank.desc(), m.id).offset(offset).limit(limit).subquery()
+        
+        document = func.concat_ws(" ... ", m.description, m.problem_statement, m.expected_outcomes)
+        rows = self.db.query(
+            m,
+            page.c.rank,
+            page.c.total,
+            func.ts_headline(USE_CASE_SEARCH_CONFIG, m.title, tsquery, "HighlightAll=true"),
+            func.ts_headline(USE_CASE_SEARCH_CONFIG, document, tsquery, HEADLINE_OPTIONS)
+        ).join(page, page.c.id == m.id).order_by(page.c.rank.desc(), m.id).all()
+        
+        # An offset past the last match returns no rows to read the total from
+        total = rows[0][2] if rows else (matches.count() if offset else 0)
+        return total, [(uc, float(r), title, snippet) for uc, r, _, title, snippet in rows]
+    
+    def get_ranking_rows(self) -> List[tuple]:
+        """
+        (id, title, department, status, impact, feasibility, risk,
+        data_availability) for every use case, enums as their values.
+        """
+        rows = self.db.query(
+            self.model.id,
+            self.model.title,
+            self.model.department,
+            self.model.status,
+            self.model.impact_score,
+            self.model.feasibility_score,
+            self.model.risk_score,
+            self.model.data_availability
+        ).order_by(self.model.id).all()
+        return [
+            (
+                r.id, r.title, r.department,
+                r.status.value if r.status else None,
+                r.impact_score, r.feasibility_score, r.risk_score,
+                r.data_availability.value if r.data_availability else None
+            )
+            for r in rows
+        ]
+    
+    def get_snapshot_version(self) -> Tuple[int, Optional[datetime]]:
+        """Row count and latest update; changes on every insert, update and delete."""
+        return tuple(self.db.query(func.count(self.model.id), func.max(self.model.updated_at)).one())
+    
+    def get_matrix_cells(self, bins: int) -> List[Dict]:
+        """
+        Aggregate the feasibility (x) / impact (y) matrix into a bins x bins
+        grid: count, centroid, average risk and status mix of each non-empty cell.
+        """
+        x = _score_bin(self.model.feasibility_score, bins).label("x")
+        y = _score_bin(self.model.impact_score, bins).label("y")
+        rows = self.db.query(
+            x, y, self.model.status,
+            func.count(self.model.id),
+            func.sum(self.model.feasibility_score),
+            func.sum(self.model.impact_score),
+            func.sum(self.model.risk_score)
+        ).group_by(x, y, self.model.status).all()
+        
+        cells: Dict[Tuple[int, int], Dict] = {}
+        for cx, cy, status, count, feasibility, impact, risk in rows:
+            cell = cells.setdefault((int(cx), int(cy)), {
+                "x": int(cx), "y": int(cy), "count": 0,
+                "feasibility": 0.0, "impact": 0.0, "risk": 0.0, "by_status": {}
+            })
+            cell["count"] += count
+            cell["feasibility"] += feasibility or 0
+            cell["impact"] += impact or 0
+            cell["risk"] += risk or 0
+            key = status.value if status else "unknown"
+            cell["by_status"][key] = cell["by_status"].get(key, 0) + count
+        
+        result = []
+        for cell in cells.values():
+            count = cell.pop("count")
+            result.append({
+                "x": cell["x"],
+                "y": cell["y"],
+                "count": count,
+                "avg_feasibility": round(cell["feasibility"] / count, 2),
+                "avg_impact": round(cell["impact"] / count, 2),
+                "avg_risk": round(cell["risk"] / count, 2),
+                "by_status": cell["by_status"],
+            })
+        return sorted(result, key=lambda c: (c["y"], c["x"]))
+    
+    def get_matrix_cell(
+        self,
+        bins: int,
+        x: int,
+        y: int,
+        limit: int = 50,
+        offset: int = 0
+    ) -> Tuple[int, List[UseCaseModel]]:
+        """Total and one page (by priority, highest first) of the use cases in one grid cell."""
+        query = self.db.query(self.model).filter(
+            _score_bin(self.model.feasibility_score, bins) == x,
+            _score_bin(self.model.impact_score, bins) == y
+        )
+        total = query.count()
+        items = query.order_by(
+            self.model.priority_score.desc(), self.model.id.desc()
+        ).offset(offset).limit(limit).all()
+        return total, items
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Counts and average scores by status, by department, by status and
+        department, and overall, from a single GROUPING SETS aggregate.
+        """
+        m = self.model
+        rows = self.db.query(
+            func.grouping(m.status, m.department),
+            m.status,
+            m.department,
+            func.count(m.id),
+            func.avg(m.impact_score),
+            func.avg(m.feasibility_score),
+            func.avg(m.risk_score)
+        ).group_by(func.grouping_sets(
+            tuple_(m.status),
+            tuple_(m.department),
+            tuple_(m.status, m.department),
+            tuple_()
+        )).all()
+        
+        stats = {
+            "total": 0,
+            "by_status": {},
+            "by_department": {},
+            "avg_impact": 0,
+            "avg_feasibility": 0,
+            "avg_risk": 0,
+            "department_averages": {},
+            "status_by_department": {},
+        }
+        for grouping, status, department, count, impact, feasibility, risk in rows:
+            status_key = status.value if status else "unknown"
+            # grouping() bits: 2 = status rolled up, 1 = department rolled up
+            if grouping == 3:
+                stats["total"] = count
+                stats["avg_impact"] = float(impact or 0)
+                stats["avg_feasibility"] = float(feasibility or 0)
+                stats["avg_risk"] = float(risk or 0)
+            elif grouping == 2:
+                stats["by_department"][department] = count
+                stats["department_averages"][department] = {
+                    "count": count,
+                    "avg_impact": float(impact or 0),
+                    "avg_feasibility": float(feasibility or 0),
+                    "avg_risk": float(risk or 0),
+                }
+            elif grouping == 1:
+                stats["by_status"][status_key] = count
+            else:
+                stats["status_by_department"].setdefault(department, {})[status_key] = count
+        return stats
+    
+    def get_existing_ids(self, ids: Iterable[str]) -> Set[str]:
+        """The subset of ids that exist, in one query."""
+        ids = list(set(ids))
+        if not ids:
+            return set()
+        return {r[0] for r in self.db.query(self.model.id).filter(self.model.id.in_(ids)).all()}
+    
+    def apply_batch(
+        self,
+        creates: List[Dict],
+        updates: List[Dict],
+        status_changes: Dict[str, UseCaseStatus]
+    ) -> None:
+        """
+        Insert new rows, update existing rows by id and apply status changes,
+        all set-based and committed as one transaction.
+        """
+        now = datetime.utcnow()
+        if creates:
+            self.db.execute(insert(self.model), creates)
+        if updates:
+            self.db.execute(update(self.model), [{**row, "updated_at": now} for row in updates])
+        
+        by_status: Dict[UseCaseStatus, List[str]] = {}
+        for id, status in status_changes.items():
+            by_status.setdefault(status, []).append(id)
+        for status, ids in by_status.items():
+            self.db.query(self.model).filter(self.model.id.in_(ids)).update(
+                {self.model.status: status, self.model.updated_at: now},
+                synchronize_session=False
+            )
+        self.db.commit()
+    
+    def get_signature_texts(self, ids: Optional[Iterable[str]] = None) -> List[Tuple[str, str]]:
+        """
+        (id, text) of the given use cases, or of every use case whose MinHash
+        signature is missing or older than its last update.
+        """
+        m = self.model
+        text = func.concat_ws(" ", m.title, m.description, m.problem_statement, m.expected_outcomes)
+        query = self.db.query(m.id, text)
+        if ids is not None:
+            query = query.filter(m.id.in_(list(ids)))
+        else:
+            query = query.outerjoin(
+                UseCaseSignatureModel, UseCaseSignatureModel.usecase_id == m.id
+            ).filter(or_(
+                UseCaseSignatureModel.usecase_id.is_(None),
+                UseCaseSignatureModel.computed_at < m.updated_at
+            ))
+        return [(r[0], r[1]) for r in query.all()]
+    
+    def save_signatures(
+        self,
+        signatures: Dict[str, List[int]],
+        buckets: Dict[str, List[Tuple[int, int]]]
+    ) -> None:
+        """Replace the signatures and LSH buckets of the given use cases and commit."""
+        if not signatures:
+            return
+        now = datetime.utcnow()
+        ids = list(signatures)
+        self.db.query(UseCaseLSHBucketModel).filter(
+            UseCaseLSHBucketModel.usecase_id.in_(ids)
+        ).delete(synchronize_session=False)
+        upsert_rows(
+            self.db,
+            UseCaseSignatureModel,
+            ({"usecase_id": id, "signature": sig, "computed_at": now} for id, sig in signatures.items()),
+            index_elements=["usecase_id"],
+            update_columns=["signature", "computed_at"]
+        )
+        bucket_rows = [
+            {"band": band, "bucket": bucket, "usecase_id": id}
+            for id, keys in buckets.items()
+            for band, bucket in keys
+        ]
+        if bucket_rows:
+            self.db.execute(insert(UseCaseLSHBucketModel), bucket_rows)
+        self.db.commit()
+    
+    def get_signatures(self, ids: Iterable[str]) -> Dict[str, List[int]]:
+        """Non-empty signatures of the given use cases."""
+        rows = self.db.query(
+            UseCaseSignatureModel.usecase_id, UseCaseSignatureModel.signature
+        ).filter(UseCaseSignatureModel.usecase_id.in_(list(ids))).all()
+        return {r[0]: r[1] for r in rows if r[1]}
+    
+    def get_similarity_candidates(self, id: str) -> List[str]:
+        """Use cases sharing at least one LSH bucket with the given one."""
+        mine = aliased(UseCaseLSHBucketModel)
+        other = aliased(UseCaseLSHBucketModel)
+        rows = self.db.query(other.usecase_id).distinct().join(
+            mine, (mine.band == other.band) & (mine.bucket == other.bucket)
+        ).filter(mine.usecase_id == id, other.usecase_id != id).all()
+        return [r[0] for r in rows]
+    
+    def get_candidate_pairs(self) -> List[Tuple[str, str]]:
+        """Distinct (a, b) use case pairs, a < b, that share at least one LSH bucket."""
+        b = UseCaseLSHBucketModel
+        left = aliased(b)
+        right = aliased(b)
+        shared = self.db.query(b.band, b.bucket).group_by(b.band, b.bucket).having(
+            func.count().between(2, MAX_LSH_BUCKET_SIZE)
+        ).subquery()
+        rows = self.db.query(left.usecase_id, right.usecase_id).distinct().join(
+            shared, (shared.c.band == left.band) & (shared.c.bucket == left.bucket)
+        ).join(
+            right,
+            (right.band == left.band) & (right.bucket == left.bucket) & (left.usecase_id < right.usecase_id)
+        ).all()
+        return [(r[0], r[1]) for r in rows]
+    
+    def get_portfolio_candidates(
+        self,
+        max_risk: Optional[float] = None,
+        statuses: Optional[List[UseCaseStatus]] = None
+    ) -> List[tuple]:
+        """
+        (id, title, department, status, risk, priority, investment, returns)
+        of use cases that have an ROI calculation.
+        """
+        m = self.model
+        query = self.db.query(
+            m.id, m.title, m.department, m.status, m.risk_score, m.priority_score,
+            ROICalculationModel.investment, ROICalculationModel.returns
+        ).join(ROICalculationModel, ROICalculationModel.usecase_id == m.id)
+        if max_risk is not None:
+            query = query.filter(m.risk_score <= max_risk)
+        if statuses:
+            query = query.filter(m.status.in_(statuses))
+        return query.order_by(m.id).all()
+    
+    def get_titles(self, ids: Iterable[str]) -> Dict[str, str]:
+        """Titles of the given use cases by id."""
+        rows = self.db.query(self.model.id, self.model.title).filter(self.model.id.in_(list(ids))).all()
+        return {r[0]: r[1] for r in rows}
+    
     def get_by_department(self, department: str) -> List[UseCaseModel]:
         """Get all use cases for a department."""
         return self.db.query(self.model).filter(
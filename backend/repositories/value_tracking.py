@@ -1,11 +1,85 @@
 """
 Value Tracking repository for database operations.
 """
-from typing import List, Optional
-from datetime import datetime
+import re
+from typing import Dict, Iterable, List, Optional, Sequence, Set
+from datetime import date, datetime
+from sqlalchemy import Float, case, func, or_, select, text
+from sqlalchemy.dialects.postgresql import ARRAY, aggregate_order_by, insert
 from sqlalchemy.orm import Session
-from db_models import ValueRecordModel, ROICalculationModel
-from .base import BaseRepository
+from db_models import KPIModel, ValueRecordModel, ROICalculationModel, UseCaseModel, UNSPECIFIED_KPI
+from .base import BaseRepository, copy_upsert_rows, upsert_rows
+
+DEFAULT_PARTITION = "value_records_default"
+PARTITIONS_AHEAD = 2
+_PARTITION_NAME = re.compile(r"^value_records_(\d{4})_(\d{2})$")
+
+# Rollup bucket for ROI calculations whose use case has no department
+UNASSIGNED_DEPARTMENT = "Unassigned"
+
+# Months known to have a partition in this process; a stale entry only means
+# rows land in the default partition until the next maintenance run
+_known_partitions: Set[date] = set()
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _partition_name(month: date, archive: bool = False) -> str:
+    prefix = "value_records_archive" if archive else "value_records"
+    return f"{prefix}_{month.year:04d}_{month.month:02d}"
+
+
+def normalize_kpi_name(name: Optional[str]) -> str:
+    """Canonical KPI spelling: trimmed with inner whitespace collapsed (matches KPI_NAME_SQL)."""
+    return " ".join((name or "").split()) or UNSPECIFIED_KPI
+
+
+class KPIRepository(BaseRepository[KPIModel]):
+    """Repository for the KPI dimension."""
+    
+    def __init__(self, db: Session):
+        super().__init__(KPIModel, db)
+    
+    def get_catalog(self) -> List[KPIModel]:
+        """All KPIs, grouped by category."""
+        return self.db.query(self.model).order_by(
+            self.model.category.asc().nulls_last(), self.model.name
+        ).all()
+    
+    def id_of(self, name: str):
+        """Scalar subquery for the id of a KPI name, for equality filters on kpi_id."""
+        return select(self.model.id).where(
+            func.lower(self.model.name) == normalize_kpi_name(name).lower()
+        ).correlate(None).scalar_subquery()
+    
+    def resolve_ids(self, units_by_name: Dict[str, Optional[str]]) -> Dict[str, int]:
+        """
+        Map KPI names (in any case or spacing) to ids, creating the missing
+        KPIs with the given unit. Does not commit.
+        """
+        if not units_by_name:
+            return {}
+        keys = {name: normalize_kpi_name(name) for name in units_by_name}
+        
+        def lookup() -> Dict[str, int]:
+            rows = self.db.query(func.lower(self.model.name), self.model.id).filter(
+                func.lower(self.model.name).in_({k.lower() for k in keys.values()})
+            ).all()
+            return dict(rows)
+        
+        ids = lookup()
+        missing = {}
+        for name, key in keys.items():
+            if key.lower() not in ids:
+                missing.setdefault(key.lower(), {"name": key, "unit": units_by_name[name], "created_at": datetime.utcnow()})
+        if missing:
+            # A concurrent writer may create the same KPI; the unique index settles it
+            self.db.execute(insert(self.model).values(list(missing.values())).on_conflict_do_nothing())
+            ids = lookup()
+        return {name: ids[key.lower()] for name, key in keys.items()}
 
 
 class ValueTrackingRepository(BaseRepository[ValueRecordModel]):
@@ -28,7 +102,7 @@ class ValueTrackingRepository(BaseRepository[ValueRecordModel]):
             query = query.filter(self.model.usecase_id == usecase_id)
         
         if kpi:
-            query = query.filter(self.model.kpi.ilike(kpi))
+            query = query.filter(self.model.kpi_id == KPIRepository(self.db).id_of(kpi))
         
         if start_date:
             query = query.filter(self.model.date >= start_date)
@@ -38,6 +112,265 @@ class ValueTrackingRepository(BaseRepository[ValueRecordModel]):
         
         return query.order_by(self.model.date.desc()).all()
     
+    def create(self, obj: ValueRecordModel) -> ValueRecordModel:
+        """Create a record, making sure its month has a partition first."""
+        if obj.date is None:
+            obj.date = datetime.utcnow()
+        self.ensure_partitions([obj.date])
+        return super().create(obj)
+    
+    def find_id_conflicts(self, rows: Sequence[dict]) -> Dict[int, datetime]:
+        """
+        Positions of the rows whose id is already used with a different date,
+        in the table or earlier in `rows`, with that date. The primary key is
+        (id, date) because of partitioning, so id uniqueness is checked here;
+        an advisory lock held until commit keeps concurrent imports from
+        claiming the same id in between. Does not commit.
+        """
+        if not rows:
+            return {}
+        self.db.execute(text("SELECT pg_advisory_xact_lock(hashtext('value_records_ids'))"))
+        dates = dict(self.db.query(self.model.id, self.model.date).filter(
+            self.model.id.in_(list({row["id"] for row in rows}))
+        ).all())
+        conflicts = {}
+        for i, row in enumerate(rows):
+            date = dates.setdefault(row["id"], row["date"])
+            if date != row["date"]:
+                conflicts[i] = date
+        return conflicts
+    
+    def copy_records(self, rows: List[dict]) -> int:
+        """
+        Bulk load value records with COPY, upserting on (id, date) since the
+        table is partitioned by date. Rows carry the KPI name as "kpi"; it is
+        resolved to kpi_id, creating new KPIs as needed. Does not commit.
+        """
+        self.ensure_partitions(row["date"] for row in rows)
+        kpi_ids = KPIRepository(self.db).resolve_ids({row["kpi"]: row.get("unit") for row in rows})
+        columns = ["id", "usecase_id", "usecase_title", "kpi_id", "value", "target", "unit", "date", "created_at"]
+        return copy_upsert_rows(
+            self.db,
+            self.model,
+            ({**row, "kpi_id": kpi_ids[row["kpi"]]} for row in rows),
+            columns=columns,
+            index_elements=["id", "date"],
+            update_columns=[c for c in columns if c not in ("id", "date", "created_at")]
+        )
+    
+    def get_partitions(self) -> List[date]:
+        """Months with an attached monthly partition, oldest first."""
+        names = self.db.execute(text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = 'value_records'::regclass"
+        )).scalars()
+        months = []
+        for name in names:
+            match = _PARTITION_NAME.match(name)
+            if match:
+                months.append(date(int(match.group(1)), int(match.group(2)), 1))
+        return sorted(months)
+    
+    def ensure_partitions(self, dates: Iterable[datetime]) -> List[str]:
+        """
+        Create the monthly partitions covering `dates`. Rows of those months
+        already in the default partition are moved into the new partition
+        before it is attached. Does not commit.
+        """
+        months = {date(d.year, d.month, 1) for d in dates if d} - _known_partitions
+        if not months:
+            return []
+        
+        # Serialize partition DDL across sessions, then re-check under the lock
+        self.db.execute(text("SELECT pg_advisory_xact_lock(hashtext('value_records_partitions'))"))
+        existing = set(self.get_partitions())
+        _known_partitions.update(existing)
+        
+        created = []
+        for month in sorted(months - existing):
+            name = _partition_name(month)
+            bounds = {"start": month, "end": _add_months(month, 1)}
+            self.db.execute(text(f"CREATE TABLE {name} (LIKE value_records INCLUDING DEFAULTS)"))
+            self.db.execute(text(
+                f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+                f"WHERE date >= :start AND date < :end RETURNING *) "
+                f"INSERT INTO {name} SELECT * FROM moved"
+            ), bounds)
+            self.db.execute(text(
+                f"ALTER TABLE value_records ATTACH PARTITION {name} "
+                f"FOR VALUES FROM ('{bounds['start']}') TO ('{bounds['end']}')"
+            ))
+            created.append(name)
+        _known_partitions.update(months)
+        return created
+    
+    def _archive_name(self, month: date) -> str:
+        """
+        value_records_archive_YYYY_MM, or with a _2, _3, ... suffix when a month
+        detached before (and later backfilled) already holds that name.
+        """
+        base = name = _partition_name(month, archive=True)
+        suffix = 1
+        while self.db.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar() is not None:
+            suffix += 1
+            name = f"{base}_{suffix}"
+        return name
+    
+    def detach_partitions_before(self, cutoff: date, drop: bool = False) -> List[str]:
+        """
+        Detach the monthly partitions that end on or before `cutoff`. Detached
+        partitions are kept as value_records_archive_YYYY_MM tables for
+        archiving unless `drop` is set. Does not commit.
+        """
+        self.db.execute(text("SELECT pg_advisory_xact_lock(hashtext('value_records_partitions'))"))
+        detached = []
+        for month in self.get_partitions():
+            if _add_months(month, 1) > cutoff:
+                break
+            name = _partition_name(month)
+            self.db.execute(text(f"ALTER TABLE value_records DETACH PARTITION {name}"))
+            if drop:
+                self.db.execute(text(f"DROP TABLE {name}"))
+            else:
+                self.db.execute(text(f"ALTER TABLE {name} RENAME TO {self._archive_name(month)}"))
+            _known_partitions.discard(month)
+            detached.append(name)
+        return detached
+    
+    def maintain_partitions(
+        self,
+        retention_months: Optional[int] = None,
+        drop: bool = False
+    ) -> Dict[str, List[str]]:
+        """
+        Create partitions for the current and next PARTITIONS_AHEAD months and
+        for every month found in the default partition, then apply the
+        retention policy: partitions of months more than `retention_months`
+        before the current one are detached. Does not commit.
+        """
+        this_month = date.today().replace(day=1)
+        months = [_add_months(this_month, i) for i in range(PARTITIONS_AHEAD + 1)]
+        months += self.db.execute(text(
+            f"SELECT DISTINCT date_trunc('month', date) FROM {DEFAULT_PARTITION}"
+        )).scalars().all()
+        
+        # Expired rows stranded in the default partition get a partition too, then leave with it
+        created = self.ensure_partitions(months)
+        detached = []
+        if retention_months:
+            detached = self.detach_partitions_before(_add_months(this_month, -retention_months), drop)
+        return {"created": created, "detached": detached}
+    
+    def get_trends(
+        self,
+        period: str = "month",
+        usecase_id: Optional[str] = None,
+        kpi: Optional[str] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> Dict[str, List[dict]]:
+        """
+        Per-KPI series bucketed by date_trunc(period): average, sum and last
+        value, average target, average achievement and the share of records
+        meeting their target in each bucket.
+        """
+        m = self.model
+        bucket = func.date_trunc(period, m.date)
+        achievement = case((m.target > 0, m.value / m.target * 100))
+        query = self.db.query(
+            KPIModel.name,
+            bucket,
+            func.count(m.id),
+            func.avg(m.value),
+            func.sum(m.value),
+            func.array_agg(aggregate_order_by(m.value, m.date.desc()), type_=ARRAY(Float))[1],
+            func.avg(m.target),
+            func.avg(achievement),
+            func.count(m.id).filter(m.value >= m.target)
+        ).join(KPIModel, KPIModel.id == m.kpi_id).filter(m.date.isnot(None))
+        
+        if usecase_id:
+            query = query.filter(m.usecase_id == usecase_id)
+        if kpi:
+            query = query.filter(m.kpi_id == KPIRepository(self.db).id_of(kpi))
+        if start_date:
+            query = query.filter(m.date >= start_date)
+        if end_date:
+            query = query.filter(m.date <= end_date)
+        
+        trends: Dict[str, List[dict]] = {}
+        for name, start, count, avg_value, total, last, target, avg_achievement, met in (
+            query.group_by(KPIModel.name, bucket).order_by(KPIModel.name, bucket).all()
+        ):
+            trends.setdefault(name, []).append({
+                "date": start.isoformat(),
+                "count": count,
+                "value": avg_value,
+                "sum": total,
+                "last": last,
+                "target": target,
+                "achievement": float(avg_achievement or 0),
+                "target_attainment": met / count * 100,
+            })
+        return trends
+    
+    def get_dashboard_totals(self) -> dict:
+        """Record, KPI and use case counts and the average achievement over all records."""
+        m = self.model
+        achievement = case((m.target > 0, m.value / m.target * 100))
+        total, kpis, usecases, avg_achievement = self.db.query(
+            func.count(m.id),
+            func.count(m.kpi_id.distinct()),
+            func.count(m.usecase_id.distinct()),
+            func.avg(achievement)
+        ).one()
+        return {
+            "total_records": total,
+            "kpis_tracked": kpis,
+            "usecases_tracked": usecases,
+            "avg_achievement": float(avg_achievement or 0),
+        }
+    
+    def get_usecase_rankings(self, top_n: int, threshold: float) -> Dict[str, List[dict]]:
+        """
+        Average achievement per use case, ranked with window functions: the
+        top_n best overall and the top_n best of those below threshold.
+        Only the returned rows leave the database.
+        """
+        m = self.model
+        avg_achievement = func.avg(case((m.target > 0, m.value / m.target * 100)))
+        per_usecase = self.db.query(
+            m.usecase_id.label("usecase_id"),
+            func.min(m.usecase_title).label("usecase_title"),
+            avg_achievement.label("avg_achievement")
+        ).group_by(m.usecase_id).having(avg_achievement.isnot(None)).subquery()
+        
+        below = per_usecase.c.avg_achievement < threshold
+        order = (per_usecase.c.avg_achievement.desc(), per_usecase.c.usecase_id)
+        ranked = self.db.query(
+            per_usecase,
+            func.row_number().over(order_by=order).label("rank"),
+            func.row_number().over(partition_by=below, order_by=order).label("group_rank"),
+            below.label("below")
+        ).subquery()
+        
+        rows = self.db.query(ranked).filter(or_(
+            ranked.c.rank <= top_n,
+            ranked.c.below & (ranked.c.group_rank <= top_n)
+        )).order_by(ranked.c.rank).all()
+        
+        def entry(r) -> dict:
+            return {
+                "usecase_id": r.usecase_id,
+                "usecase_title": r.usecase_title,
+                "avg_achievement": float(r.avg_achievement),
+            }
+        
+        return {
+            "top_performers": [entry(r) for r in rows if r.rank <= top_n],
+            "needs_attention": [entry(r) for r in rows if r.below and r.group_rank <= top_n],
+        }
+    
     def get_by_usecase(self, usecase_id: str) -> List[ValueRecordModel]:
         """Get all value records for a use case."""
         return self.db.query(self.model).filter(
@@ -47,8 +380,12 @@ class ValueTrackingRepository(BaseRepository[ValueRecordModel]):
     def get_by_kpi(self, kpi: str) -> List[ValueRecordModel]:
         """Get all value records for a specific KPI."""
         return self.db.query(self.model).filter(
-            self.model.kpi.ilike(kpi)
+            self.model.kpi_id == KPIRepository(self.db).id_of(kpi)
         ).order_by(self.model.date.desc()).all()
+    
+    def count_tracked_kpis(self) -> int:
+        """Number of distinct KPIs with at least one record."""
+        return self.db.query(func.count(self.model.kpi_id.distinct())).scalar()
 
 
 class ROIRepository(BaseRepository[ROICalculationModel]):
@@ -63,16 +400,83 @@ class ROIRepository(BaseRepository[ROICalculationModel]):
             self.model.usecase_id == usecase_id
         ).first()
     
+    def get_totals(self) -> dict:
+        """Summed investment and returns, and the portfolio ROI (%) they give."""
+        investment, returns = self.db.query(
+            func.sum(self.model.investment), func.sum(self.model.returns)
+        ).one()
+        investment, returns = investment or 0, returns or 0
+        return {
+            "investment": investment,
+            "returns": returns,
+            "roi_percentage": (returns - investment) / investment * 100 if investment > 0 else 0,
+        }
+    
+    def get_total_roi(self) -> float:
+        """Portfolio ROI (%) from summed investment and returns."""
+        return self.get_totals()["roi_percentage"]
+    
+    def get_department_rollups(self, usecase_ids: Optional[Sequence[str]] = None) -> List[dict]:
+        """
+        Investment, returns and ROI summed per use case department (case- and
+        whitespace-insensitive), best net return first. With usecase_ids, only
+        the departments containing one of those use cases.
+        """
+        r, u = self.model, UseCaseModel
+        department = func.coalesce(func.nullif(func.btrim(u.department), ""), UNASSIGNED_DEPARTMENT)
+        investment = func.coalesce(func.sum(r.investment), 0)
+        returns = func.coalesce(func.sum(r.returns), 0)
+        query = self.db.query(
+            func.min(department),
+            func.count(r.id),
+            investment,
+            returns,
+            func.avg(r.payback_months).filter(r.payback_months > 0)
+        ).outerjoin(u, u.id == r.usecase_id).group_by(func.lower(department))
+        if usecase_ids is not None:
+            query = query.having(func.bool_or(r.usecase_id.in_(list(usecase_ids))))
+        
+        return [
+            {
+                "department": name,
+                "use_cases": count,
+                "investment": invested,
+                "returns": returned,
+                "net_return": returned - invested,
+                "roi_percentage": (returned - invested) / invested * 100 if invested > 0 else 0,
+                "avg_payback_months": float(payback) if payback is not None else None,
+            }
+            for name, count, invested, returned, payback in query.order_by((returns - investment).desc()).all()
+        ]
+    
+    def upsert_many(self, rows: List[dict]) -> int:
+        """
+        Insert or update ROI calculations with a single INSERT ... ON CONFLICT
+        (usecase_id). Rows need id (used for new rows only), usecase_id,
+        investment, returns, roi_percentage and payback_months; the last row per
+        use case wins. Does not commit.
+        """
+        now = datetime.utcnow()
+        rows = list({row["usecase_id"]: {**row, "updated_at": now} for row in rows}.values())
+        return upsert_rows(
+            self.db,
+            self.model,
+            rows,
+            index_elements=["usecase_id"],
+            update_columns=["investment", "returns", "roi_percentage", "payback_months", "updated_at"],
+            batch_size=max(len(rows), 1)
+        )
+    
     def upsert(self, roi: ROICalculationModel) -> ROICalculationModel:
         """Insert or update ROI calculation for a use case."""
-        existing = self.get_by_usecase(roi.usecase_id)
-        if existing:
-            existing.investment = roi.investment
-            existing.returns = roi.returns
-            existing.roi_percentage = roi.roi_percentage
-            existing.payback_months = roi.payback_months
-            self.db.commit()
-            self.db.refresh(existing)
-            return existing
-        else:
-            return self.create(roi)
+        self.upsert_many([{
+            "id": roi.id,
+            "usecase_id": roi.usecase_id,
+            "investment": roi.investment,
+            "returns": roi.returns,
+            "roi_percentage": roi.roi_percentage,
+            "payback_months": roi.payback_months,
+            "created_at": roi.created_at or datetime.utcnow(),
+        }])
+        self.db.commit()
+        return self.get_by_usecase(roi.usecase_id)
@@ -1,6 +1,6 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List, Optional
-from datetime import datetime
+from fastapi import APIRouter, HTTPException, Query, Depends
+from typing import List, Optional, Tuple
+from datetime import datetime, date
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 import uuid
@@ -8,9 +8,13 @@ import uuid
 from database import get_db
 from db_models import AIAssistantModel, AssistantStatus as DBAssistantStatus
 from repositories import AssistantRepository
+from analytics import VersionedCache, forecast_licenses, months_before
 
 router = APIRouter()
 
+# License forecasts, recomputed only after snapshots or assistants change
+_forecast_cache = VersionedCache()
+
 
 class AIAssistantCreate(BaseModel):
     name: str
@@ -31,6 +35,31 @@ class AIAssistant(AIAssistantCreate):
     created_at: str
 
 
+def _parse_date(value: str, field: str) -> Optional[date]:
+    """Parse a YYYY-MM-DD contract date; empty values are NULL, anything else unparseable raises ValueError."""
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value[:10])
+    except ValueError:
+        raise ValueError(f"{field} must be a YYYY-MM-DD date, got {value!r}")
+
+
+def _contract_dates(data: AIAssistantCreate) -> Tuple[Optional[date], Optional[date]]:
+    """Contract start and end of a create or update request, 400 when either is not a date."""
+    try:
+        return (
+            _parse_date(data.contract_start, "contract_start"),
+            _parse_date(data.contract_end, "contract_end"),
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _format_date(value: Optional[date]) -> str:
+    return value.isoformat() if value else ""
+
+
 @router.get("/", response_model=List[AIAssistant])
 async def get_assistants(
     status: Optional[str] = None, 
@@ -51,8 +80,8 @@ async def get_assistants(
             monthly_price=a.monthly_price or 0,
             licenses=a.licenses or 0,
             active_users=a.active_users or 0,
-            contract_start=a.contract_start or "",
-            contract_end=a.contract_end or "",
+            contract_start=_format_date(a.contract_start),
+            contract_end=_format_date(a.contract_end),
             status=a.status.value if a.status else "pending",
             features=a.features or [],
             created_at=a.created_at.isoformat() if a.created_at else ""
@@ -68,6 +97,76 @@ async def get_assistants_summary(db: Session = Depends(get_db)):
     return repo.get_summary()
 
 
+@router.get("/vendors/suggest", response_model=List[str])
+async def suggest_vendors(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_db)
+):
+    """Vendor typeahead: distinct vendors matching q, best matches first"""
+    repo = AssistantRepository(db)
+    return repo.suggest_values("vendor", q, limit)
+
+
+@router.get("/renewals")
+async def get_upcoming_renewals(
+    within_days: int = Query(90, ge=0, le=730),
+    include_cancelled: bool = False,
+    db: Session = Depends(get_db)
+):
+    """Get contracts ending within `within_days` days and the monthly cost at risk"""
+    repo = AssistantRepository(db)
+    return repo.get_upcoming_renewals(within_days, include_cancelled)
+
+
+@router.get("/forecast")
+async def get_license_forecast(
+    months: int = Query(12, ge=2, le=60),
+    horizon: int = Query(3, ge=1, le=12),
+    headroom: float = Query(0.1, ge=0, le=1),
+    db: Session = Depends(get_db)
+):
+    """Forecast active users from monthly snapshots and recommend next-quarter license counts"""
+    repo = AssistantRepository(db)
+    # Snapshots are bucketed by UTC month, so the window is too
+    this_month = datetime.utcnow().date().replace(day=1)
+    start_month = months_before(this_month, months - 1)
+    
+    def compute():
+        forecasts = forecast_licenses(
+            repo.get_snapshots(start_month), start_month, this_month, horizon, headroom
+        )
+        results = []
+        for a in repo.get_all():
+            f = forecasts.get(a.id)
+            if not f or a.status == DBAssistantStatus.cancelled:
+                continue
+            results.append({
+                "id": a.id,
+                "name": a.name,
+                "vendor": a.vendor,
+                "category": a.category or "other",
+                "monthly_price": a.monthly_price or 0,
+                **f,
+                "monthly_cost_change": f["license_change"] * (a.monthly_price or 0),
+            })
+        results.sort(key=lambda r: r["monthly_cost_change"])
+        return {
+            "start_month": start_month.isoformat(),
+            "end_month": this_month.isoformat(),
+            "horizon_months": horizon,
+            "headroom": headroom,
+            "total_monthly_cost_change": sum(r["monthly_cost_change"] for r in results),
+            "assistants": results,
+        }
+    
+    return _forecast_cache.get_or_compute(
+        ("forecast", start_month, horizon, headroom),
+        repo.get_forecast_version(),
+        compute
+    )
+
+
 @router.get("/{assistant_id}", response_model=AIAssistant)
 async def get_assistant(assistant_id: str, db: Session = Depends(get_db)):
     """Get a specific AI assistant by ID"""
@@ -85,8 +184,8 @@ async def get_assistant(assistant_id: str, db: Session = Depends(get_db)):
         monthly_price=a.monthly_price or 0,
         licenses=a.licenses or 0,
         active_users=a.active_users or 0,
-        contract_start=a.contract_start or "",
-        contract_end=a.contract_end or "",
+        contract_start=_format_date(a.contract_start),
+        contract_end=_format_date(a.contract_end),
         status=a.status.value if a.status else "pending",
         features=a.features or [],
         created_at=a.created_at.isoformat() if a.created_at else ""
@@ -97,6 +196,7 @@ async def get_assistant(assistant_id: str, db: Session = Depends(get_db)):
 async def create_assistant(data: AIAssistantCreate, db: Session = Depends(get_db)):
     """Create a new AI assistant"""
     repo = AssistantRepository(db)
+    contract_start, contract_end = _contract_dates(data)
     assistant_id = str(uuid.uuid4())
     
     db_status = None
@@ -114,8 +214,8 @@ async def create_assistant(data: AIAssistantCreate, db: Session = Depends(get_db
         monthly_price=data.monthly_price,
         licenses=data.licenses,
         active_users=data.active_users,
-        contract_start=data.contract_start,
-        contract_end=data.contract_end,
+        contract_start=contract_start,
+        contract_end=contract_end,
         status=db_status,
         features=data.features,
         created_at=datetime.utcnow()
@@ -132,8 +232,8 @@ async def create_assistant(data: AIAssistantCreate, db: Session = Depends(get_db
         monthly_price=db_assistant.monthly_price or 0,
         licenses=db_assistant.licenses or 0,
         active_users=db_assistant.active_users or 0,
-        contract_start=db_assistant.contract_start or "",
-        contract_end=db_assistant.contract_end or "",
+        contract_start=_format_date(db_assistant.contract_start),
+        contract_end=_format_date(db_assistant.contract_end),
         status=db_assistant.status.value if db_assistant.status else "pending",
         features=db_assistant.features or [],
         created_at=db_assistant.created_at.isoformat() if db_assistant.created_at else ""
@@ -147,6 +247,7 @@ async def update_assistant(assistant_id: str, data: AIAssistantCreate, db: Sessi
     existing = repo.get(assistant_id)
     if not existing:
         raise HTTPException(status_code=404, detail="AI assistant not found")
+    contract_start, contract_end = _contract_dates(data)
     
     db_status = None
     try:
@@ -161,8 +262,8 @@ async def update_assistant(assistant_id: str, data: AIAssistantCreate, db: Sessi
     existing.monthly_price = data.monthly_price
     existing.licenses = data.licenses
     existing.active_users = data.active_users
-    existing.contract_start = data.contract_start
-    existing.contract_end = data.contract_end
+    existing.contract_start = contract_start
+    existing.contract_end = contract_end
     existing.status = db_status
     existing.features = data.features
     
@@ -177,8 +278,8 @@ async def update_assistant(assistant_id: str, data: AIAssistantCreate, db: Sessi
         monthly_price=existing.monthly_price or 0,
         licenses=existing.licenses or 0,
         active_users=existing.active_users or 0,
-        contract_start=existing.contract_start or "",
-        contract_end=existing.contract_end or "",
+        contract_start=_format_date(existing.contract_start),
+        contract_end=_format_date(existing.contract_end),
         status=existing.status.value if existing.status else "pending",
         features=existing.features or [],
         created_at=existing.created_at.isoformat() if existing.created_at else ""
@@ -198,11 +299,19 @@ async def delete_assistant(assistant_id: str, db: Session = Depends(get_db)):
 
 @router.post("/sync")
 async def sync_assistants(assistants: List[AIAssistant], db: Session = Depends(get_db)):
-    """Sync assistants from frontend localStorage to backend"""
+    """Sync assistants from frontend localStorage to backend; assistants with invalid contract dates are skipped and reported"""
     repo = AssistantRepository(db)
     
     assistants_data = []
+    errors = []
     for a in assistants:
+        try:
+            contract_start = _parse_date(a.contract_start, "contract_start")
+            contract_end = _parse_date(a.contract_end, "contract_end")
+        except ValueError as e:
+            errors.append({"id": a.id, "error": str(e)})
+            continue
+        
         db_status = None
         try:
             db_status = DBAssistantStatus(a.status)
@@ -218,12 +327,12 @@ async def sync_assistants(assistants: List[AIAssistant], db: Session = Depends(g
             "monthly_price": a.monthly_price,
             "licenses": a.licenses,
             "active_users": a.active_users,
-            "contract_start": a.contract_start,
-            "contract_end": a.contract_end,
+            "contract_start": contract_start,
+            "contract_end": contract_end,
             "status": db_status,
             "features": a.features,
             "created_at": datetime.fromisoformat(a.created_at) if a.created_at else datetime.utcnow()
         })
     
     count = repo.bulk_upsert(assistants_data)
-    return {"message": f"Synced {count} assistants", "count": count}
+    return {"message": f"Synced {count} assistants", "count": count, "errors": errors}
@@ -127,12 +127,10 @@ async def get_dashboard_summary(db: Session = Depends(get_db)):
     # ==========================================
     # Value/ROI metrics
     # ==========================================
-    value_records = value_repo.get_all()
-    roi_calcs = roi_repo.get_all()
-    
-    total_investment = sum(r.investment or 0 for r in roi_calcs) if roi_calcs else 0
-    total_returns = sum(r.returns or 0 for r in roi_calcs) if roi_calcs else 0
-    total_roi = ((total_returns - total_investment) / total_investment * 100) if total_investment > 0 else 0
+    roi_totals = roi_repo.get_totals()
+    total_investment = roi_totals["investment"]
+    total_returns = roi_totals["returns"]
+    total_roi = roi_totals["roi_percentage"]
     
     # ==========================================
     # Learning progress
@@ -233,7 +231,7 @@ async def get_dashboard_summary(db: Session = Depends(get_db)):
             "total_investment": total_investment,
             "total_returns": total_returns,
             "roi_percentage": round(total_roi, 1),
-            "tracked_kpis": len(set(vr.kpi for vr in value_records if vr.kpi))
+            "tracked_kpis": value_repo.count_tracked_kpis()
         },
         "recent_activity": recent_activity
     }
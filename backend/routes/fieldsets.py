@@ -0,0 +1,37 @@
+"""
+Sparse fieldsets for list endpoints: `?fields=id,title,impact_score`.
+
+Each resource describes its response fields as getters over the database
+model. The full converter builds the Pydantic model from all of them; a
+sparse request evaluates only the requested getters, after the repository
+has loaded only those columns.
+"""
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+FieldGetters = Dict[str, Callable[[Any], Any]]
+
+
+def parse_fields(fields: Optional[str], getters: FieldGetters) -> Optional[List[str]]:
+    """
+    Validate a comma-separated fields parameter. Returns None (all fields)
+    when absent; otherwise the requested names, always starting with id.
+    """
+    if not fields:
+        return None
+    requested = list(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+    unknown = [f for f in requested if f not in getters]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(unknown)}. Available: {', '.join(getters)}"
+        )
+    return ["id"] + [f for f in requested if f != "id"]
+
+
+def sparse_response(items: Iterable[Any], fields: List[str], getters: FieldGetters) -> JSONResponse:
+    """Serialize only the requested fields of each item, skipping response model validation."""
+    return JSONResponse(jsonable_encoder([{f: getters[f](item) for f in fields} for item in items]))
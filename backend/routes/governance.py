@@ -1,10 +1,11 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Query, Depends
 from typing import List, Optional
 from datetime import datetime
 from sqlalchemy.orm import Session
 import uuid
 
 from database import get_db
+from routes.fieldsets import FieldGetters, parse_fields, sparse_response
 from db_models import ModelCardModel, RiskModel, RiskCategory as DBRiskCategory, RiskSeverity as DBRiskSeverity
 from repositories import GovernanceRepository
 from models import (
@@ -54,9 +55,9 @@ def generate_default_metrics() -> List[EvaluationMetric]:
     ]
 
 
-def db_to_model_card(card: ModelCardModel) -> ModelCard:
-    """Convert database model to Pydantic model"""
-    risks = [
+def db_to_risks(card: ModelCardModel) -> List[Risk]:
+    """Convert a model card's risk rows to Pydantic risks"""
+    return [
         Risk(
             category=RiskCategory(r.category.value),
             description=r.description,
@@ -65,31 +66,39 @@ def db_to_model_card(card: ModelCardModel) -> ModelCard:
         )
         for r in card.risks
     ]
-    
-    metrics = [
-        EvaluationMetric(**m) for m in (card.evaluation_metrics or [])
-    ]
-    
-    return ModelCard(
-        id=card.id,
-        model_name=card.model_name,
-        version=card.version,
-        purpose=card.purpose,
-        owner=card.owner,
-        training_data=card.training_data,
-        evaluation_metrics=metrics,
-        risks=risks,
-        mitigations=card.mitigations or [],
-        created_at=card.created_at,
-        updated_at=card.updated_at
-    )
+
+
+MODEL_CARD_FIELDS: FieldGetters = {
+    "id": lambda card: card.id,
+    "model_name": lambda card: card.model_name,
+    "version": lambda card: card.version,
+    "purpose": lambda card: card.purpose,
+    "owner": lambda card: card.owner,
+    "training_data": lambda card: card.training_data,
+    "evaluation_metrics": lambda card: [EvaluationMetric(**m) for m in (card.evaluation_metrics or [])],
+    "risks": db_to_risks,
+    "mitigations": lambda card: card.mitigations or [],
+    "created_at": lambda card: card.created_at,
+    "updated_at": lambda card: card.updated_at,
+}
+
+
+def db_to_model_card(card: ModelCardModel) -> ModelCard:
+    """Convert database model to Pydantic model"""
+    return ModelCard(**{name: get(card) for name, get in MODEL_CARD_FIELDS.items()})
 
 
 @router.get("/", response_model=List[ModelCard])
-async def get_model_cards(db: Session = Depends(get_db)):
+async def get_model_cards(
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,model_name,owner"),
+    db: Session = Depends(get_db)
+):
     """Get all model cards"""
     repo = GovernanceRepository(db)
-    cards = repo.get_all_with_risks()
+    selected = parse_fields(fields, MODEL_CARD_FIELDS)
+    cards = repo.get_all_with_risks(selected)
+    if selected:
+        return sparse_response(cards, selected, MODEL_CARD_FIELDS)
     return [db_to_model_card(card) for card in cards]
 
 
@@ -107,6 +116,17 @@ async def get_risk_summary(db: Session = Depends(get_db)):
     return repo.get_risk_summary()
 
 
+@router.get("/owners/suggest", response_model=List[str])
+async def suggest_owners(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_db)
+):
+    """Owner typeahead: distinct model card owners matching q, best matches first"""
+    repo = GovernanceRepository(db)
+    return repo.suggest_values("owner", q, limit)
+
+
 @router.get("/{card_id}", response_model=ModelCard)
 async def get_model_card(card_id: str, db: Session = Depends(get_db)):
     """Get a specific model card by ID"""
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Query, Depends
 from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime
@@ -6,6 +6,7 @@ from sqlalchemy.orm import Session
 import uuid
 
 from database import get_db
+from routes.fieldsets import FieldGetters, parse_fields, sparse_response
 from db_models import AIInitiativeModel, ActionItemModel, InitiativeRiskModel, InitiativeStatus
 from repositories import InitiativeRepository
 
@@ -79,9 +80,9 @@ class AIInitiativeUpdate(BaseModel):
     progress: Optional[int] = None
 
 
-def db_to_initiative(db_init: AIInitiativeModel) -> AIInitiative:
-    """Convert database model to Pydantic model"""
-    action_items = [
+def db_to_action_items(db_init: AIInitiativeModel) -> List[ActionItem]:
+    """Convert an initiative's action item rows to Pydantic action items"""
+    return [
         ActionItem(
             id=ai.id,
             title=ai.title,
@@ -92,8 +93,11 @@ def db_to_initiative(db_init: AIInitiativeModel) -> AIInitiative:
         )
         for ai in db_init.action_items
     ]
-    
-    risks = [
+
+
+def db_to_risks(db_init: AIInitiativeModel) -> List[Risk]:
+    """Convert an initiative's risk rows to Pydantic risks"""
+    return [
         Risk(
             id=r.id,
             category=r.category,
@@ -105,34 +109,57 @@ def db_to_initiative(db_init: AIInitiativeModel) -> AIInitiative:
         )
         for r in db_init.risks
     ]
-    
-    return AIInitiative(
-        id=db_init.id,
-        title=db_init.title,
-        description=db_init.description or "",
-        team=db_init.team or "",
-        sponsor=db_init.sponsor or "",
-        status=db_init.status.value if db_init.status else "todo",
-        start_date=db_init.start_date or "",
-        target_date=db_init.target_date or "",
-        ai_assistants=db_init.ai_assistants or [],
-        objectives=db_init.objectives or [],
-        action_items=action_items,
-        risks=risks,
-        progress=db_init.progress or 0,
-        created_at=db_init.created_at.isoformat() if db_init.created_at else "",
-        updated_at=db_init.updated_at.isoformat() if db_init.updated_at else ""
-    )
+
+
+INITIATIVE_FIELDS: FieldGetters = {
+    "id": lambda i: i.id,
+    "title": lambda i: i.title,
+    "description": lambda i: i.description or "",
+    "team": lambda i: i.team or "",
+    "sponsor": lambda i: i.sponsor or "",
+    "status": lambda i: i.status.value if i.status else "todo",
+    "start_date": lambda i: i.start_date or "",
+    "target_date": lambda i: i.target_date or "",
+    "ai_assistants": lambda i: i.ai_assistants or [],
+    "objectives": lambda i: i.objectives or [],
+    "action_items": db_to_action_items,
+    "risks": db_to_risks,
+    "progress": lambda i: i.progress or 0,
+    "created_at": lambda i: i.created_at.isoformat() if i.created_at else "",
+    "updated_at": lambda i: i.updated_at.isoformat() if i.updated_at else "",
+}
+
+
+def db_to_initiative(db_init: AIInitiativeModel) -> AIInitiative:
+    """Convert database model to Pydantic model"""
+    return AIInitiative(**{name: get(db_init) for name, get in INITIATIVE_FIELDS.items()})
 
 
 @router.get("/", response_model=List[AIInitiative])
-async def get_initiatives(db: Session = Depends(get_db)):
+async def get_initiatives(
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,title,status,progress"),
+    db: Session = Depends(get_db)
+):
     """Get all AI initiatives"""
     repo = InitiativeRepository(db)
-    results = repo.get_all()
+    selected = parse_fields(fields, INITIATIVE_FIELDS)
+    results = repo.get_all(selected)
+    if selected:
+        return sparse_response(results, selected, INITIATIVE_FIELDS)
     return [db_to_initiative(i) for i in results]
 
 
+@router.get("/teams/suggest", response_model=List[str])
+async def suggest_teams(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_db)
+):
+    """Team typeahead: distinct initiative teams matching q, best matches first"""
+    repo = InitiativeRepository(db)
+    return repo.suggest_values("team", q, limit)
+
+
 @router.post("/", response_model=AIInitiative)
 async def create_initiative(initiative: AIInitiativeCreate, db: Session = Depends(get_db)):
     """Create a new AI initiative"""
@@ -1,11 +1,12 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List
+from fastapi import APIRouter, HTTPException, Query, Depends
+from typing import List, Optional
 from datetime import datetime
 from sqlalchemy.orm import Session
 import uuid
 
 from models import TeamMaturity, TeamMaturityCreate, TeamMaturityUpdate, MaturityScores, MaturityLevel
 from database import get_db
+from routes.fieldsets import FieldGetters, parse_fields, sparse_response
 from db_models import TeamMaturityModel, MaturityLevel as DBMaturityLevel
 from repositories import MaturityRepository
 
@@ -119,35 +120,47 @@ def generate_insights(scores: MaturityScores) -> dict:
     return {"strengths": strengths, "improvement_areas": improvement_areas}
 
 
-def db_to_maturity(db_m: TeamMaturityModel) -> TeamMaturity:
-    """Convert database model to Pydantic model"""
-    scores = MaturityScores(
+def db_to_scores(db_m: TeamMaturityModel) -> MaturityScores:
+    """Read the stored scores JSON into MaturityScores, missing dimensions as 0"""
+    return MaturityScores(
         adoption=db_m.scores.get("adoption", 0) if db_m.scores else 0,
         proficiency=db_m.scores.get("proficiency", 0) if db_m.scores else 0,
         integration=db_m.scores.get("integration", 0) if db_m.scores else 0,
         governance=db_m.scores.get("governance", 0) if db_m.scores else 0,
         innovation=db_m.scores.get("innovation", 0) if db_m.scores else 0,
     )
-    
-    return TeamMaturity(
-        id=db_m.id,
-        team=db_m.team,
-        department=db_m.department or "",
-        assessment_date=db_m.assessment_date or datetime.utcnow(),
-        scores=scores,
-        overall_level=MaturityLevel(db_m.overall_level.value) if db_m.overall_level else MaturityLevel.novice,
-        strengths=db_m.strengths or [],
-        improvement_areas=db_m.improvement_areas or [],
-        recommendations=db_m.recommendations or [],
-        assessor=db_m.assessor or "AI Enablement Team",
-    )
+
+
+MATURITY_FIELDS: FieldGetters = {
+    "id": lambda m: m.id,
+    "team": lambda m: m.team,
+    "department": lambda m: m.department or "",
+    "assessment_date": lambda m: m.assessment_date or datetime.utcnow(),
+    "scores": db_to_scores,
+    "overall_level": lambda m: MaturityLevel(m.overall_level.value) if m.overall_level else MaturityLevel.novice,
+    "strengths": lambda m: m.strengths or [],
+    "improvement_areas": lambda m: m.improvement_areas or [],
+    "recommendations": lambda m: m.recommendations or [],
+    "assessor": lambda m: m.assessor or "AI Enablement Team",
+}
+
+
+def db_to_maturity(db_m: TeamMaturityModel) -> TeamMaturity:
+    """Convert database model to Pydantic model"""
+    return TeamMaturity(**{name: get(db_m) for name, get in MATURITY_FIELDS.items()})
 
 
 @router.get("/", response_model=List[TeamMaturity])
-async def get_all_maturity_assessments(db: Session = Depends(get_db)):
+async def get_all_maturity_assessments(
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,team,overall_level"),
+    db: Session = Depends(get_db)
+):
     """Get all team maturity assessments"""
     repo = MaturityRepository(db)
-    results = repo.get_all()
+    selected = parse_fields(fields, MATURITY_FIELDS)
+    results = repo.get_all(selected)
+    if selected:
+        return sparse_response(results, selected, MATURITY_FIELDS)
     return [db_to_maturity(m) for m in results]
 
 
@@ -1,15 +1,29 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Query, Depends, UploadFile, File
 from typing import List, Optional
-from datetime import datetime
+from datetime import datetime, date, timedelta, timezone
+import io
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
 from database import get_db
-from db_models import CopilotMetricsModel
+from db_models import CopilotMetricsModel, CopilotTeamModel
 from repositories import MetricsRepository
+from analytics import VersionedCache, compute_usage_analytics
+from ingest import import_metrics_stream
 
 router = APIRouter()
 
+# Analytics results, recomputed only after a new metrics sync
+_analytics_cache = VersionedCache(max_entries=64)
+
+
+class DailyTeamMetrics(BaseModel):
+    date: date
+    active_users: int = 0
+    engaged_users: int = 0
+    suggestions: int = 0
+    acceptances: int = 0
+
 
 class TeamMetrics(BaseModel):
     org: str
@@ -20,6 +34,22 @@ class TeamMetrics(BaseModel):
     acceptance_rate: float = 0
 
 
+class BreakdownMetrics(BaseModel):
+    date: date
+    editor: str
+    language: str
+    engaged_users: int = 0
+    suggestions: int = 0
+    acceptances: int = 0
+    lines_suggested: int = 0
+    lines_accepted: int = 0
+
+
+class TeamMetricsSync(TeamMetrics):
+    daily: List[DailyTeamMetrics] = []
+    breakdown: List[BreakdownMetrics] = []
+
+
 class MetricsSummary(BaseModel):
     total_active_users: int = 0
     total_engaged_users: int = 0
@@ -32,7 +62,43 @@ class MetricsSummary(BaseModel):
 
 class MetricsSync(BaseModel):
     summary: MetricsSummary
-    teams: List[TeamMetrics] = []
+    teams: List[TeamMetricsSync] = []
+
+
+class SeatRecord(BaseModel):
+    login: str
+    assigning_team: Optional[str] = None
+    last_activity_at: Optional[datetime] = None
+    last_activity_editor: Optional[str] = None
+    pending_cancellation_date: Optional[date] = None
+    created_at: Optional[datetime] = None
+
+
+class SeatSync(BaseModel):
+    org: str
+    seats: List[SeatRecord] = []
+    # synced_at returned for the first page of this sync, sent back with the later pages
+    sync_started_at: Optional[datetime] = None
+    # Set on the last page of a full org sync: seats not seen since sync_started_at are removed
+    complete: bool = False
+
+
+def _team_to_response(t: CopilotTeamModel) -> TeamMetrics:
+    return TeamMetrics(
+        org=t.org,
+        slug=t.slug,
+        name=t.name,
+        total_active_users=t.total_active_users or 0,
+        total_engaged_users=t.total_engaged_users or 0,
+        acceptance_rate=t.acceptance_rate or 0
+    )
+
+
+def _to_utc_naive(value: Optional[datetime]) -> Optional[datetime]:
+    """Store GitHub timestamps as naive UTC, like the rest of the schema."""
+    if value and value.tzinfo:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
 
 
 @router.get("/summary")
@@ -42,14 +108,89 @@ async def get_metrics_summary(db: Session = Depends(get_db)):
     return repo.get_summary()
 
 
-@router.get("/teams")
-async def get_team_metrics(db: Session = Depends(get_db)):
-    """Get metrics broken down by team"""
+@router.get("/teams", response_model=List[TeamMetrics])
+async def get_team_metrics(
+    sort: Optional[str] = Query(
+        None, pattern="^-?(acceptance_rate|total_active_users|total_engaged_users|name)$"
+    ),
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    min_active: Optional[int] = Query(None, ge=0),
+    min_acceptance_rate: Optional[float] = Query(None, ge=0, le=100),
+    org: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """Get metrics broken down by team, e.g. ?sort=-acceptance_rate&limit=20&min_active=5"""
     repo = MetricsRepository(db)
-    metrics = repo.get_current()
-    if not metrics or not metrics.teams:
-        return []
-    return metrics.teams
+    teams = repo.get_teams(
+        sort=sort,
+        limit=limit,
+        offset=offset,
+        min_active=min_active,
+        min_acceptance_rate=min_acceptance_rate,
+        org=org
+    )
+    return [_team_to_response(t) for t in teams]
+
+
+@router.get("/languages")
+async def get_language_metrics(
+    days: int = Query(28, ge=1, le=365),
+    until: Optional[date] = None,
+    org: Optional[str] = None,
+    team: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Get code-completion totals and period-over-period growth per language.
+    Without team, per-team rows are summed, with org-level rows (team "*")
+    standing in for days that have no team rows; team=* reports only those.
+    """
+    repo = MetricsRepository(db)
+    return repo.get_breakdown_rollup("language", days=days, until=until, org=org, team_slug=team)
+
+
+@router.get("/editors")
+async def get_editor_metrics(
+    days: int = Query(28, ge=1, le=365),
+    until: Optional[date] = None,
+    org: Optional[str] = None,
+    team: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Get code-completion totals and period-over-period growth per editor.
+    Without team, per-team rows are summed, with org-level rows (team "*")
+    standing in for days that have no team rows; team=* reports only those.
+    """
+    repo = MetricsRepository(db)
+    return repo.get_breakdown_rollup("editor", days=days, until=until, org=org, team_slug=team)
+
+
+@router.get("/analytics")
+async def get_usage_analytics(
+    days: int = Query(90, ge=7, le=730),
+    z_threshold: float = Query(2.0, gt=0, le=10),
+    db: Session = Depends(get_db)
+):
+    """
+    Get rolling means, week-over-week deltas, anomalies and percentile ranks per team.
+    Days with only org-level (imported) rows are reported under team "*".
+    """
+    repo = MetricsRepository(db)
+    since = date.today() - timedelta(days=days)
+    # Rounded so near-identical thresholds share one cache entry
+    z_threshold = round(z_threshold, 1)
+    
+    return _analytics_cache.get_or_compute(
+        ("usage", since, z_threshold),
+        repo.get_sync_version(),
+        lambda: {
+            "days": days,
+            "z_threshold": z_threshold,
+            **compute_usage_analytics(repo.get_daily_metrics(since), z_threshold),
+        }
+    )
 
 
 @router.post("/sync")
@@ -67,6 +208,29 @@ async def sync_metrics(data: MetricsSync, db: Session = Depends(get_db)):
             "total_active_users": t.total_active_users,
             "total_engaged_users": t.total_engaged_users,
             "acceptance_rate": t.acceptance_rate,
+            "daily": [
+                {
+                    "day": d.date,
+                    "active_users": d.active_users,
+                    "engaged_users": d.engaged_users,
+                    "suggestions": d.suggestions,
+                    "acceptances": d.acceptances,
+                }
+                for d in t.daily
+            ],
+            "breakdown": [
+                {
+                    "day": b.date,
+                    "editor": b.editor,
+                    "language": b.language,
+                    "engaged_users": b.engaged_users,
+                    "suggestions": b.suggestions,
+                    "acceptances": b.acceptances,
+                    "lines_suggested": b.lines_suggested,
+                    "lines_accepted": b.lines_accepted,
+                }
+                for b in t.breakdown
+            ],
             "summary_data": data.summary.model_dump(),
             "last_updated": datetime.utcnow()
         }
@@ -82,6 +246,72 @@ async def sync_metrics(data: MetricsSync, db: Session = Depends(get_db)):
     }
 
 
+@router.post("/seats/sync")
+async def sync_seats(data: SeatSync, db: Session = Depends(get_db)):
+    """
+    Persist a page of Copilot billing seats for an org. Pages of one sync
+    share the sync_started_at returned for the first page; the last page sets
+    complete, which prunes seats that are no longer billed.
+    """
+    repo = MetricsRepository(db)
+    synced_at = datetime.utcnow()
+    sync_started_at = _to_utc_naive(data.sync_started_at) or synced_at
+    count = repo.upsert_seats(
+        data.org,
+        (
+            {
+                "login": s.login,
+                "assigning_team": s.assigning_team,
+                "last_activity_at": _to_utc_naive(s.last_activity_at),
+                "last_activity_editor": s.last_activity_editor,
+                "pending_cancellation_date": s.pending_cancellation_date,
+                "created_at": _to_utc_naive(s.created_at),
+            }
+            for s in data.seats
+        ),
+        synced_at=synced_at
+    )
+    removed = repo.prune_seats(data.org, sync_started_at) if data.complete else 0
+    return {
+        "message": f"Synced {count} seats",
+        "org": data.org,
+        "count": count,
+        "removed": removed,
+        "sync_started_at": sync_started_at.isoformat(),
+    }
+
+
+@router.get("/seats/idle")
+async def get_idle_seats(
+    days: int = Query(30, ge=1, le=365),
+    org: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_db)
+):
+    """Get seats idle for at least `days` days - used for license reclamation"""
+    repo = MetricsRepository(db)
+    return repo.get_idle_seats(days=days, org=org, limit=limit, offset=offset)
+
+
+@router.post("/import")
+def import_metrics_dump(
+    org: str,
+    team: Optional[str] = None,
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db)
+):
+    """
+    Import an exported Copilot metrics file (JSON array or NDJSON of metrics days).
+    Parsed as a stream and upserted in batches, so re-running an import is safe.
+    """
+    stream = io.TextIOWrapper(file.file, encoding="utf-8")
+    try:
+        return import_metrics_stream(db, stream, org, team)
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="File must be UTF-8 encoded JSON or NDJSON")
+
+
 @router.get("/")
 async def get_all_metrics(db: Session = Depends(get_db)):
     """Get all stored metrics data"""
@@ -113,6 +343,6 @@ async def get_all_metrics(db: Session = Depends(get_db)):
             "total_acceptances": metrics.total_acceptances or 0,
             "total_chats": metrics.total_chats or 0,
         },
-        "teams": metrics.teams or [],
+        "teams": [_team_to_response(t) for t in repo.get_teams()],
         "last_updated": metrics.last_updated.isoformat() if metrics.last_updated else None
     }
@@ -1,16 +1,126 @@
-from fastapi import APIRouter, HTTPException, Query, Depends
-from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Query, Depends, Response
+from typing import List, Optional, Tuple
 from datetime import datetime
 from sqlalchemy.orm import Session
+from pydantic import ValidationError
+import numpy as np
+import base64
+import binascii
+import json
 import uuid
 
 from database import get_db
-from db_models import UseCaseModel, UseCaseStatus as DBUseCaseStatus
+from routes.fieldsets import FieldGetters, parse_fields, sparse_response
+from db_models import UseCaseModel, UseCaseStatus as DBUseCaseStatus, DataAvailability as DBDataAvailability
 from repositories import UseCaseRepository
-from models import UseCase, UseCaseCreate, UseCaseStatus, DataAvailability
+from models import (
+    UseCase, UseCaseCreate, UseCaseStatus, DataAvailability, RankingRequest, UseCaseBatchRequest,
+    PortfolioRequest
+)
+from analytics import (
+    VersionedCache, build_use_case_snapshot, rank_scenarios, optimize_portfolio,
+    minhash_signature, lsh_buckets, estimate_similarity, score_pairs, group_pairs
+)
 
 router = APIRouter()
 
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+MAX_RANKING_SCENARIOS = 20
+MAX_MATRIX_BINS = 100
+MAX_MATRIX_ZOOM = 6
+MAX_BATCH_OPERATIONS = 500
+MAX_PORTFOLIO_TIME_LIMIT_MS = 10000
+PORTFOLIO_OBJECTIVES = ("net_return", "priority")
+
+_snapshot_cache = VersionedCache()
+
+
+USE_CASE_FIELDS: FieldGetters = {
+    "id": lambda uc: uc.id,
+    "title": lambda uc: uc.title,
+    "description": lambda uc: uc.description,
+    "department": lambda uc: uc.department,
+    "problem_statement": lambda uc: uc.problem_statement,
+    "expected_outcomes": lambda uc: uc.expected_outcomes,
+    "data_availability": lambda uc: DataAvailability(uc.data_availability.value),
+    "impact_score": lambda uc: uc.impact_score,
+    "feasibility_score": lambda uc: uc.feasibility_score,
+    "risk_score": lambda uc: uc.risk_score,
+    "timeline_estimate": lambda uc: uc.timeline_estimate,
+    "status": lambda uc: UseCaseStatus(uc.status.value),
+    "created_at": lambda uc: uc.created_at,
+}
+
+
+def db_to_use_case(uc: UseCaseModel) -> UseCase:
+    """Convert database model to Pydantic model"""
+    return UseCase(**{name: get(uc) for name, get in USE_CASE_FIELDS.items()})
+
+
+def use_case_columns(data: UseCaseCreate) -> dict:
+    """Column values for a use case from its create/update payload"""
+    return {
+        "title": data.title,
+        "description": data.description,
+        "department": data.department,
+        "problem_statement": data.problem_statement,
+        "expected_outcomes": data.expected_outcomes,
+        "data_availability": DBDataAvailability(data.data_availability.value),
+        "impact_score": data.impact_score,
+        "feasibility_score": data.feasibility_score,
+        "risk_score": data.risk_score,
+        "timeline_estimate": data.timeline_estimate,
+    }
+
+
+def _validation_message(e: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in e.errors()
+    )
+
+
+def matrix_point(uc: UseCaseModel) -> dict:
+    """One use case as a point on the impact/feasibility matrix"""
+    return {
+        "id": uc.id,
+        "title": uc.title,
+        "x": uc.feasibility_score,  # x-axis: feasibility
+        "y": uc.impact_score,       # y-axis: impact
+        "risk": uc.risk_score,
+        "status": uc.status.value,
+        "department": uc.department
+    }
+
+
+def _matrix_grid(bins: Optional[int], zoom: Optional[int]) -> Optional[int]:
+    if bins is not None and zoom is not None:
+        raise HTTPException(status_code=400, detail="Use either bins or zoom, not both")
+    return bins if bins is not None else (2 ** zoom if zoom is not None else None)
+
+
+def refresh_signatures(repo: UseCaseRepository, ids: Optional[List[str]] = None) -> int:
+    """Recompute MinHash signatures and LSH buckets for ids, or for every stale use case; returns how many"""
+    signatures, buckets = {}, {}
+    for usecase_id, text in repo.get_signature_texts(ids):
+        signature = minhash_signature(text)
+        signatures[usecase_id] = signature.tolist() if signature is not None else []
+        buckets[usecase_id] = lsh_buckets(signature) if signature is not None else []
+    repo.save_signatures(signatures, buckets)
+    return len(signatures)
+
+
+def _encode_cursor(priority_score: float, usecase_id: str) -> str:
+    payload = json.dumps({"p": priority_score, "id": usecase_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> Tuple[float, str]:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return float(payload["p"]), str(payload["id"])
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
 
 @router.get("/", response_model=List[UseCase])
 async def get_use_cases(
@@ -18,83 +128,274 @@ async def get_use_cases(
     department: Optional[str] = None,
     min_impact: Optional[float] = Query(None, ge=0, le=10),
     min_feasibility: Optional[float] = Query(None, ge=0, le=10),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,title,impact_score"),
     db: Session = Depends(get_db)
 ):
     """Get all use cases with optional filters"""
     repo = UseCaseRepository(db)
     db_status = DBUseCaseStatus(status.value) if status else None
-    results = repo.get_filtered(db_status, department, min_impact, min_feasibility)
+    selected = parse_fields(fields, USE_CASE_FIELDS)
+    results = repo.get_filtered(db_status, department, min_impact, min_feasibility, selected)
     
-    return [
-        UseCase(
-            id=uc.id,
-            title=uc.title,
-            description=uc.description,
-            department=uc.department,
-            problem_statement=uc.problem_statement,
-            expected_outcomes=uc.expected_outcomes,
-            data_availability=DataAvailability(uc.data_availability.value),
-            impact_score=uc.impact_score,
-            feasibility_score=uc.feasibility_score,
-            risk_score=uc.risk_score,
-            timeline_estimate=uc.timeline_estimate,
-            status=UseCaseStatus(uc.status.value),
-            created_at=uc.created_at
-        )
-        for uc in results
-    ]
+    if selected:
+        return sparse_response(results, selected, USE_CASE_FIELDS)
+    return [db_to_use_case(uc) for uc in results]
 
 
 @router.get("/prioritized", response_model=List[UseCase])
-async def get_prioritized_use_cases(db: Session = Depends(get_db)):
-    """Get use cases sorted by priority (impact * feasibility / risk)"""
+async def get_prioritized_use_cases(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    cursor: Optional[str] = None,
+    status: Optional[UseCaseStatus] = None,
+    department: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,title,impact_score"),
+    db: Session = Depends(get_db)
+):
+    """
+    Get use cases sorted by priority (impact * feasibility / risk).
+    With a limit, the X-Next-Cursor header holds the cursor for the next page.
+    """
     repo = UseCaseRepository(db)
-    cases = repo.get_all()
+    db_status = DBUseCaseStatus(status.value) if status else None
+    after = _decode_cursor(cursor) if cursor else None
+    selected = parse_fields(fields, USE_CASE_FIELDS)
+    cases = repo.get_prioritized(limit, after, db_status, department, selected)
+    
+    headers = {}
+    if limit is not None and len(cases) == limit:
+        last = cases[-1]
+        headers[NEXT_CURSOR_HEADER] = _encode_cursor(last.priority_score, last.id)
+    
+    if selected:
+        sparse = sparse_response(cases, selected, USE_CASE_FIELDS)
+        sparse.headers.update(headers)
+        return sparse
+    response.headers.update(headers)
+    return [db_to_use_case(uc) for uc in cases]
+
+
+@router.get("/search")
+async def search_use_cases(
+    q: str = Query(..., min_length=1),
+    status: Optional[UseCaseStatus] = None,
+    department: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_db)
+):
+    """
+    Full-text search across title, description, problem statement and expected
+    outcomes. Supports quoted phrases, OR and -exclusions; best matches first.
+    """
+    repo = UseCaseRepository(db)
+    db_status = DBUseCaseStatus(status.value) if status else None
+    total, matches = repo.search(q, limit, offset, db_status, department)
+    return {
+        "query": q,
+        "total": total,
+        "limit": limit,
+        "offset": offset,
+        "items": [
+            {
+                **db_to_use_case(uc).model_dump(),
+                "rank": round(rank, 4),
+                "title_highlight": title,
+                "snippet": snippet,
+            }
+            for uc, rank, title, snippet in matches
+        ],
+    }
+
+
+@router.post("/rank")
+async def rank_use_cases(request: RankingRequest, db: Session = Depends(get_db)):
+    """
+    What-if ranking: score all use cases under each weight scenario
+    (impact, feasibility, inverted risk, data availability) and rank them.
+    """
+    if not 1 <= len(request.scenarios) <= MAX_RANKING_SCENARIOS:
+        raise HTTPException(status_code=400, detail=f"Provide 1-{MAX_RANKING_SCENARIOS} scenarios")
+    if request.limit is not None and request.limit < 1:
+        raise HTTPException(status_code=400, detail="limit must be positive")
+    scenarios = [s.model_dump() for s in request.scenarios]
+    for s in scenarios:
+        weights = [s["impact"], s["feasibility"], s["risk"], s["data_availability"]]
+        if min(weights) < 0 or sum(weights) == 0:
+            raise HTTPException(status_code=400, detail="Weights must be non-negative and not all zero")
+    
+    repo = UseCaseRepository(db)
+    snapshot = _snapshot_cache.get_or_compute(
+        "snapshot",
+        repo.get_snapshot_version(),
+        lambda: build_use_case_snapshot(repo.get_ranking_rows())
+    )
+    
+    return {
+        "total": len(snapshot["ids"]),
+        "scenarios": rank_scenarios(
+            snapshot,
+            scenarios,
+            request.limit,
+            request.status.value if request.status else None,
+            request.department
+        ),
+    }
+
+
+@router.post("/portfolio/optimize")
+async def optimize_use_case_portfolio(request: PortfolioRequest, db: Session = Depends(get_db)):
+    """
+    Pick the use cases (with an ROI calculation) maximizing net return or total
+    priority within a budget, an optional project count and a risk ceiling.
+    """
+    if request.budget < 0:
+        raise HTTPException(status_code=400, detail="budget must be non-negative")
+    if request.capacity is not None and request.capacity < 1:
+        raise HTTPException(status_code=400, detail="capacity must be positive")
+    if request.objective not in PORTFOLIO_OBJECTIVES:
+        raise HTTPException(status_code=400, detail=f"objective must be one of {', '.join(PORTFOLIO_OBJECTIVES)}")
+    if not 1 <= request.time_limit_ms <= MAX_PORTFOLIO_TIME_LIMIT_MS:
+        raise HTTPException(status_code=400, detail=f"time_limit_ms must be 1-{MAX_PORTFOLIO_TIME_LIMIT_MS}")
+    
+    repo = UseCaseRepository(db)
+    statuses = [DBUseCaseStatus(s.value) for s in request.statuses] if request.statuses else None
+    candidates = repo.get_portfolio_candidates(request.max_risk, statuses)
+    
+    costs = np.array([c.investment or 0.0 for c in candidates], dtype=np.float64)
+    if request.objective == "priority":
+        values = np.array([c.priority_score or 0.0 for c in candidates], dtype=np.float64)
+    else:
+        values = np.array([(c.returns or 0.0) - (c.investment or 0.0) for c in candidates], dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        per_dollar = np.where(costs > 0, values / costs, np.nan)
+    
+    result = optimize_portfolio(costs, values, request.budget, request.capacity, request.time_limit_ms / 1000)
+    selected = set(result["selected"])
     
-    def priority_score(uc: UseCaseModel) -> float:
-        risk_factor = max(uc.risk_score, 0.1)  # Avoid division by zero
-        return (uc.impact_score * uc.feasibility_score) / risk_factor
+    def item(i: int) -> dict:
+        c = candidates[i]
+        return {
+            "id": c.id,
+            "title": c.title,
+            "department": c.department,
+            "status": c.status.value if c.status else None,
+            "risk_score": c.risk_score,
+            "priority_score": c.priority_score,
+            "investment": c.investment,
+            "returns": c.returns,
+            "value": round(float(values[i]), 2),
+            "value_per_dollar": None if np.isnan(per_dollar[i]) else round(float(per_dollar[i]), 4),
+        }
     
-    sorted_cases = sorted(cases, key=priority_score, reverse=True)
+    by_density = np.argsort(-np.nan_to_num(per_dollar, nan=np.inf), kind="stable")
+    spent = float(costs[list(selected)].sum()) if selected else 0.0
+    total_value = float(values[list(selected)].sum()) if selected else 0.0
     
-    return [
-        UseCase(
-            id=uc.id,
-            title=uc.title,
-            description=uc.description,
-            department=uc.department,
-            problem_statement=uc.problem_statement,
-            expected_outcomes=uc.expected_outcomes,
-            data_availability=DataAvailability(uc.data_availability.value),
-            impact_score=uc.impact_score,
-            feasibility_score=uc.feasibility_score,
-            risk_score=uc.risk_score,
-            timeline_estimate=uc.timeline_estimate,
-            status=UseCaseStatus(uc.status.value),
-            created_at=uc.created_at
-        )
-        for uc in sorted_cases
-    ]
+    return {
+        "solver": result["solver"],
+        "exact": result["exact"],
+        "fallback_reason": result.get("fallback_reason"),
+        "objective": request.objective,
+        "candidates": len(candidates),
+        "budget": request.budget,
+        "spent": round(spent, 2),
+        "remaining": round(request.budget - spent, 2),
+        "total_value": round(total_value, 2),
+        "value_per_dollar": round(total_value / spent, 4) if spent > 0 else None,
+        "selected": [item(i) for i in by_density if i in selected],
+        # Best use cases left out, by value per dollar: what more budget would buy next
+        "next_candidates": [item(i) for i in by_density if i not in selected and values[i] > 0][:5],
+    }
 
 
 @router.get("/matrix")
-async def get_matrix_data(db: Session = Depends(get_db)):
-    """Get use cases formatted for 2x2 matrix visualization"""
+async def get_matrix_data(
+    bins: Optional[int] = Query(None, ge=1, le=MAX_MATRIX_BINS),
+    zoom: Optional[int] = Query(None, ge=0, le=MAX_MATRIX_ZOOM),
+    db: Session = Depends(get_db)
+):
+    """
+    Get use cases formatted for 2x2 matrix visualization.
+    With bins (a bins x bins grid) or zoom (quadtree level, 2^zoom cells per
+    axis) the points are aggregated into cells instead.
+    """
     repo = UseCaseRepository(db)
+    grid = _matrix_grid(bins, zoom)
+    if grid:
+        return {"bins": grid, "cells": repo.get_matrix_cells(grid)}
+    
     cases = repo.get_all()
+    return [matrix_point(uc) for uc in cases]
+
+
+@router.get("/matrix/cell")
+async def get_matrix_cell(
+    x: int = Query(..., ge=0),
+    y: int = Query(..., ge=0),
+    bins: Optional[int] = Query(None, ge=1, le=MAX_MATRIX_BINS),
+    zoom: Optional[int] = Query(None, ge=0, le=MAX_MATRIX_ZOOM),
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_db)
+):
+    """Drill down into one aggregated matrix cell, highest priority first"""
+    grid = _matrix_grid(bins, zoom)
+    if not grid:
+        raise HTTPException(status_code=400, detail="bins or zoom is required")
+    if x >= grid or y >= grid:
+        raise HTTPException(status_code=400, detail=f"Cell must be within a {grid}x{grid} grid")
     
-    return [
-        {
-            "id": uc.id,
-            "title": uc.title,
-            "x": uc.feasibility_score,  # x-axis: feasibility
-            "y": uc.impact_score,       # y-axis: impact
-            "risk": uc.risk_score,
-            "status": uc.status.value,
-            "department": uc.department
-        }
-        for uc in cases
-    ]
+    repo = UseCaseRepository(db)
+    total, cases = repo.get_matrix_cell(grid, x, y, limit, offset)
+    return {
+        "x": x,
+        "y": y,
+        "bins": grid,
+        "total": total,
+        "limit": limit,
+        "offset": offset,
+        "items": [matrix_point(uc) for uc in cases],
+    }
+
+
+@router.get("/duplicates")
+async def get_duplicate_use_cases(
+    threshold: float = Query(0.5, ge=0.1, le=1),
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db)
+):
+    """
+    Near-duplicate report: use case pairs whose text similarity (estimated
+    Jaccard over word shingles) reaches threshold, and the groups they form.
+    Only pairs sharing an LSH bucket are compared. Signatures are kept
+    current by the write routes; see POST /signatures/refresh for backfills.
+    """
+    repo = UseCaseRepository(db)
+    
+    candidates = repo.get_candidate_pairs()
+    ids = {i for pair in candidates for i in pair}
+    signatures = {k: np.array(v) for k, v in repo.get_signatures(ids).items()}
+    pairs = score_pairs(candidates, signatures, threshold)
+    groups = group_pairs(pairs)
+    titles = repo.get_titles({i for a, b, _ in pairs[:limit] for i in (a, b)} | {i for g in groups for i in g})
+    
+    return {
+        "threshold": threshold,
+        "candidate_pairs": len(candidates),
+        "total_pairs": len(pairs),
+        "pairs": [
+            {"a": a, "a_title": titles.get(a), "b": b, "b_title": titles.get(b), "similarity": s}
+            for a, b, s in pairs[:limit]
+        ],
+        "groups": [[{"id": i, "title": titles.get(i)} for i in group] for group in groups],
+    }
+
+
+@router.post("/signatures/refresh")
+async def refresh_use_case_signatures(db: Session = Depends(get_db)):
+    """Compute missing or outdated similarity signatures, e.g. for use cases written before they existed"""
+    return {"refreshed": refresh_signatures(UseCaseRepository(db))}
 
 
 @router.get("/{usecase_id}", response_model=UseCase)
@@ -104,21 +405,7 @@ async def get_use_case(usecase_id: str, db: Session = Depends(get_db)):
     uc = repo.get(usecase_id)
     if not uc:
         raise HTTPException(status_code=404, detail="Use case not found")
-    return UseCase(
-        id=uc.id,
-        title=uc.title,
-        description=uc.description,
-        department=uc.department,
-        problem_statement=uc.problem_statement,
-        expected_outcomes=uc.expected_outcomes,
-        data_availability=DataAvailability(uc.data_availability.value),
-        impact_score=uc.impact_score,
-        feasibility_score=uc.feasibility_score,
-        risk_score=uc.risk_score,
-        timeline_estimate=uc.timeline_estimate,
-        status=UseCaseStatus(uc.status.value),
-        created_at=uc.created_at
-    )
+    return db_to_use_case(uc)
 
 
 @router.post("/", response_model=UseCase)
@@ -129,21 +416,13 @@ async def create_use_case(data: UseCaseCreate, db: Session = Depends(get_db)):
     
     db_use_case = UseCaseModel(
         id=usecase_id,
-        title=data.title,
-        description=data.description,
-        department=data.department,
-        problem_statement=data.problem_statement,
-        expected_outcomes=data.expected_outcomes,
-        data_availability=DBUseCaseStatus(data.data_availability.value) if hasattr(data.data_availability, 'value') else data.data_availability,
-        impact_score=data.impact_score,
-        feasibility_score=data.feasibility_score,
-        risk_score=data.risk_score,
-        timeline_estimate=data.timeline_estimate,
+        **use_case_columns(data),
         status=DBUseCaseStatus.draft,
         created_at=datetime.utcnow()
     )
     
     repo.create(db_use_case)
+    refresh_signatures(repo, [usecase_id])
     
     return UseCase(
         id=db_use_case.id,
@@ -162,6 +441,69 @@ async def create_use_case(data: UseCaseCreate, db: Session = Depends(get_db)):
     )
 
 
+@router.post("/batch")
+async def batch_use_cases(request: UseCaseBatchRequest, db: Session = Depends(get_db)):
+    """
+    Create, update and change the status of many use cases in one transaction.
+    Every operation is validated first; nothing is written unless all are
+    valid, and nothing at all with validate_only.
+    """
+    operations = request.operations
+    if not 1 <= len(operations) <= MAX_BATCH_OPERATIONS:
+        raise HTTPException(status_code=400, detail=f"Provide 1-{MAX_BATCH_OPERATIONS} operations")
+    
+    repo = UseCaseRepository(db)
+    existing_ids = repo.get_existing_ids(op.id for op in operations if op.op in ("update", "status") and op.id)
+    now = datetime.utcnow()
+    creates, updates, status_changes, results = [], [], {}, []
+    
+    for index, op in enumerate(operations):
+        result = {"index": index, "op": op.op, "id": op.id, "ok": True, "error": None}
+        try:
+            if op.op == "create":
+                data = UseCaseCreate.model_validate(op.data or {})
+                result["id"] = str(uuid.uuid4())
+                creates.append({
+                    "id": result["id"],
+                    **use_case_columns(data),
+                    "status": DBUseCaseStatus.draft,
+                    "created_at": now,
+                    "updated_at": now,
+                })
+            elif op.op in ("update", "status"):
+                if op.id not in existing_ids:
+                    raise ValueError("Use case not found")
+                if op.op == "update":
+                    data = UseCaseCreate.model_validate(op.data or {})
+                    updates.append({"id": op.id, **use_case_columns(data)})
+                else:
+                    if not op.status:
+                        raise ValueError("status is required")
+                    status_changes[op.id] = DBUseCaseStatus(op.status)
+            else:
+                raise ValueError(f"Unknown operation '{op.op}'")
+        except ValidationError as e:
+            result.update(ok=False, error=_validation_message(e))
+        except ValueError as e:
+            result.update(ok=False, error=str(e))
+        results.append(result)
+    
+    valid = all(r["ok"] for r in results)
+    committed = valid and not request.validate_only
+    if committed:
+        repo.apply_batch(creates, updates, status_changes)
+        refresh_signatures(repo, [row["id"] for row in creates + updates])
+    
+    return {
+        "valid": valid,
+        "committed": committed,
+        "created": len(creates) if committed else 0,
+        "updated": len(updates) if committed else 0,
+        "status_changed": len(status_changes) if committed else 0,
+        "results": results,
+    }
+
+
 @router.put("/{usecase_id}", response_model=UseCase)
 async def update_use_case(usecase_id: str, data: UseCaseCreate, db: Session = Depends(get_db)):
     """Update an existing use case"""
@@ -182,22 +524,37 @@ async def update_use_case(usecase_id: str, data: UseCaseCreate, db: Session = De
     existing.timeline_estimate = data.timeline_estimate
     
     repo.update(existing)
+    refresh_signatures(repo, [usecase_id])
     
-    return UseCase(
-        id=existing.id,
-        title=existing.title,
-        description=existing.description,
-        department=existing.department,
-        problem_statement=existing.problem_statement,
-        expected_outcomes=existing.expected_outcomes,
-        data_availability=DataAvailability(existing.data_availability.value),
-        impact_score=existing.impact_score,
-        feasibility_score=existing.feasibility_score,
-        risk_score=existing.risk_score,
-        timeline_estimate=existing.timeline_estimate,
-        status=UseCaseStatus(existing.status.value),
-        created_at=existing.created_at
-    )
+    return db_to_use_case(existing)
+
+
+@router.get("/{usecase_id}/similar")
+async def get_similar_use_cases(
+    usecase_id: str,
+    threshold: float = Query(0.3, ge=0, le=1),
+    limit: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    """Use cases whose text is similar to this one, most similar first"""
+    repo = UseCaseRepository(db)
+    if not repo.exists(usecase_id):
+        raise HTTPException(status_code=404, detail="Use case not found")
+    
+    candidates = repo.get_similarity_candidates(usecase_id)
+    signatures = repo.get_signatures([usecase_id, *candidates])
+    target = signatures.pop(usecase_id, None)
+    if target is None or not signatures:
+        return []
+    
+    ids = list(signatures)
+    similarity = estimate_similarity(np.array(target)[None, :], np.array([signatures[i] for i in ids]))
+    matches = sorted(
+        ((ids[k], float(s)) for k, s in enumerate(similarity) if s >= threshold),
+        key=lambda m: -m[1]
+    )[:limit]
+    titles = repo.get_titles(i for i, _ in matches)
+    return [{"id": i, "title": titles.get(i), "similarity": round(s, 3)} for i, s in matches]
 
 
 @router.patch("/{usecase_id}/status")
@@ -225,33 +582,6 @@ async def delete_use_case(usecase_id: str, db: Session = Depends(get_db)):
 
 @router.get("/stats/summary")
 async def get_use_case_stats(db: Session = Depends(get_db)):
-    """Get summary statistics for use cases"""
+    """Get summary statistics for use cases, with per-department averages and status x department counts"""
     repo = UseCaseRepository(db)
-    cases = repo.get_all()
-    
-    if not cases:
-        return {
-            "total": 0,
-            "by_status": {},
-            "by_department": {},
-            "avg_impact": 0,
-            "avg_feasibility": 0,
-            "avg_risk": 0
-        }
-    
-    by_status = {}
-    by_department = {}
-    
-    for uc in cases:
-        status = uc.status.value
-        by_status[status] = by_status.get(status, 0) + 1
-        by_department[uc.department] = by_department.get(uc.department, 0) + 1
-    
-    return {
-        "total": len(cases),
-        "by_status": by_status,
-        "by_department": by_department,
-        "avg_impact": sum(uc.impact_score for uc in cases) / len(cases),
-        "avg_feasibility": sum(uc.feasibility_score for uc in cases) / len(cases),
-        "avg_risk": sum(uc.risk_score for uc in cases) / len(cases)
-    }
+    return repo.get_stats()
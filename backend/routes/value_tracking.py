@@ -1,16 +1,34 @@
-from fastapi import APIRouter, HTTPException, Query, Depends
+from fastapi import APIRouter, HTTPException, Query, Depends, UploadFile, File
 from typing import List, Optional
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
+import io
+import os
 import uuid
 
-from database import get_db
+import numpy as np
+
+from analytics import VersionedCache, roi_metrics, validate_distribution, simulation_key, simulate_roi_batch
+from database import get_db, VALUE_RECORDS_RETENTION_MONTHS
 from db_models import ValueRecordModel, ROICalculationModel
-from repositories.value_tracking import ValueTrackingRepository, ROIRepository
-from models import ValueRecord, ValueRecordCreate, ROICalculation
+from repositories.value_tracking import ValueTrackingRepository, ROIRepository, KPIRepository
+from models import (
+    ValueRecord, ValueRecordCreate, ROICalculation, ROIBatchRequest, Distribution, ROISimulationRequest
+)
+from ingest import import_value_records_stream, detect_value_records_format
 
 router = APIRouter()
 
+MAX_ROI_BATCH = 5000
+MAX_SIMULATION_DRAWS = 200_000
+MAX_SIMULATION_HORIZON_MONTHS = 120
+MAX_SIMULATED_USE_CASES = 500
+MAX_SIMULATION_WORKERS = os.cpu_count() or 1
+SIMULATED_DISTRIBUTIONS = ("investment", "monthly_returns", "ramp_up_months", "discount_rate")
+
+# Simulation results per use case, versioned by the hash of their inputs
+_simulation_cache = VersionedCache()
+
 
 @router.get("/", response_model=List[ValueRecord])
 async def get_value_records(
@@ -29,7 +47,7 @@ async def get_value_records(
             id=r.id,
             usecase_id=r.usecase_id,
             usecase_title=r.usecase_title,
-            kpi=r.kpi,
+            kpi=r.kpi.name,
             value=r.value,
             target=r.target,
             unit=r.unit,
@@ -42,38 +60,32 @@ async def get_value_records(
 @router.get("/trends")
 async def get_value_trends(
     usecase_id: Optional[str] = None,
+    kpi: Optional[str] = None,
     period: str = Query("month", regex="^(week|month|quarter|year)$"),
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
     db: Session = Depends(get_db)
 ):
-    """Get value trends over time"""
+    """
+    Get value trends over time: one point per KPI and period with average,
+    sum and last value, average target and achievement, and target attainment
+    """
     repo = ValueTrackingRepository(db)
-    records = repo.get_filtered(usecase_id=usecase_id) if usecase_id else repo.get_all()
-    
-    # Group by KPI and date
-    trends = {}
-    for record in records:
-        if record.kpi not in trends:
-            trends[record.kpi] = []
-        trends[record.kpi].append({
-            "date": record.date.isoformat() if record.date else None,
-            "value": record.value,
-            "target": record.target,
-            "achievement": (record.value / record.target * 100) if record.target > 0 else 0
-        })
-    
-    return trends
+    return repo.get_trends(period, usecase_id, kpi, start_date, end_date)
 
 
 @router.get("/dashboard")
-async def get_value_dashboard(db: Session = Depends(get_db)):
+async def get_value_dashboard(
+    top_n: int = Query(3, ge=1, le=100),
+    attention_threshold: float = Query(80, ge=0),
+    db: Session = Depends(get_db)
+):
     """Get dashboard summary of value tracking"""
     repo = ValueTrackingRepository(db)
     roi_repo = ROIRepository(db)
     
-    records = repo.get_all()
-    roi_calcs = roi_repo.get_all()
-    
-    if not records:
+    totals = repo.get_dashboard_totals()
+    if not totals["total_records"]:
         return {
             "total_records": 0,
             "kpis_tracked": 0,
@@ -84,54 +96,10 @@ async def get_value_dashboard(db: Session = Depends(get_db)):
             "needs_attention": []
         }
     
-    # Calculate metrics
-    kpis = set(r.kpi for r in records)
-    usecases = set(r.usecase_id for r in records)
-    
-    achievements = []
-    for r in records:
-        if r.target > 0:
-            achievements.append(r.value / r.target * 100)
-    
-    avg_achievement = sum(achievements) / len(achievements) if achievements else 0
-    
-    # Calculate total ROI
-    total_investment = sum(r.investment for r in roi_calcs)
-    total_returns = sum(r.returns for r in roi_calcs)
-    total_roi = ((total_returns - total_investment) / total_investment * 100) if total_investment > 0 else 0
-    
-    # Find top performers and needs attention
-    by_usecase = {}
-    for r in records:
-        if r.usecase_id not in by_usecase:
-            by_usecase[r.usecase_id] = {
-                "usecase_id": r.usecase_id,
-                "usecase_title": r.usecase_title,
-                "achievements": []
-            }
-        if r.target > 0:
-            by_usecase[r.usecase_id]["achievements"].append(r.value / r.target * 100)
-    
-    usecase_scores = []
-    for uc_id, data in by_usecase.items():
-        if data["achievements"]:
-            avg = sum(data["achievements"]) / len(data["achievements"])
-            usecase_scores.append({
-                "usecase_id": uc_id,
-                "usecase_title": data["usecase_title"],
-                "avg_achievement": avg
-            })
-    
-    usecase_scores.sort(key=lambda x: x["avg_achievement"], reverse=True)
-    
     return {
-        "total_records": len(records),
-        "kpis_tracked": len(kpis),
-        "usecases_tracked": len(usecases),
-        "avg_achievement": avg_achievement,
-        "total_roi": total_roi,
-        "top_performers": usecase_scores[:3],
-        "needs_attention": [u for u in usecase_scores if u["avg_achievement"] < 80][:3]
+        **totals,
+        "total_roi": roi_repo.get_total_roi(),
+        **repo.get_usecase_rankings(top_n, attention_threshold),
     }
 
 
@@ -146,7 +114,7 @@ async def get_value_record(record_id: str, db: Session = Depends(get_db)):
         id=r.id,
         usecase_id=r.usecase_id,
         usecase_title=r.usecase_title,
-        kpi=r.kpi,
+        kpi=r.kpi.name,
         value=r.value,
         target=r.target,
         unit=r.unit,
@@ -164,7 +132,7 @@ async def create_value_record(data: ValueRecordCreate, db: Session = Depends(get
         id=record_id,
         usecase_id=data.usecase_id,
         usecase_title=data.usecase_title,
-        kpi=data.kpi,
+        kpi_id=KPIRepository(db).resolve_ids({data.kpi: data.unit})[data.kpi],
         value=data.value,
         target=data.target,
         unit=data.unit,
@@ -177,7 +145,7 @@ async def create_value_record(data: ValueRecordCreate, db: Session = Depends(get
         id=db_record.id,
         usecase_id=db_record.usecase_id,
         usecase_title=db_record.usecase_title,
-        kpi=db_record.kpi,
+        kpi=db_record.kpi.name,
         value=db_record.value,
         target=db_record.target,
         unit=db_record.unit,
@@ -185,6 +153,42 @@ async def create_value_record(data: ValueRecordCreate, db: Session = Depends(get
     )
 
 
+@router.post("/import")
+def import_value_records(
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, pattern="^(csv|ndjson)$"),
+    db: Session = Depends(get_db)
+):
+    """
+    Bulk import value records from a CSV (with header) or NDJSON / JSON array
+    file. Every row needs a date. Parsed as a stream and loaded with COPY in
+    batches; rejected rows are reported with their line (CSV) or record
+    (NDJSON) number.
+    """
+    fmt = format or detect_value_records_format(file.filename)
+    stream = io.TextIOWrapper(file.file, encoding="utf-8", newline="")
+    try:
+        return import_value_records_stream(db, stream, fmt)
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="File must be UTF-8 encoded CSV or NDJSON")
+
+
+@router.post("/partitions/maintain")
+async def maintain_value_record_partitions(
+    retention_months: Optional[int] = Query(None, ge=1, description="Defaults to VALUE_RECORDS_RETENTION_MONTHS"),
+    drop: bool = Query(False, description="Drop expired partitions instead of keeping them as archive tables"),
+    db: Session = Depends(get_db)
+):
+    """
+    Create the upcoming monthly partitions, move rows out of the default
+    partition and detach partitions past the retention period.
+    """
+    repo = ValueTrackingRepository(db)
+    result = repo.maintain_partitions(retention_months or VALUE_RECORDS_RETENTION_MONTHS or None, drop)
+    db.commit()
+    return {**result, "partitions": [m.strftime("%Y-%m") for m in repo.get_partitions()]}
+
+
 @router.put("/{record_id}", response_model=ValueRecord)
 async def update_value_record(record_id: str, data: ValueRecordCreate, db: Session = Depends(get_db)):
     """Update an existing value record"""
@@ -195,7 +199,7 @@ async def update_value_record(record_id: str, data: ValueRecordCreate, db: Sessi
     
     existing.usecase_id = data.usecase_id
     existing.usecase_title = data.usecase_title
-    existing.kpi = data.kpi
+    existing.kpi_id = KPIRepository(db).resolve_ids({data.kpi: data.unit})[data.kpi]
     existing.value = data.value
     existing.target = data.target
     existing.unit = data.unit
@@ -206,7 +210,7 @@ async def update_value_record(record_id: str, data: ValueRecordCreate, db: Sessi
         id=existing.id,
         usecase_id=existing.usecase_id,
         usecase_title=existing.usecase_title,
-        kpi=existing.kpi,
+        kpi=existing.kpi.name,
         value=existing.value,
         target=existing.target,
         unit=existing.unit,
@@ -231,9 +235,9 @@ async def calculate_roi(usecase_id: str, investment: float, returns: float, db:
     """Calculate ROI for a use case"""
     roi_repo = ROIRepository(db)
     
-    roi_percentage = ((returns - investment) / investment * 100) if investment > 0 else 0
-    monthly_returns = returns / 12 if returns > 0 else 0
-    payback_months = int(investment / monthly_returns) if monthly_returns > 0 else 0
+    roi, payback = roi_metrics([investment], [returns])
+    roi_percentage = float(roi[0])
+    payback_months = int(payback[0])
     
     roi_id = str(uuid.uuid4())
     db_roi = ROICalculationModel(
@@ -256,6 +260,148 @@ async def calculate_roi(usecase_id: str, investment: float, returns: float, db:
     )
 
 
+@router.post("/roi/batch")
+async def calculate_roi_batch(request: ROIBatchRequest, db: Session = Depends(get_db)):
+    """
+    Calculate ROI and payback for many use cases in one pass and save them
+    with a single upsert (the last entry per use case wins). Returns the saved
+    calculations and the ROI rollups of the departments they belong to.
+    """
+    if not request.calculations:
+        raise HTTPException(status_code=400, detail="No calculations given")
+    if len(request.calculations) > MAX_ROI_BATCH:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_ROI_BATCH} calculations per batch")
+    
+    roi_repo = ROIRepository(db)
+    items = list({c.usecase_id: c for c in request.calculations}.values())
+    investment = np.array([c.investment for c in items], dtype=np.float64)
+    returns = np.array([c.returns for c in items], dtype=np.float64)
+    roi, payback = roi_metrics(investment, returns)
+    
+    now = datetime.utcnow()
+    rows = [
+        {
+            "id": str(uuid.uuid4()),
+            "usecase_id": c.usecase_id,
+            "investment": c.investment,
+            "returns": c.returns,
+            "roi_percentage": float(roi[i]),
+            "payback_months": int(payback[i]),
+            "created_at": now,
+        }
+        for i, c in enumerate(items)
+    ]
+    roi_repo.upsert_many(rows)
+    db.commit()
+    
+    usecase_ids = [c.usecase_id for c in items]
+    return {
+        "saved": len(rows),
+        "calculations": [
+            ROICalculation(
+                usecase_id=row["usecase_id"],
+                investment=row["investment"],
+                returns=row["returns"],
+                roi_percentage=row["roi_percentage"],
+                payback_months=row["payback_months"]
+            )
+            for row in rows
+        ],
+        "departments": roi_repo.get_department_rollups(usecase_ids),
+    }
+
+
+@router.get("/roi/departments")
+async def get_roi_department_rollups(db: Session = Depends(get_db)):
+    """ROI summed per use case department, best net return first"""
+    roi_repo = ROIRepository(db)
+    return roi_repo.get_department_rollups()
+
+
+def _spread(center: float, uncertainty: float) -> Distribution:
+    """Triangular distribution +/- uncertainty (a fraction) around center."""
+    low, high = sorted((center * (1 - uncertainty), center * (1 + uncertainty)))
+    return Distribution(kind="triangular", low=low, mode=center, high=high)
+
+
+@router.post("/roi/simulate")
+def simulate_roi_scenarios(request: ROISimulationRequest, db: Session = Depends(get_db)):
+    """
+    Monte Carlo NPV, IRR and payback percentiles per use case, from
+    distributions of investment, monthly returns, ramp-up months and annual
+    discount rate. Results are cached per use case by input hash; without a
+    seed the draws are seeded from that hash, so results are reproducible.
+    Percentiles cover every draw: one landing on a draw that never pays back,
+    or whose IRR is out of range, is null; means cover the finite_draws only.
+    """
+    if not 1 <= request.draws <= MAX_SIMULATION_DRAWS:
+        raise HTTPException(status_code=400, detail=f"draws must be 1-{MAX_SIMULATION_DRAWS}")
+    if not 1 <= request.horizon_months <= MAX_SIMULATION_HORIZON_MONTHS:
+        raise HTTPException(status_code=400, detail=f"horizon_months must be 1-{MAX_SIMULATION_HORIZON_MONTHS}")
+    if not 0 <= request.uncertainty < 1:
+        raise HTTPException(status_code=400, detail="uncertainty must be at least 0 and below 1")
+    if request.workers < 1:
+        raise HTTPException(status_code=400, detail="workers must be positive")
+    
+    def spec(investment: Distribution, monthly_returns: Distribution,
+             ramp_up_months: Distribution, discount_rate: Distribution) -> dict:
+        return {
+            "investment": investment.model_dump(),
+            "monthly_returns": monthly_returns.model_dump(),
+            "ramp_up_months": ramp_up_months.model_dump(),
+            "discount_rate": discount_rate.model_dump(),
+            "horizon_months": request.horizon_months,
+            "draws": request.draws,
+            "seed": request.seed,
+        }
+    
+    specs = {
+        u.usecase_id: spec(
+            u.investment,
+            u.monthly_returns,
+            u.ramp_up_months or request.ramp_up_months,
+            u.discount_rate or request.discount_rate
+        )
+        for u in request.use_cases
+    }
+    if request.all_use_cases:
+        for r in ROIRepository(db).get_all():
+            if r.usecase_id not in specs:
+                # Saved returns are annual, as in calculate_roi
+                specs[r.usecase_id] = spec(
+                    _spread(r.investment or 0.0, request.uncertainty),
+                    _spread((r.returns or 0.0) / 12, request.uncertainty),
+                    request.ramp_up_months,
+                    request.discount_rate
+                )
+    if not specs:
+        raise HTTPException(status_code=400, detail="No use cases to simulate")
+    if len(specs) > MAX_SIMULATED_USE_CASES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_SIMULATED_USE_CASES} use cases per simulation")
+    try:
+        for usecase_id, s in specs.items():
+            for name in SIMULATED_DISTRIBUTIONS:
+                validate_distribution(s[name], f"{usecase_id} {name}")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    versions = {usecase_id: simulation_key(s) for usecase_id, s in specs.items()}
+    results = {usecase_id: _simulation_cache.get(usecase_id, versions[usecase_id]) for usecase_id in specs}
+    pending = [usecase_id for usecase_id, result in results.items() if result is None]
+    computed = simulate_roi_batch([specs[u] for u in pending], min(request.workers, MAX_SIMULATION_WORKERS))
+    for usecase_id, result in zip(pending, computed):
+        results[usecase_id] = _simulation_cache.get_or_compute(
+            usecase_id, versions[usecase_id], lambda result=result: result
+        )
+    
+    return {
+        "draws": request.draws,
+        "horizon_months": request.horizon_months,
+        "cached": len(specs) - len(pending),
+        "results": [{"usecase_id": usecase_id, **results[usecase_id]} for usecase_id in specs],
+    }
+
+
 @router.get("/roi/{usecase_id}", response_model=ROICalculation)
 async def get_roi_calculation(usecase_id: str, db: Session = Depends(get_db)):
     """Get ROI calculation for a use case"""
@@ -290,17 +436,10 @@ async def get_all_roi_calculations(db: Session = Depends(get_db)):
 
 
 @router.get("/kpis/available")
-async def get_available_kpis():
-    """Get list of commonly used KPIs"""
+async def get_available_kpis(db: Session = Depends(get_db)):
+    """Get the KPI catalog: the seeded common KPIs plus any recorded since"""
+    repo = KPIRepository(db)
     return [
-        {"name": "Cost Savings", "unit": "$", "category": "Financial"},
-        {"name": "Revenue Increase", "unit": "$", "category": "Financial"},
-        {"name": "Time Saved", "unit": "hours", "category": "Efficiency"},
-        {"name": "Error Reduction", "unit": "%", "category": "Quality"},
-        {"name": "Customer Satisfaction", "unit": "score", "category": "Customer"},
-        {"name": "Processing Speed", "unit": "ms", "category": "Performance"},
-        {"name": "Accuracy", "unit": "%", "category": "Quality"},
-        {"name": "Throughput", "unit": "units", "category": "Efficiency"},
-        {"name": "Employee Productivity", "unit": "%", "category": "Efficiency"},
-        {"name": "Compliance Rate", "unit": "%", "category": "Governance"},
+        {"id": k.id, "name": k.name, "unit": k.unit, "category": k.category}
+        for k in repo.get_catalog()
     ]
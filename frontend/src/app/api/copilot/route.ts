@@ -7,6 +7,7 @@ const GITHUB_ENTERPRISE = process.env.GITHUB_ENTERPRISE || "";
 
 const GITHUB_API_VERSION = "2022-11-28";
 const GITHUB_API_BASE = "https://api.github.com";
+const BACKEND_API_URL = process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000";
 
 interface CopilotLanguageMetrics {
   name: string;
@@ -165,25 +166,72 @@ async function getOrgCopilotBilling(org: string): Promise<CopilotBilling | null>
   return billing;
 }
 
+// Persist a page of seats in the backend seat store (used for idle-license reports).
+// Pages of one sync share the sync_started_at the backend returns for the first page;
+// `complete` on the last page prunes seats that are no longer billed.
+// Returns the sync start, or null when the page could not be stored.
+async function persistSeatsPage(
+  org: string,
+  seats: CopilotSeat[],
+  syncStartedAt: string | null,
+  complete: boolean
+): Promise<string | null> {
+  try {
+    const response = await fetch(`${BACKEND_API_URL}/api/metrics/seats/sync`, {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({
+        org,
+        seats: seats.map((seat) => ({
+          login: seat.assignee.login,
+          assigning_team: seat.assigning_team?.slug ?? null,
+          last_activity_at: seat.last_activity_at ?? null,
+          last_activity_editor: seat.last_activity_editor ?? null,
+          pending_cancellation_date: seat.pending_cancellation_date ?? null,
+          created_at: seat.created_at,
+        })),
+        sync_started_at: syncStartedAt,
+        complete,
+      }),
+    });
+    if (!response.ok) {
+      console.error(`Failed to persist seats for ${org}: ${response.status}`);
+      return null;
+    }
+    const result = await response.json();
+    return result.sync_started_at ?? null;
+  } catch (error) {
+    console.error(`Failed to persist seats for ${org}:`, error);
+    return null;
+  }
+}
+
 // Fetch all individual user seats (with pagination)
 async function getOrgCopilotSeats(org: string): Promise<CopilotSeat[]> {
   const allSeats: CopilotSeat[] = [];
   let page = 1;
   const perPage = 100;
+  let syncStartedAt: string | null = null;
+  // Stale seats are only pruned when every page was fetched and stored
+  let persisted = true;
 
   while (true) {
     const response = await fetchGitHubAPI<CopilotSeatsResponse>(
       `/orgs/${org}/copilot/billing/seats?per_page=${perPage}&page=${page}`
     );
     
-    if (!response || !response.seats || response.seats.length === 0) {
+    if (!response || !response.seats) {
       break;
     }
 
+    // Fewer than perPage (including an empty page) means we've reached the end
+    const lastPage = response.seats.length < perPage;
     allSeats.push(...response.seats);
+    const started = await persistSeatsPage(org, response.seats, syncStartedAt, lastPage && persisted);
+    persisted = persisted && started !== null;
+    syncStartedAt = syncStartedAt ?? started;
 
-    // If we got fewer than perPage, we've reached the end
-    if (response.seats.length < perPage) {
+    if (lastPage) {
       break;
     }
 
@@ -263,6 +311,50 @@ async function getEnterpriseCopilotBilling(enterprise: string): Promise<{ totalS
   };
 }
 
+// One row per (day, editor, language) for code completions, summed across models
+interface BreakdownRow {
+  date: string;
+  editor: string;
+  language: string;
+  engagedUsers: number;
+  suggestions: number;
+  acceptances: number;
+  linesSuggested: number;
+  linesAccepted: number;
+}
+
+function buildBreakdown(metricsData: CopilotMetricsDay[]): BreakdownRow[] {
+  const rows = new Map<string, BreakdownRow>();
+
+  for (const day of metricsData) {
+    for (const editor of day.copilot_ide_code_completions?.editors || []) {
+      for (const model of editor.models) {
+        for (const lang of model.languages || []) {
+          const key = `${day.date}|${editor.name}|${lang.name}`;
+          const existing = rows.get(key) || {
+            date: day.date,
+            editor: editor.name,
+            language: lang.name,
+            engagedUsers: 0,
+            suggestions: 0,
+            acceptances: 0,
+            linesSuggested: 0,
+            linesAccepted: 0,
+          };
+          existing.engagedUsers = Math.max(existing.engagedUsers, lang.total_engaged_users || 0);
+          existing.suggestions += lang.total_code_suggestions || 0;
+          existing.acceptances += lang.total_code_acceptances || 0;
+          existing.linesSuggested += lang.total_code_lines_suggested || 0;
+          existing.linesAccepted += lang.total_code_lines_accepted || 0;
+          rows.set(key, existing);
+        }
+      }
+    }
+  }
+
+  return Array.from(rows.values());
+}
+
 function aggregateMetrics(metricsData: CopilotMetricsDay[]) {
   if (metricsData.length === 0) {
     return {
@@ -279,6 +371,7 @@ function aggregateMetrics(metricsData: CopilotMetricsDay[]) {
       languages: [] as { name: string; users: number; suggestions: number; acceptances: number }[],
       editors: [] as { name: string; users: number }[],
       dailyData: [] as { date: string; activeUsers: number; engagedUsers: number; suggestions: number; acceptances: number; acceptanceRate: number }[],
+      breakdown: [] as BreakdownRow[],
     };
   }
 
@@ -395,6 +488,7 @@ function aggregateMetrics(metricsData: CopilotMetricsDay[]) {
     languages,
     editors,
     dailyData,
+    breakdown: buildBreakdown(metricsData),
   };
 }
 
@@ -42,6 +42,17 @@ interface DailyData {
   acceptanceRate: number;
 }
 
+interface BreakdownRow {
+  date: string;
+  editor: string;
+  language: string;
+  engagedUsers: number;
+  suggestions: number;
+  acceptances: number;
+  linesSuggested: number;
+  linesAccepted: number;
+}
+
 interface OrganizationMetrics {
   name: string;
   totalActiveUsers: number;
@@ -68,6 +79,7 @@ interface TeamMetrics {
   languages: LanguageMetrics[];
   editors: EditorMetrics[];
   dailyData: DailyData[];
+  breakdown?: BreakdownRow[];
 }
 
 interface CopilotMetrics {
@@ -158,6 +170,23 @@ export default function MetricsPage() {
           total_active_users: t.totalActiveUsers,
           total_engaged_users: t.totalEngagedUsers,
           acceptance_rate: t.acceptanceRate,
+          daily: (t.dailyData || []).map(d => ({
+            date: d.date,
+            active_users: d.activeUsers,
+            engaged_users: d.engagedUsers,
+            suggestions: d.suggestions || 0,
+            acceptances: d.acceptances || 0,
+          })),
+          breakdown: (t.breakdown || []).map(b => ({
+            date: b.date,
+            editor: b.editor,
+            language: b.language,
+            engaged_users: b.engagedUsers,
+            suggestions: b.suggestions,
+            acceptances: b.acceptances,
+            lines_suggested: b.linesSuggested,
+            lines_accepted: b.linesAccepted,
+          })),
         })),
       };
       
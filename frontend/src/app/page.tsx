@@ -154,13 +154,20 @@ export default function DashboardPage() {
             total_acceptances: metricsData.summary?.totalAcceptances || 0,
             total_chats: metricsData.summary?.totalChats || 0,
           },
-          teams: (metricsData.teams || []).map((t: { org: string; slug: string; name: string; totalActiveUsers: number; totalEngagedUsers: number; acceptanceRate: number }) => ({
+          teams: (metricsData.teams || []).map((t: { org: string; slug: string; name: string; totalActiveUsers: number; totalEngagedUsers: number; acceptanceRate: number; dailyData?: { date: string; activeUsers: number; engagedUsers: number; suggestions?: number; acceptances?: number }[] }) => ({
             org: t.org,
             slug: t.slug,
             name: t.name,
             total_active_users: t.totalActiveUsers,
             total_engaged_users: t.totalEngagedUsers,
             acceptance_rate: t.acceptanceRate,
+            daily: (t.dailyData || []).map(d => ({
+              date: d.date,
+              active_users: d.activeUsers,
+              engaged_users: d.engagedUsers,
+              suggestions: d.suggestions || 0,
+              acceptances: d.acceptances || 0,
+            })),
           })),
         };
         